@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+
+from memo import BoundedCache, dataset_fingerprint, respondent_codes, subset_parent
+from partials import attached_partial
+from perf import probed
+
+# -----------------------------------------------------------------------------
+# DISTINCTCOUNT (motor de agregação categórica)
+# -----------------------------------------------------------------------------
+_TABLES = BoundedCache(max_entries=64, name="tabelas")
+_MATCHES = BoundedCache(max_entries=256, name="contem")
+_CODES = BoundedCache(max_entries=128, name="fatoracoes")
+
+
+def factorize_column(s: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    # categóricas mantêm todas as categorias (equivale a groupby observed=False)
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.codes.to_numpy(), s.cat.categories
+    codes, uniques = pd.factorize(s, sort=True, use_na_sentinel=True)
+    if len(uniques) < np.iinfo(np.int32).max:
+        codes = codes.astype(np.int32)  # guardado por dataset: metade da memória
+    return codes, pd.Index(uniques)
+
+
+def observed_codes(codes: np.ndarray, uniques: pd.Index) -> tuple[np.ndarray, pd.Index]:
+    """Só os valores que aparecem em `codes` (groupby observed=True), renumerados na mesma ordem."""
+    present = np.bincount(codes[codes >= 0], minlength=len(uniques)) > 0
+    if present.all():
+        return codes, uniques
+    remap = np.append(np.cumsum(present) - 1, -1).astype(codes.dtype)  # -1 cai na última posição
+    return remap[codes], uniques[present]
+
+
+def column_codes(df: pd.DataFrame, col) -> tuple[np.ndarray, pd.Index]:
+    """
+    `factorize_column(df[col])`, calculado uma vez por dataset. Num recorte
+    (memo.RowSubset), os códigos do pai indexados pelas linhas do recorte, só
+    com os valores observados nele: um segmento de um curso não lista os outros.
+    """
+    def build():
+        parent = subset_parent(df)
+        if parent is None:
+            return factorize_column(df[col])
+        codes, uniques = column_codes(parent[0], col)
+        return observed_codes(codes[parent[1]], uniques)
+    return _CODES.get_or_compute((dataset_fingerprint(df), col), build)
+
+
+def derived_codes(df: pd.DataFrame, s: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    """`factorize_column` de uma série calculada sobre `df`; num recorte, só os valores observados."""
+    codes, uniques = factorize_column(s)
+    return (codes, uniques) if subset_parent(df) is None else observed_codes(codes, uniques)
+
+
+@probed("agregacao:distinct_count", "agregacao")
+def _distinct_count_tables(df: pd.DataFrame, id_col, columns: list, derived: dict) -> dict:
+    resp, n_resp = respondent_codes(df, id_col)
+    factorized = {c: column_codes(df, c) for c in columns}
+    factorized.update({name: derived_codes(df, build()) for name, build in derived.items()})
+
+    names, factors, bases = [], [], []
+    width = 0
+    for name, (codes, uniques) in factorized.items():
+        names.append(name)
+        factors.append((codes, uniques))
+        bases.append(width)
+        width += len(uniques)
+
+    if n_resp == len(df):
+        # um registro por respondente: não há triplas repetidas
+        slots = np.concatenate([
+            base + codes[codes >= 0].astype(np.int64) for (codes, _), base in zip(factors, bases)
+        ]) if factors else np.empty(0, dtype=np.int64)
+    else:
+        # deduplica (respondente, coluna, valor) e conta numa única passada
+        keys = []
+        for (codes, _), base in zip(factors, bases):
+            ok = (codes >= 0) & (resp >= 0)
+            keys.append((base + codes[ok].astype(np.int64)) * n_resp + resp[ok])
+        keys = np.unique(np.concatenate(keys)) if keys else np.empty(0, dtype=np.int64)
+        slots = keys // max(n_resp, 1)
+    counts = np.bincount(slots.astype(np.int64), minlength=width)
+
+    tables = {}
+    for name, (codes, uniques), base in zip(names, factors, bases):
+        tables[name] = pd.DataFrame({
+            name: uniques,
+            id_col: counts[base:base + len(uniques)].astype(int),
+        })
+    return tables
+
+
+def distinct_count_tables(df: pd.DataFrame, id_col, columns, derived: dict | None = None) -> dict:
+    """
+    Tabelas `valor -> respondentes distintos` (mesmo formato de
+    `df.groupby(col)[id_col].nunique().reset_index()`) para todas as colunas de
+    uma vez. `derived` mapeia nome -> função que gera uma série calculada
+    (ex.: faixas de idade); só é avaliada em cache miss e entra na chave pelo nome.
+    """
+    columns = [c for c in dict.fromkeys(columns) if c is not None and c in df.columns]
+    derived = derived or {}
+    key = (dataset_fingerprint(df), id_col, tuple(columns), tuple(derived))
+    return _TABLES.get_or_compute(key, lambda: _distinct_count_tables(df, id_col, columns, derived))
+
+
+def n_respondents(df: pd.DataFrame, id_col) -> int:
+    partial = attached_partial(df, id_col)
+    if partial is not None:
+        return partial.respondentes
+    return respondent_codes(df, id_col)[1]
+
+
+def respondents_containing(df: pd.DataFrame, id_col, col, needle: str) -> int:
+    """Respondentes distintos cujo valor em `col` contém `needle` (sem diferenciar maiúsculas)."""
+    def build():
+        codes, uniques = column_codes(df, col)
+        lut = np.array([needle in str(u).lower() for u in uniques] + [False], dtype=bool)
+        resp, _ = respondent_codes(df, id_col)
+        return int(np.unique(resp[lut[codes] & (resp >= 0)]).size)
+    return _MATCHES.get_or_compute((dataset_fingerprint(df), id_col, col, needle), build)
+
+
+def respondents_in(df: pd.DataFrame, id_col, col, values) -> int:
+    """Respondentes distintos cujo valor em `col` está em `values` (ex.: as categorias agrupadas em "Outros")."""
+    values = tuple(values)
+    def build():
+        codes, uniques = column_codes(df, col)
+        lut = np.append(pd.Index(uniques).isin(values), False)
+        resp, _ = respondent_codes(df, id_col)
+        return int(np.unique(resp[lut[codes] & (resp >= 0)]).size)
+    return _MATCHES.get_or_compute((dataset_fingerprint(df), id_col, col, values), build)
+
+
+def counts_table(table: pd.DataFrame, col, id_col, label: str, total: int | None = None) -> pd.DataFrame:
+    """Cópia renomeada (label, Respondentes, %) de uma tabela do motor; % sobre a soma ou sobre `total`."""
+    counts = table.rename(columns={col: label, id_col: "Respondentes"})
+    base = counts["Respondentes"].sum() if total is None else total
+    counts["%"] = (counts["Respondentes"] / base * 100).round(1) if base else 0.0
+    return counts
@@ -0,0 +1,257 @@
+"""
+Benchmark dos caminhos quentes do dashboard sobre pesquisas sintéticas.
+
+    python benchmark.py --sizes 1000 10000 100000 1000000 --out bench.json
+    python benchmark.py --sizes 10000 --compare bench_main.json   # regressões vs outro commit
+
+Cada caso é medido a frio (todos os caches do processo vazios) e a quente
+(caches preenchidos, como numa interação do usuário). O resultado é um JSON
+com metadados (commit, versões) e uma linha por (tamanho, modo, caso).
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import column_index as column_index_mod
+import exports
+from column_index import column_index
+from compact import compact_dataset
+from excel_reader import read_projected
+import kpi_registry
+from kpi_registry import FRASES, ID_CANDIDATES, LIKERT_BLOCKS, MULTI_SELECT_KEYS, likert_block_columns, likert_columns
+from kpis import (
+    KPI_COUNT_LABELS, base_metrics, compute_report, frase_indices, kpi_column, kpi_count_tables, kpi_counts,
+    CROSSTAB_DIMENSIONS, RELIABILITY_ALL, kpi_counts_top, kpi_crosstab, kpi_partial, likert_block, likert_crosstab, likert_index, likert_intervals, likert_reliability,
+)
+from likert_codec import likert_codes, parse_likert_value
+from memo import clear_caches, dataset_fingerprint, forget_fingerprint
+from multiselect import cooccurrence_table
+from reliability import pairwise_stats
+from segments import bitmap_index, segment_view
+from streaming import stream_partial
+from synthetic import synthetic_survey, to_workbook_bytes
+from waves import WaveStore
+from workbook_cache import read_workbook
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def cold():
+    clear_caches()
+    column_index_mod._normalize_str.cache_clear()
+    kpi_registry.column_schema.cache_clear()
+    kpi_registry.block_columns.cache_clear()
+
+
+def timed(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+# -----------------------------------------------------------------------------
+# CASOS
+# -----------------------------------------------------------------------------
+def prepare(df: pd.DataFrame, mode: str):
+    """"raw" = como sai do Excel (texto em object); "compact" = representação do app."""
+    id_col = column_index(df).find_respondent_id(ID_CANDIDATES)
+    if mode == "compact":
+        out, id_values, _ = compact_dataset(df.copy(), id_col, likert_columns(df.columns))
+        return out, id_col, id_values
+    out = df.copy()
+    for c in out.columns:
+        if isinstance(out[c].dtype, pd.CategoricalDtype):
+            out[c] = out[c].astype(object)
+    return out, id_col, None
+
+
+def cases(df: pd.DataFrame, id_col, id_values):
+    lik = likert_columns(df.columns)
+
+    def fingerprint():
+        forget_fingerprint(df)
+        dataset_fingerprint(df)
+
+    yield "fingerprint", fingerprint
+    yield "find_cols", lambda: [column_index(df).find_cols(*b["detect_keywords"]) for b in LIKERT_BLOCKS.values()]
+    yield "block_columns", lambda: [likert_block_columns(column_index(df), key) for key in LIKERT_BLOCKS]
+    yield "parse_likert_value", lambda: df[lik[0]].map(parse_likert_value)
+    yield "likert_index", lambda: [likert_index(df[c]) for c in lik]
+    for key in LIKERT_BLOCKS:
+        yield f"likert_matrix[{key}]", lambda key=key: likert_block(df, id_col, key)
+    for key in LIKERT_BLOCKS:
+        cols = tuple(likert_block_columns(column_index(df), key))
+        yield f"likert_intervals[{key}]", lambda cols=cols: likert_intervals(df, cols)
+    for key in [*LIKERT_BLOCKS, RELIABILITY_ALL]:
+        yield f"confiabilidade[{key}]", lambda key=key: likert_reliability(df, key)
+    # centenas de itens: as colunas Likert repetidas até 300 (custo dos produtos de matrizes)
+    wide = np.resize(np.arange(len(lik)), 300) if lik else []
+    yield "confiabilidade_300itens", lambda: pairwise_stats(likert_codes(df, lik)[:, wide])
+    for dim in CROSSTAB_DIMENSIONS:
+        yield f"cruzamento[{dim}]", lambda dim=dim: likert_crosstab(df, id_col, dim, RELIABILITY_ALL)
+    yield "cruzamento_kpi[ies×fundador]", lambda: kpi_crosstab(df, id_col, "ies", "fundador")
+    yield "cruzamento_kpi[curso×conceitos]", lambda: kpi_crosstab(df, id_col, "curso", "conceitos")
+    yield "kpi_count_tables", lambda: kpi_count_tables(df, id_col)
+    yield "kpi_base", lambda: base_metrics(df, id_col)
+    for key, (label, of_total) in KPI_COUNT_LABELS.items():
+        yield f"kpi_counts[{key}]", lambda key=key, label=label, of_total=of_total: kpi_counts(df, id_col, key, label, of_total)
+    for key, label in (("ies", "IES"), ("conceitos", "Conceito")):
+        yield f"top_n[{key}]", lambda key=key, label=label: kpi_counts_top(df, id_col, key, label, True)
+    for key in MULTI_SELECT_KEYS:
+        col = kpi_column(df, key)
+        if col:
+            yield f"coocorrencia[{key}]", lambda col=col: cooccurrence_table(df, id_col, col)
+    yield "frase_indices", lambda: [frase_indices(df, phrases) for _, phrases in FRASES.values()]
+    yield "compute_report", lambda: compute_report(df, id_col)
+    yield "kpi_partial", lambda: kpi_partial(df, id_col)
+
+    def segment():
+        index = bitmap_index(df)
+        filters = {dim: index.values[dim][:2] for dim in ("curso", "faixa") if dim in index.values}
+        base_metrics(segment_view(df, filters), id_col)
+
+    yield "segment_view", segment
+    yield "export_csv", lambda: exports._csv_bytes(df, id_col, id_values)
+    yield "export_parquet", lambda: exports._parquet_bytes(df, id_col, id_values)
+
+
+def run_case(fn, repeat: int) -> tuple[float, float]:
+    frio = []
+    for _ in range(repeat):
+        cold()
+        frio.append(timed(fn))
+    quente = [timed(fn) for _ in range(repeat)]  # caches preenchidos pela última rodada a frio
+    return min(frio), min(quente)
+
+
+def excel_cases(raw: pd.DataFrame):
+    data = to_workbook_bytes(raw)
+    with tempfile.TemporaryDirectory() as tmp:
+        yield "excel_read_full", lambda: pd.read_excel(io.BytesIO(data), engine="openpyxl"), len(data)
+        yield "excel_read_projected", lambda: read_projected(data), len(data)
+        # 1ª leitura interpreta o Excel e grava o Arrow; a 2ª só mapeia o arquivo
+        yield "excel_arrow_cache", lambda: read_workbook(data, cache_dir=Path(tmp)), len(data)
+        # acervo com a planilha inteira; mede a importação de uma onda de 1% de respondentes
+        # novos (1ª vez) e a reimportação da mesma planilha (2ª, descartada pelo hash)
+        store = WaveStore("bench", Path(tmp) / "ondas")
+        store.append(data, "base")
+        extra = synthetic_survey(max(len(raw) // 100, 1), seed=1)
+        extra["Respondent ID"] += 10**10
+        wave = to_workbook_bytes(extra)
+        yield "onda_incremental_1pct", lambda: store.append(wave, "onda"), len(wave)
+        # ingestão em blocos (só agregados em memória): mesma planilha e o mesmo conteúdo em CSV
+        yield "blocos_xlsx", lambda: stream_partial(io.BytesIO(data), "xlsx"), len(data)
+        csv_path = Path(tmp) / "bench.csv"
+        raw.to_csv(csv_path, sep=";", index=False)
+        yield "blocos_csv", lambda: stream_partial(csv_path, "csv"), csv_path.stat().st_size
+
+# -----------------------------------------------------------------------------
+# RESULTADOS
+# -----------------------------------------------------------------------------
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def metadata(args) -> dict:
+    return dict(
+        gerado_em=datetime.now().isoformat(timespec="seconds"),
+        commit=_git_commit(),
+        python=platform.python_version(),
+        pandas=pd.__version__,
+        numpy=np.__version__,
+        plataforma=platform.platform(),
+        cpus=os.cpu_count(),
+        argumentos=vars(args),
+    )
+
+
+def compare(results: list[dict], baseline_path: str, threshold: float) -> list[dict]:
+    """Linhas cujo tempo (frio ou quente) piorou mais que `threshold`× em relação à base."""
+    with open(baseline_path, encoding="utf-8") as f:
+        base = {(r["tamanho"], r["modo"], r["caso"]): r for r in json.load(f)["resultados"]}
+    worse = []
+    for r in results:
+        b = base.get((r["tamanho"], r["modo"], r["caso"]))
+        if b is None:
+            continue
+        for k in ("frio_s", "quente_s"):
+            if b.get(k) and r.get(k) is not None and b[k] > 1e-4 and r[k] / b[k] > threshold:
+                worse.append(dict(caso=r["caso"], tamanho=r["tamanho"], modo=r["modo"], medida=k,
+                                  base=b[k], atual=r[k], razao=round(r[k] / b[k], 2)))
+    return worse
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark dos caminhos quentes do dashboard.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--modes", nargs="+", default=["compact"], choices=["compact", "raw"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--likert-items", type=int, default=None)
+    parser.add_argument("--neutros", type=float, default=0.1)
+    parser.add_argument("--duplicados", type=float, default=0.02)
+    parser.add_argument("--excel-max", type=int, default=100_000,
+                        help="maior tamanho em que a leitura de Excel é medida (é lenta)")
+    parser.add_argument("--only", nargs="*", default=None, help="só casos que começam com estes nomes")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", default=None, help="JSON de outra execução para comparar")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    wanted = lambda name: not args.only or any(name.startswith(o) for o in args.only)
+    results = []
+    for n in args.sizes:
+        t0 = time.perf_counter()
+        raw = synthetic_survey(n, args.likert_items, args.neutros, duplicate_rate=args.duplicados)
+        gen_s = time.perf_counter() - t0
+        print(f"== {n:,} respondentes × {raw.shape[1]} colunas (gerado em {gen_s:.2f}s)", flush=True)
+        for mode in args.modes:
+            df, id_col, id_values = prepare(raw, mode)
+            mb = df.memory_usage(deep=True).sum() / 1024 / 1024
+            for name, fn in cases(df, id_col, id_values):
+                if not wanted(name):
+                    continue
+                frio, quente = run_case(fn, args.repeat)
+                results.append(dict(tamanho=n, modo=mode, caso=name, frio_s=round(frio, 6),
+                                    quente_s=round(quente, 6), repeticoes=args.repeat, memoria_mb=round(mb, 1)))
+                print(f"  [{mode}] {name:32s} frio {frio * 1000:10.2f} ms   quente {quente * 1000:10.2f} ms", flush=True)
+        if n <= args.excel_max:
+            for name, fn, nbytes in excel_cases(raw):
+                if not wanted(name):
+                    continue
+                frio, quente = timed(fn), timed(fn)  # uma vez cada: ler Excel é caro
+                results.append(dict(tamanho=n, modo="excel", caso=name, frio_s=round(frio, 6),
+                                    quente_s=round(quente, 6), repeticoes=1, arquivo_mb=round(nbytes / 1024 / 1024, 1)))
+                print(f"  [excel] {name:31s} frio {frio * 1000:10.2f} ms   quente {quente * 1000:10.2f} ms", flush=True)
+
+    payload = dict(meta=metadata(args), resultados=results)
+    code = 0
+    if args.compare:
+        worse = compare(results, args.compare, args.threshold)
+        payload["regressoes"] = worse
+        for w in worse:
+            print(f"REGRESSÃO {w['caso']} ({w['tamanho']:,}, {w['modo']}, {w['medida']}): "
+                  f"{w['base']:.4f}s → {w['atual']:.4f}s ({w['razao']}×)")
+        code = 1 if worse else 0
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    print(f"resultados em {args.out}")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
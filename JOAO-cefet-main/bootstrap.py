@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+
+from likert_codec import LIKERT_TO_INDEX
+
+# -----------------------------------------------------------------------------
+# INTERVALOS DE CONFIANÇA (bootstrap vetorizado sobre as contagens por nível)
+# -----------------------------------------------------------------------------
+# Índice e percentuais Likert só dependem de quantas respostas caem em cada
+# nível. Reamostrar n respostas com reposição equivale a sortear as contagens
+# de uma multinomial(n, contagens/n), então as B reamostras de todos os itens
+# saem de um único sorteio (B × itens × 5) com o mesmo gerador semeado, sem
+# materializar uma matriz de índices B × linhas. Os percentuais têm como base
+# os respondentes distintos do item (um respondente repetido pode estar em mais
+# de um nível), então cada nível é sorteado como binomial(total, contagem/total).
+# Funciona igual sobre linhas, agregados anexados (partials) ou artefatos.
+BOOTSTRAP_RESAMPLES = int(os.environ.get("CEFET_BOOTSTRAP_RESAMPLES", "1000"))
+BOOTSTRAP_SEED = int(os.environ.get("CEFET_BOOTSTRAP_SEED", "20240"))
+CONFIDENCE = 0.95
+
+_LEVEL_INDEX = np.array([LIKERT_TO_INDEX[k] for k in range(1, 6)], dtype=np.float64)
+
+
+def resample_counts(counts: np.ndarray, resamples: int = BOOTSTRAP_RESAMPLES,
+                    seed: int = BOOTSTRAP_SEED) -> np.ndarray:
+    """Contagens reamostradas (resamples × itens × 5) a partir das contagens por nível (itens × 5)."""
+    counts = np.asarray(counts, dtype=np.int64).reshape(-1, 5)
+    n = counts.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p = np.where(n[:, None] > 0, counts / np.maximum(n, 1)[:, None], 0.2)  # item sem respostas: sorteia 0
+    rng = np.random.default_rng(seed)
+    return rng.multinomial(n, p, size=(resamples, len(n)))
+
+
+def _bounds(stat: np.ndarray, confidence: float) -> tuple[np.ndarray, np.ndarray]:
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(stat, [alpha, 1 - alpha], axis=0)
+    return low, high
+
+
+def index_interval(counts: np.ndarray, resamples: int = BOOTSTRAP_RESAMPLES, seed: int = BOOTSTRAP_SEED,
+                   confidence: float = CONFIDENCE) -> tuple[np.ndarray, np.ndarray]:
+    """(inferior, superior) do índice 0–100 de cada item; NaN para itens sem respostas válidas."""
+    draws = resample_counts(counts, resamples, seed)
+    n = draws.sum(axis=2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        idx = np.where(n > 0, (draws @ _LEVEL_INDEX) / np.maximum(n, 1), np.nan)
+    return _bounds(idx, confidence)
+
+
+def percent_interval(counts: np.ndarray, totals: np.ndarray, resamples: int = BOOTSTRAP_RESAMPLES,
+                     seed: int = BOOTSTRAP_SEED, confidence: float = CONFIDENCE) -> tuple[np.ndarray, np.ndarray]:
+    """(inferior, superior) de cada percentual contagem/total (itens × 5), como em `likert_matrix`."""
+    counts = np.asarray(counts, dtype=np.int64).reshape(-1, 5)
+    totals = np.asarray(totals, dtype=np.int64).reshape(-1, 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p = np.where(totals > 0, counts / np.maximum(totals, 1), 0.0)
+    rng = np.random.default_rng(seed)
+    draws = rng.binomial(totals, p, size=(resamples, *counts.shape))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct = np.where(totals > 0, draws / np.maximum(totals, 1) * 100, np.nan)
+    return _bounds(pct, confidence)
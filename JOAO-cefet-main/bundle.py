@@ -0,0 +1,285 @@
+import inspect
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from datasets import is_url, source_slug
+from http_fetch import fetch, still_current
+from memo import set_fingerprint
+from workbook_cache import content_hash
+
+# -----------------------------------------------------------------------------
+# ARTEFATO DE AGREGADOS (o dashboard sobe sem a planilha bruta)
+# -----------------------------------------------------------------------------
+# O artefato guarda a resposta de cada função de KPI marcada com @served, sob
+# o id da KPI (nome da função) e os parâmetros canônicos da chamada que as
+# seções fazem. Na construção (report.py --formats bundle) as funções rodam
+# sobre o dataset e são gravadas; no app, quando o 1º argumento é um
+# KpiBundle, a resposta sai do artefato sem tocar em dados.
+# 2: matrizes e índices Likert com intervalo de confiança
+# 3: chaves canônicas por KPI e DataFrames por coluna (textos com dicionário)
+BUNDLE_VERSION = 3
+BUNDLE_DIR = Path(os.environ.get("CEFET_BUNDLE_DIR", "artifacts"))
+BUNDLE_NAME = "kpis.bundle.json"
+CHECK_TTL_SECONDS = 600  # de quanto em quanto tempo a fonte é revalidada
+
+_recording = threading.local()
+_LOCK = threading.Lock()
+_LOADED: dict[Path, tuple[int, "KpiBundle | None"]] = {}
+_CHECKED: dict[str, tuple[float, "KpiBundle | None", str]] = {}
+_FILE_HASHES: dict[str, tuple[int, int, str]] = {}
+
+
+class BundleMiss(KeyError):
+    """A chamada não foi gravada no artefato (KPI nova ou argumentos diferentes)."""
+
+
+class KpiBundle:
+    """
+    Respostas gravadas + metadados. Imita o mínimo de um DataFrame que o app
+    usa para chavear caches (`shape` e fingerprint registrado em memo).
+    """
+
+    def __init__(self, meta: dict, answers: dict):
+        self.meta = meta
+        self.answers = answers
+        self.id_col = meta["id_col"]
+        self.shape = (meta["linhas"], meta["colunas"])
+        set_fingerprint(self, f"bundle:{meta['hash_fonte']}:{BUNDLE_VERSION}")
+
+    def answer(self, key: str, id_col=None):
+        if id_col is not None and id_col != self.id_col:
+            raise BundleMiss(f"{key} (ID {id_col!r})")
+        try:
+            return self.answers[key]
+        except KeyError:
+            raise BundleMiss(key) from None
+
+    def __len__(self):
+        return self.shape[0]
+
+# -----------------------------------------------------------------------------
+# GRAVAÇÃO DAS CHAMADAS
+# -----------------------------------------------------------------------------
+def _plain(v):
+    if isinstance(v, np.generic):
+        return v.item()
+    raise TypeError(f"{type(v).__name__} não serializável")
+
+
+def _call_key(sig: inspect.Signature, name: str, key, args, kwargs) -> tuple[object, str]:
+    # (id_col, "kpi:[parâmetros canônicos]"); o ID é um só por artefato e fica fora da chave
+    bound = sig.bind(None, *args, **kwargs)
+    bound.apply_defaults()
+    params = dict(list(bound.arguments.items())[1:])  # sem o DataFrame
+    id_col = params.pop("id_col", None)
+    values = key(**params) if key is not None else list(params.values())
+    return id_col, f"{name}:" + json.dumps(list(values), ensure_ascii=False, default=_plain)
+
+
+def served(fn=None, *, key=None):
+    """
+    Decorator das funções de KPI que o artefato atende (1º argumento = df ou KpiBundle).
+    `key(**argumentos sem df/id_col)` devolve os parâmetros canônicos da chamada
+    (ex.: o id do bloco em vez das palavras-chave); sem `key`, todos os argumentos.
+    """
+    if fn is None:
+        return lambda f: served(f, key=key)
+    sig = inspect.signature(fn)
+    name = fn.__name__
+
+    @wraps(fn)
+    def wrapper(df, *args, **kwargs):
+        if isinstance(df, KpiBundle):
+            return df.answer(*reversed(_call_key(sig, name, key, args, kwargs)))
+        out = fn(df, *args, **kwargs)
+        answers = getattr(_recording, "answers", None)
+        if answers is not None:
+            answers.setdefault(_call_key(sig, name, key, args, kwargs)[1], out)
+        return out
+    return wrapper
+
+
+@contextmanager
+def recording():
+    """Grava {chamada: resposta} das funções @served executadas nesta thread."""
+    _recording.answers = {}
+    try:
+        yield _recording.answers
+    finally:
+        _recording.answers = None
+
+# -----------------------------------------------------------------------------
+# SERIALIZAÇÃO (JSON; DataFrames com tipos das colunas)
+# -----------------------------------------------------------------------------
+def _cell(v):
+    if v is None or (isinstance(v, float) and math.isnan(v)):
+        return None
+    return v.item() if isinstance(v, np.generic) else v
+
+
+def _encode_column(s: pd.Series):
+    # textos repetidos (grupos, perguntas dos cruzamentos) viram dicionário + códigos
+    if s.dtype == object and len(s):
+        codes, uniques = pd.factorize(s, use_na_sentinel=True)
+        if len(uniques) < len(s):
+            return {"__dic__": [_cell(u) for u in uniques], "codigos": codes.tolist()}
+    return [_cell(x) for x in s.astype(object)]
+
+
+def _decode_column(v) -> list:
+    if isinstance(v, dict):
+        lut = v["__dic__"] + [None]  # código -1 = ausente
+        return [lut[c] for c in v["codigos"]]
+    return v
+
+
+def _encode(v):
+    if isinstance(v, pd.DataFrame):
+        plain_index = isinstance(v.index, pd.RangeIndex) and v.index.start == 0 and v.index.step == 1
+        return {"__df__": dict(
+            columns=[_cell(c) for c in v.columns],
+            dtypes=[str(t) for t in v.dtypes],
+            index=None if plain_index else [_cell(i) for i in v.index],
+            index_name=v.index.name,
+            data=[_encode_column(v.iloc[:, j]) for j in range(v.shape[1])],
+        )}
+    if isinstance(v, tuple):
+        return {"__tuple__": [_encode(x) for x in v]}
+    if isinstance(v, list):
+        return [_encode(x) for x in v]
+    if isinstance(v, dict):
+        return {"__dict__": [[_encode(k), _encode(x)] for k, x in v.items()]}
+    return _cell(v)
+
+
+def _decode(v):
+    if isinstance(v, list):
+        return [_decode(x) for x in v]
+    if not isinstance(v, dict):
+        return v
+    if "__tuple__" in v:
+        return tuple(_decode(x) for x in v["__tuple__"])
+    if "__dict__" in v:
+        return {_decode(k): _decode(x) for k, x in v["__dict__"]}
+    t = v["__df__"]
+    df = pd.DataFrame({j: _decode_column(c) for j, c in enumerate(t["data"])})
+    df.columns = pd.Index(t["columns"], dtype=object) if t["columns"] else pd.RangeIndex(0)
+    for col, dtype in zip(df.columns, t["dtypes"]):
+        if dtype.startswith(("int", "float", "bool")):
+            df[col] = df[col].astype("float64" if dtype.startswith("int") and df[col].isna().any() else dtype)
+        elif dtype == "object":
+            df[col] = df[col].astype(object)
+    if t["index"] is not None:
+        df.index = pd.Index(t["index"], name=t["index_name"])
+    return df
+
+# -----------------------------------------------------------------------------
+# CONSTRUÇÃO, LEITURA E VALIDADE
+# -----------------------------------------------------------------------------
+def source_validators(source: str) -> tuple[str, str | None]:
+    """(hash do conteúdo, ETag) da fonte; URLs passam pelo cache HTTP condicional."""
+    if is_url(source):
+        r = fetch(source, timeout=30)
+        return content_hash(r.content), r.etag
+    return content_hash(Path(source).read_bytes()), None
+
+
+def build_bundle(df: pd.DataFrame, id_col, catalog, source: str, source_hash: str, etag: str | None = None) -> dict:
+    """Executa `catalog(df, id_col)` gravando as funções @served e monta o artefato."""
+    with recording() as answers:
+        catalog(df, id_col)
+    meta = dict(
+        versao=BUNDLE_VERSION, fonte=source, hash_fonte=source_hash, etag=etag, id_col=id_col,
+        linhas=int(df.shape[0]), colunas=int(df.shape[1]),
+        gerado_em=datetime.now().isoformat(timespec="seconds"),
+    )
+    return dict(meta=meta, respostas={k: _encode(v) for k, v in answers.items()})
+
+
+def bundle_path(source: str, bundle_dir: Path | None = None) -> Path:
+    return (bundle_dir or BUNDLE_DIR) / source_slug(source) / BUNDLE_NAME
+
+
+def write_bundle(payload: dict, path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), "utf-8")
+    os.replace(tmp, path)
+    return path
+
+
+def read_bundle(path: Path) -> KpiBundle | None:
+    """Artefato decodificado (lido de novo só se o arquivo mudar); None se ausente ou de outra versão."""
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    with _LOCK:
+        hit = _LOADED.get(path)
+    if hit is not None and hit[0] == mtime:
+        return hit[1]
+    try:
+        payload = json.loads(path.read_text("utf-8"))
+        ok = payload["meta"].get("versao") == BUNDLE_VERSION
+        bundle = KpiBundle(payload["meta"], {k: _decode(v) for k, v in payload["respostas"].items()}) if ok else None
+    except (OSError, ValueError, KeyError):
+        bundle = None
+    with _LOCK:
+        _LOADED[path] = (mtime, bundle)
+    return bundle
+
+
+def _file_hash(path: Path) -> str:
+    # rehash só quando mtime/tamanho mudam
+    info = path.stat()
+    key = str(path.resolve())
+    hit = _FILE_HASHES.get(key)
+    if hit is not None and hit[:2] == (info.st_mtime_ns, info.st_size):
+        return hit[2]
+    h = content_hash(path.read_bytes())
+    _FILE_HASHES[key] = (info.st_mtime_ns, info.st_size, h)
+    return h
+
+
+def fresh_bundle(source: str, bundle_dir: Path | None = None,
+                 ttl: float = CHECK_TTL_SECONDS) -> tuple[KpiBundle | None, str]:
+    """
+    (artefato, situação) para a fonte. Situações: "atual", "nao_verificado"
+    (fonte inacessível: usa o artefato), "desatualizado", "ausente". Só o
+    HEAD condicional (URL) ou o hash do arquivo (local) tocam na fonte.
+    """
+    with _LOCK:
+        hit = _CHECKED.get(source)
+    if hit is not None and time.time() - hit[0] <= ttl:
+        return hit[1], hit[2]
+    bundle = read_bundle(bundle_path(source, bundle_dir))
+    if bundle is None:
+        status = "ausente"
+    elif is_url(source):
+        current = still_current(source, bundle.meta.get("etag"))
+        status = {True: "atual", False: "desatualizado", None: "nao_verificado"}[current]
+    else:
+        try:
+            status = "atual" if _file_hash(Path(source)) == bundle.meta["hash_fonte"] else "desatualizado"
+        except OSError:
+            status = "nao_verificado"
+    served_bundle = bundle if status in ("atual", "nao_verificado") else None
+    with _LOCK:
+        _CHECKED[source] = (time.time(), served_bundle, status)
+    return served_bundle, status
+
+
+def clear_bundles():
+    with _LOCK:
+        _LOADED.clear()
+        _CHECKED.clear()
@@ -0,0 +1,117 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+import pandas as pd
+
+from memo import BoundedCache
+from perf import probe
+
+# -----------------------------------------------------------------------------
+# ÍNDICE DE COLUNAS (construído uma vez por esquema)
+# -----------------------------------------------------------------------------
+_TOKEN_RE = re.compile(r"\w+")
+_MAX_INDEXES = 32
+
+
+@lru_cache(maxsize=65536)
+def _normalize_str(s: str) -> str:
+    s = s.strip().lower()
+    return ''.join(ch for ch in unicodedata.normalize('NFD', s) if unicodedata.category(ch) != 'Mn')
+
+
+def normalize_text(s: str) -> str:
+    if not isinstance(s, str):
+        s = str(s)
+    return _normalize_str(s)
+
+
+class ColumnIndex:
+    """
+    Cabeçalhos pré-normalizados + índice invertido de tokens.
+    As buscas mantêm a semântica original de `find_cols` (substring sobre o texto
+    normalizado); o índice só reduz os candidatos antes da verificação final.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.normalized = [normalize_text(c) for c in self.columns]
+        self._postings: dict[str, set[int]] = {}
+        for i, n in enumerate(self.normalized):
+            for tok in _TOKEN_RE.findall(n):
+                self._postings.setdefault(tok, set()).add(i)
+        self._by_normalized: dict[str, int] = {}
+        for i, n in enumerate(self.normalized):
+            self._by_normalized[n] = i
+        self._token_hits: dict[str, frozenset[int]] = {}
+        self._memo: dict[tuple, tuple] = {}
+        self._id_memo: dict[tuple, object] = {}
+
+    def _positions_with(self, keyword: str) -> list[int]:
+        # um keyword só pode estar contido no cabeçalho se cada token dele
+        # estiver contido em algum token do cabeçalho
+        cand = None
+        for tok in _TOKEN_RE.findall(keyword):
+            hits = self._token_hits.get(tok)
+            if hits is None:
+                s = set()
+                for vocab, pos in self._postings.items():
+                    if tok in vocab:
+                        s |= pos
+                hits = self._token_hits[tok] = frozenset(s)
+            cand = set(hits) if cand is None else cand & hits
+            if not cand:
+                return []
+        pool = range(len(self.columns)) if cand is None else sorted(cand)
+        return [i for i in pool if keyword in self.normalized[i]]
+
+    def find_cols(self, *keywords, require_all=True) -> list:
+        key = (keywords, require_all)
+        hit = self._memo.get(key)
+        if hit is None:
+            sets = [set(self._positions_with(normalize_text(k))) for k in keywords]
+            if not sets:
+                pos = set(range(len(self.columns))) if require_all else set()
+            elif require_all:
+                pos = set.intersection(*sets)
+            else:
+                pos = set.union(*sets)
+            hit = self._memo[key] = tuple(self.columns[i] for i in sorted(pos))
+        return list(hit)
+
+    def find_first(self, *keywords, require_all=True):
+        cols = self.find_cols(*keywords, require_all=require_all)
+        return cols[0] if cols else None
+
+    def find_respondent_id(self, candidates) -> object | None:
+        key = tuple(candidates)
+        if key in self._id_memo:
+            return self._id_memo[key]
+        found = None
+        # 1) candidatos exatos
+        for c in candidates:
+            i = self._by_normalized.get(normalize_text(c))
+            if i is not None:
+                found = self.columns[i]
+                break
+        # 2) heurística
+        if found is None:
+            for i, n in enumerate(self.normalized):
+                if "respondent" in n or "respondente" in n:
+                    found = self.columns[i]
+                    break
+        self._id_memo[key] = found
+        return found
+
+
+_INDEXES = BoundedCache(max_entries=_MAX_INDEXES, name="indices_colunas")
+
+
+def column_index(df_or_columns) -> ColumnIndex:
+    columns = df_or_columns.columns if isinstance(df_or_columns, pd.DataFrame) else df_or_columns
+    # a própria tupla de cabeçalhos é a impressão digital do esquema
+    fp = tuple(columns)
+    def build():
+        with probe("colunas:indice", "colunas"):
+            return ColumnIndex(columns)
+    return _INDEXES.get_or_compute(fp, build)
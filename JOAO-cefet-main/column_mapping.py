@@ -0,0 +1,189 @@
+import pandas as pd
+from pathlib import Path
+from functools import lru_cache
+from types import MappingProxyType
+from typing import NamedTuple
+import difflib, unicodedata, re
+
+# Mapeamento coluna_original -> nome_tecnico (columns_classification.csv),
+# compilado uma vez por versão do CSV. As consultas são dicionários imutáveis.
+DEFAULT_MAPPING = Path(__file__).resolve().parent / "columns_classification.csv"
+FUZZY_CUTOFF = 0.92
+FUZZY_TAIL = 40  # cabeçalhos de matriz só diferem no fim: o final também precisa casar
+FUZZY_WORD_CUTOFF = 0.75  # palavra que só existe num dos lados precisa ser erro de digitação de outra
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_SPACES = re.compile(r"\s+")
+_TRAILING_RESPONSE = re.compile(r"\s*response$")
+
+
+def _strip_accents(text: str) -> str:
+    text = unicodedata.normalize("NFKD", str(text))
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def _slugify(text: str) -> str:
+    if text is None:
+        return ""
+    # sem acentos, minúsculo, não alfanumérico vira "_" (uma passada de regex)
+    return _NON_ALNUM.sub("_", _strip_accents(text).lower()).strip("_")
+
+
+@lru_cache(maxsize=4096)
+def header_key(text: str) -> str:
+    """Forma normalizada de um cabeçalho: sem acentos, caixa, aspas, pontuação ou o sufixo "Response"."""
+    s = _SPACES.sub(" ", _strip_accents(text).lower()).strip()
+    s = _TRAILING_RESPONSE.sub("", s)
+    return _NON_ALNUM.sub(" ", s).strip()
+
+
+class ColumnSpec(NamedTuple):
+    coluna_original: str
+    nome_tecnico: str
+    rotulo_publico: str
+    classe: str
+
+
+class ColumnMapping:
+    """Mapeamento compilado (somente leitura)."""
+
+    def __init__(self, specs: list):
+        self.specs = tuple(specs)
+        self.by_original = MappingProxyType({s.coluna_original: s for s in self.specs})
+        self.by_key = MappingProxyType({header_key(s.coluna_original): s for s in self.specs})
+        self.by_tech = MappingProxyType({s.nome_tecnico: s for s in self.specs})
+        self.labels = MappingProxyType({s.nome_tecnico: s.rotulo_publico or s.coluna_original for s in self.specs})
+        self.classes = MappingProxyType({s.nome_tecnico: s.classe for s in self.specs})
+        blocks = {}
+        for s in self.specs:
+            blocks.setdefault(s.classe, []).append(s.nome_tecnico)
+        self.blocks = MappingProxyType({k: tuple(v) for k, v in blocks.items()})
+
+    def lookup(self, header) -> ColumnSpec | None:
+        """Spec do cabeçalho: exato, já técnico ou normalizado (sem o fuzzy)."""
+        if not isinstance(header, str):
+            return None
+        return self.by_original.get(header) or self.by_tech.get(header) or self.by_key.get(header_key(header))
+
+    def match(self, headers) -> dict:
+        """{cabeçalho: nome_tecnico} para os cabeçalhos reconhecidos (ver `match_headers`)."""
+        return dict(match_headers(tuple(headers), self))
+
+    def __len__(self):
+        return len(self.specs)
+
+
+def _read_specs(path: Path) -> list:
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    # colunas esperadas: coluna_original,nome_tecnico,rotulo_publico,classe (qualquer caixa)
+    df = df.rename(columns={c: c.strip().lower() for c in df.columns})
+    for c in ("coluna_original", "nome_tecnico", "rotulo_publico", "classe"):
+        if c not in df.columns:
+            df[c] = ""
+    rows = zip(df["coluna_original"], df["nome_tecnico"], df["rotulo_publico"], df["classe"])
+    return [ColumnSpec(o, t.strip(), lab.strip(), cls.strip()) for o, t, lab, cls in rows if o and t.strip()]
+
+
+@lru_cache(maxsize=8)
+def _compile(path: str, mtime_ns: int) -> ColumnMapping:
+    return ColumnMapping(_read_specs(Path(path)))
+
+
+def compile_mapping(mapping_path=None) -> ColumnMapping | None:
+    """Mapeamento compilado do CSV (recompila só se o arquivo mudar); None se não existir."""
+    fp = Path(mapping_path) if mapping_path is not None else DEFAULT_MAPPING
+    try:
+        mtime = fp.stat().st_mtime_ns
+    except OSError:
+        return None
+    return _compile(str(fp.resolve()), mtime)
+
+
+def _same_words(a: str, b: str) -> bool:
+    # "pos graduacao" × "graduacao" tem ratio alto, mas é outra pergunta: toda
+    # palavra de um lado sem par exato no outro precisa de um par parecido
+    only_a, only_b = set(a.split()) - set(b.split()), set(b.split()) - set(a.split())
+    if len(only_a) != len(only_b):
+        return False
+    return all(difflib.get_close_matches(w, only_b, n=1, cutoff=FUZZY_WORD_CUTOFF) for w in only_a)
+
+
+def _similarity(a: str, b: str) -> float:
+    sm = difflib.SequenceMatcher(None, a, b)
+    if sm.real_quick_ratio() < FUZZY_CUTOFF or sm.quick_ratio() < FUZZY_CUTOFF:
+        return 0.0
+    full = sm.ratio()
+    if full < FUZZY_CUTOFF:
+        return full
+    if not _same_words(a, b):
+        return 0.0
+    return min(full, difflib.SequenceMatcher(None, a[-FUZZY_TAIL:], b[-FUZZY_TAIL:]).ratio())
+
+
+@lru_cache(maxsize=64)
+def match_headers(headers: tuple, mapping: ColumnMapping) -> tuple:
+    """
+    Pares (cabeçalho, nome_tecnico): exato (ou já técnico), depois normalizado
+    e, para o que sobrar, aproximado (difflib, FUZZY_CUTOFF no texto inteiro e
+    no final). Cada nome técnico é usado uma vez: um acerto exato vence um
+    normalizado, e entre aproximados vence o mais parecido.
+    """
+    found, used = {}, set()
+    texts = [h for h in headers if isinstance(h, str)]
+    lookups = (
+        lambda h: mapping.by_original.get(h) or mapping.by_tech.get(h),
+        lambda h: mapping.by_key.get(header_key(h)),
+    )
+    for lookup in lookups:
+        for h in texts:
+            spec = None if h in found else lookup(h)
+            if spec is not None and spec.nome_tecnico not in used:
+                found[h] = spec.nome_tecnico
+                used.add(spec.nome_tecnico)
+    left = {header_key(s.coluna_original): s.nome_tecnico for s in mapping.specs if s.nome_tecnico not in used}
+    if left:
+        scored = []
+        for i, h in enumerate(texts):
+            if h in found:
+                continue
+            key = header_key(h)
+            scored += [(score, -i, h, k) for k in left if (score := _similarity(key, k)) >= FUZZY_CUTOFF]
+        for _, _, h, k in sorted(scored, reverse=True):
+            tech = left.get(k)
+            if h not in found and tech is not None and tech not in used:
+                found[h] = tech
+                used.add(tech)
+                del left[k]
+    return tuple((h, found[h]) for h in headers if h in found)
+
+
+def _load_mapping(path: str):
+    compiled = compile_mapping(path)
+    if compiled is None:
+        return None, {}, {}
+    mapping = {s.coluna_original: s.nome_tecnico for s in compiled.specs}
+    return mapping, dict(compiled.labels), dict(compiled.classes)
+
+
+def _infer_mapping_from_df(df: pd.DataFrame):
+    mapping, labels, classes = {}, {}, {}
+    for col in df.columns:
+        tech = _slugify(col)
+        mapping[col] = tech
+        labels[tech] = str(col)
+        classes[tech] = ""
+    return mapping, labels, classes
+
+
+def apply_column_mapping(df: pd.DataFrame, mapping_path: str | None = None):
+    compiled = compile_mapping(mapping_path)
+    if compiled is None:
+        mapping, labels, classes = _infer_mapping_from_df(df)
+    else:
+        mapping = compiled.match(df.columns)
+        labels, classes = dict(compiled.labels), dict(compiled.classes)
+    # não renomeia para um nome que já existe no DataFrame
+    taken = set(df.columns) - set(mapping)
+    mapping = {k: v for k, v in mapping.items() if k != v and v not in taken}
+    df2 = df.rename(columns=mapping, copy=False) if mapping else df
+    return df2, labels, classes
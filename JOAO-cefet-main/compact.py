@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from likert_codec import likert_categorical
+from memo import dataset_fingerprint, set_fingerprint
+
+# -----------------------------------------------------------------------------
+# REPRESENTAÇÃO COMPACTA (categorias, ID inteiro, Likert int8)
+# -----------------------------------------------------------------------------
+CATEGORY_MAX_RATIO = 0.5
+
+
+def compact_dtypes(df: pd.DataFrame, skip=()) -> pd.DataFrame:
+    """Inteiros com o menor tipo possível e textos repetitivos como `category`."""
+    for c in df.columns:
+        if c in skip:
+            continue
+        s = df[c]
+        if pd.api.types.is_integer_dtype(s.dtype):
+            df[c] = pd.to_numeric(s, downcast="integer")
+        elif s.dtype == object and pd.api.types.infer_dtype(s, skipna=True) == "string":
+            if s.nunique(dropna=True) <= max(1, CATEGORY_MAX_RATIO * len(s)):
+                df[c] = s.astype("category")
+    return df
+
+
+def compact_ids(s: pd.Series) -> tuple[pd.Series, pd.Index]:
+    """ID -> inteiro denso (0..n-1); os valores originais ficam na tabela devolvida."""
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    if (codes < 0).any():
+        ids = pd.array(np.where(codes < 0, 0, codes), dtype="Int32")
+        ids[codes < 0] = pd.NA
+    else:
+        ids = codes.astype(np.int32)
+    return pd.Series(ids, index=s.index, name=s.name), pd.Index(uniques, name=s.name)
+
+
+def restore_ids(df: pd.DataFrame, id_col, id_values: pd.Index) -> pd.DataFrame:
+    """Cópia com o ID original (para exibição e exportação)."""
+    if id_col not in df.columns or id_values is None:
+        return df
+    out = df.copy()
+    codes = out[id_col].to_numpy(dtype="float64", na_value=np.nan)
+    ok = ~np.isnan(codes)
+    restored = np.full(len(out), None, dtype=object)
+    restored[ok] = id_values.to_numpy(dtype=object)[codes[ok].astype(np.int64)]
+    out[id_col] = restored
+    return out
+
+
+def compact_dataset(df: pd.DataFrame, id_col, likert_cols=()) -> tuple[pd.DataFrame, pd.Index, dict]:
+    """
+    Devolve (df compacto, IDs originais, relatório de memória). Colunas Likert viram
+    categóricas com códigos int8 (respostas originais, na ordem da escala); o ID vira inteiro denso.
+    """
+    before = int(df.memory_usage(deep=True).sum())
+    fp = dataset_fingerprint(df)
+    out = df.copy()
+    likert_cols = [c for c in likert_cols if c in out.columns and c != id_col]
+    converted = 0
+    for c in likert_cols:
+        cat = likert_categorical(out[c])
+        if cat is not None:
+            out[c] = cat
+            converted += 1
+    out[id_col], id_values = compact_ids(out[id_col])
+    compact_dtypes(out, skip=set(likert_cols) | {id_col})
+    after = int(out.memory_usage(deep=True).sum())
+    report = dict(
+        antes_mb=round(before / 1024 / 1024, 2),
+        depois_mb=round(after / 1024 / 1024, 2),
+        economia_pct=round((1 - after / before) * 100, 1) if before else 0.0,
+        likert=converted,
+        categoricas=int(sum(isinstance(t, pd.CategoricalDtype) for t in out.dtypes)),
+    )
+    set_fingerprint(out, f"{fp}-compact")
+    return out, id_values, report
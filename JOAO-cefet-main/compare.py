@@ -0,0 +1,75 @@
+from typing import NamedTuple
+
+import pandas as pd
+
+from kpis import KPI_COUNT_LABELS, base_metrics, kpi_counts, likert_item_indices
+from memo import BoundedCache, dataset_fingerprint
+
+# -----------------------------------------------------------------------------
+# COMPARAÇÃO ENTRE FONTES (lado a lado)
+# -----------------------------------------------------------------------------
+# Cada fonte é resumida uma única vez (colunas resolvidas e KPIs agregadas,
+# cacheadas pelo fingerprint); as tabelas e gráficos da comparação só juntam
+# os resumos, sem voltar aos dados.
+_SUMMARIES = BoundedCache(max_entries=16, name="comparacao")
+
+BASE_ROWS = {
+    "Respondentes": "total",
+    "Idade média": "idade_media",
+    "IES únicas": "ies_unicas",
+    "Fundadores/Sócios": "fundadores",
+    "Fundadores/Sócios (%)": "fundadores_pct",
+}
+
+
+class SourceSummary(NamedTuple):
+    fingerprint: str
+    base: dict
+    counts: dict          # chave de KPI_COUNT_LABELS -> tabela (rótulo, Respondentes, %) ou None
+    likert: pd.DataFrame  # Bloco, Pergunta, Indice
+
+
+def source_summary(df: pd.DataFrame, id_col) -> SourceSummary:
+    """Todas as KPIs que a comparação mostra, calculadas uma vez por dataset."""
+    fp = dataset_fingerprint(df)
+    def build():
+        return SourceSummary(
+            fp,
+            base_metrics(df, id_col),
+            {key: kpi_counts(df, id_col, key, label, of_total) for key, (label, of_total) in KPI_COUNT_LABELS.items()},
+            likert_item_indices(df, id_col),
+        )
+    return _SUMMARIES.get_or_compute((fp, id_col), build)
+
+
+def compare_base(summaries: dict) -> pd.DataFrame:
+    """Cartões da Base: uma linha por métrica, uma coluna por fonte."""
+    return pd.DataFrame(
+        {name: [s.base[k] for k in BASE_ROWS.values()] for name, s in summaries.items()},
+        index=list(BASE_ROWS),
+    ).round(1)
+
+
+def compare_counts(summaries: dict, key: str) -> pd.DataFrame | None:
+    """Tabela longa (Fonte, rótulo, Respondentes, %) da KPI `key`; None se nenhuma fonte a tem."""
+    parts = [s.counts[key].assign(Fonte=name) for name, s in summaries.items() if s.counts.get(key) is not None]
+    if not parts:
+        return None
+    out = pd.concat(parts, ignore_index=True)
+    return out[["Fonte"] + [c for c in out.columns if c != "Fonte"]]
+
+
+def compare_likert(summaries: dict) -> pd.DataFrame:
+    """
+    Índices Likert por item (Bloco, Pergunta), uma coluna por fonte e, para
+    cada fonte depois da primeira, "Δ fonte" = fonte − primeira.
+    """
+    names = list(summaries)
+    out = None
+    for name in names:
+        t = summaries[name].likert[["Bloco", "Pergunta", "Indice"]].drop_duplicates(["Bloco", "Pergunta"])
+        t = t.rename(columns={"Indice": name})
+        out = t if out is None else out.merge(t, on=["Bloco", "Pergunta"], how="outer", sort=False)
+    for name in names[1:]:
+        out[f"Δ {name}"] = (out[name] - out[names[0]]).round(1)
+    return out
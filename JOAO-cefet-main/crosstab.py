@@ -0,0 +1,135 @@
+import os
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from aggregation import column_codes
+from likert_codec import INDEX_LUT, likert_codes
+from memo import BoundedCache, dataset_fingerprint, respondent_codes
+from multiselect import split_options
+from perf import probed
+
+# -----------------------------------------------------------------------------
+# CRUZAMENTOS (itens/valores × grupos de uma dimensão, numa redução só)
+# -----------------------------------------------------------------------------
+# O grupo de cada linha é o código fatorado da dimensão (curso, IES, faixa...);
+# num recorte, só os grupos observados nele (aggregation.column_codes).
+# Cada célula (item, grupo, nível) vira uma posição de um único bincount, em vez
+# de um groupby por gráfico. Respondentes repetidos contam uma vez por célula,
+# como em likert_matrix e kpi_counts. O resultado bruto é cacheado por
+# (dataset/recorte, dimensão, colunas); a supressão de células pequenas
+# (MIN_CELL) é aplicada na saída, então mudar o limite não refaz a redução.
+MIN_CELL = int(os.environ.get("CEFET_CROSSTAB_MIN_CELL", "5"))
+
+_CROSS = BoundedCache(max_entries=64, name="cruzamentos")
+
+
+class LikertCrossTab(NamedTuple):
+    groups: list[str]
+    counts: np.ndarray  # itens × grupos × 5, respondentes distintos por nível
+    valid: np.ndarray   # itens × grupos, respondentes distintos com resposta válida
+    index: np.ndarray   # itens × grupos, índice 0–100 (NaN sem respostas)
+
+
+class ValueCrossTab(NamedTuple):
+    groups: list[str]
+    values: list
+    counts: np.ndarray  # grupos × valores, respondentes distintos
+    totals: np.ndarray  # grupos, respondentes distintos no grupo
+
+
+def _group_codes(codes: np.ndarray, uniques) -> tuple[np.ndarray, list[str]]:
+    return codes.astype(np.int64), [str(u) for u in uniques]
+
+
+def _present(totals: np.ndarray) -> np.ndarray:
+    # grupos com respondentes (categóricas listam categorias vazias)
+    return np.flatnonzero(totals > 0)
+
+
+@probed("cruzamento:likert", "agregacao")
+def _likert_crosstab(codes: np.ndarray, group: np.ndarray, n_groups: int, resp: np.ndarray,
+                     n_resp: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    n, k = codes.shape
+    ok = group >= 0
+    codes, group, resp = codes[ok], group[ok], resp[ok]
+    cell = group[:, None] + n_groups * np.arange(k, dtype=np.int64)  # item × grupo
+    rows = np.bincount((cell * 6 + codes).ravel(), minlength=k * n_groups * 6).reshape(k, n_groups, 6)
+    valid_rows = rows[..., 1:].sum(axis=2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        index = np.where(valid_rows > 0, (rows @ INDEX_LUT) / np.maximum(valid_rows, 1), np.nan)
+    if n_resp == n:
+        # um registro por respondente: as linhas já são respondentes distintos
+        counts = rows[..., 1:]
+        return counts, counts.sum(axis=2), index
+    has = (codes != 0) & (resp[:, None] >= 0)
+    r = np.broadcast_to(resp.astype(np.int64)[:, None], codes.shape)[has]
+    keys = np.unique((cell[has] * n_resp + r) * 6 + codes[has])
+    counts = np.bincount(keys // 6 // n_resp * 5 + keys % 6 - 1, minlength=k * n_groups * 5).reshape(k, n_groups, 5)
+    valid = np.bincount(np.unique(keys // 6) // n_resp, minlength=k * n_groups).reshape(k, n_groups)
+    return counts, valid, index
+
+
+def likert_crosstab_counts(df: pd.DataFrame, id_col, dim: str, groups, cols) -> LikertCrossTab:
+    """
+    Níveis e índice de cada coluna Likert `cols` × grupo da dimensão `dim`.
+    `groups()` devolve (códigos por linha, grupos), como `column_codes`, e só
+    é avaliada em cache miss.
+    """
+    cols = tuple(cols)
+    def build():
+        group, labels = _group_codes(*groups())
+        resp, n_resp = respondent_codes(df, id_col)
+        counts, valid, index = _likert_crosstab(likert_codes(df, cols), group, len(labels), resp, n_resp)
+        keep = _present(valid.sum(axis=0))
+        return LikertCrossTab([labels[i] for i in keep], counts[:, keep], valid[:, keep], index[:, keep])
+    return _CROSS.get_or_compute((dataset_fingerprint(df), "likert", id_col, dim, cols), build)
+
+
+def _row_values(codes: np.ndarray, uniques, multi: bool) -> tuple[np.ndarray, np.ndarray, list]:
+    # (linha, valor) de cada resposta; múltipla escolha gera um par por opção marcada
+    if not multi:
+        rows = np.flatnonzero(codes >= 0)
+        return rows, codes[rows].astype(np.int64), list(uniques)
+    parts = [split_options(u) for u in uniques]
+    options = sorted({p for ps in parts for p in ps})
+    pos = {o: i for i, o in enumerate(options)}
+    ind = np.array([pos[p] for ps in parts for p in ps], dtype=np.int64)
+    ptr = np.zeros(len(parts) + 1, dtype=np.int64)
+    np.cumsum([len(ps) for ps in parts], out=ptr[1:])
+    rows = np.flatnonzero(codes >= 0)
+    c = codes[rows]
+    width = ptr[c + 1] - ptr[c]
+    start = np.repeat(ptr[c], width) + (np.arange(width.sum()) - np.repeat(np.cumsum(width) - width, width))
+    return np.repeat(rows, width), ind[start], options
+
+
+@probed("cruzamento:valores", "agregacao")
+def _value_crosstab(rows: np.ndarray, values: np.ndarray, n_values: int, group: np.ndarray, n_groups: int,
+                    resp: np.ndarray, n_resp: int) -> tuple[np.ndarray, np.ndarray]:
+    ok = (group >= 0) & (resp >= 0)
+    g, r = group[ok], resp[ok].astype(np.int64)
+    totals = np.bincount(np.unique(g * n_resp + r) // max(n_resp, 1), minlength=n_groups)
+    cell_ok = ok[rows]
+    g, v, r = group[rows[cell_ok]], values[cell_ok], resp[rows[cell_ok]].astype(np.int64)
+    keys = np.unique((g * n_values + v) * n_resp + r)
+    counts = np.bincount(keys // max(n_resp, 1), minlength=n_groups * n_values).reshape(n_groups, n_values)
+    return counts, totals
+
+
+def value_crosstab_counts(df: pd.DataFrame, id_col, dim: str, groups, col, values=None,
+                          multi: bool = False) -> ValueCrossTab:
+    """
+    Respondentes distintos por grupo da dimensão `dim` × valor da coluna `col`
+    (ou de `values()`, derivada e avaliada só em cache miss; ex.: faixa etária).
+    `groups()` e `values()` devolvem (códigos por linha, valores), como `column_codes`.
+    """
+    def build():
+        group, labels = _group_codes(*groups())
+        resp, n_resp = respondent_codes(df, id_col)
+        rows, vals, uniques = _row_values(*(values() if values is not None else column_codes(df, col)), multi)
+        counts, totals = _value_crosstab(rows, vals, len(uniques), group, len(labels), resp, n_resp)
+        keep = _present(totals)
+        return ValueCrossTab([labels[i] for i in keep], uniques, counts[keep], totals[keep])
+    return _CROSS.get_or_compute((dataset_fingerprint(df), "valores", id_col, dim, col), build)
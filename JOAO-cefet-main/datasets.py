@@ -0,0 +1,271 @@
+import io
+import os
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
+from typing import NamedTuple
+from urllib.parse import unquote, urlparse
+
+import pandas as pd
+
+from column_index import column_index
+from compact import compact_dataset
+from excel_reader import read_projected
+from http_fetch import fetch
+from kpi_registry import ID_CANDIDATES, apply_mapping, likert_columns
+from memo import dataset_fingerprint, forget_dataset
+from perf import probe
+from workbook_cache import content_hash, read_workbook
+
+# -----------------------------------------------------------------------------
+# CACHE COMPARTILHADO DE DATASETS (um por processo, somente leitura)
+# -----------------------------------------------------------------------------
+# Todas as sessões do Streamlit recebem o MESMO objeto: nada aqui pode ser
+# alterado in-place por quem consome (as KPIs só leem; cópias são explícitas).
+MAX_BYTES = int(os.environ.get("CEFET_DATASET_MAX_MB", "1024")) * 1024 * 1024
+TTL_SECONDS = float(os.environ.get("CEFET_DATASET_TTL", "3600"))
+SOURCE_TTL_SECONDS = 600  # de quanto em quanto tempo uma URL é revalidada
+LOAD_WORKERS = int(os.environ.get("CEFET_LOAD_WORKERS", "4"))
+
+# URLs de dados no GitHub (Raw)
+GITHUB_FILES = {
+    "dados_cefet.xlsx":
+        "https://raw.githubusercontent.com/Totishuro/JOAO-cefet/main/JOAO-cefet-main/data/dados_cefet.xlsx",
+    "Dados CEFET_MG (Sem dados pessoais).xlsx":
+        "https://raw.githubusercontent.com/Totishuro/JOAO-cefet/main/JOAO-cefet-main/data/Dados%20CEFET_MG%20-%20Sem%20dados%20pessoais%20(2).xlsx",
+}
+
+
+class Dataset(NamedTuple):
+    df: pd.DataFrame
+    id_col: object | None
+    id_values: pd.Index | None  # IDs originais quando o df é compacto
+    report: dict | None         # relatório de memória da compactação
+    fingerprint: str
+    status: str = "cache"       # baixado | nao_modificado | offline | local | cache | ondas
+
+
+def dataset_nbytes(ds: Dataset) -> int:
+    n = int(ds.df.memory_usage(deep=True).sum())
+    if ds.id_values is not None:
+        n += int(ds.id_values.memory_usage(deep=True))
+    return n
+
+
+class SharedDatasetCache:
+    """LRU limitado por bytes e TTL; cargas simultâneas da mesma chave são feitas uma vez."""
+
+    def __init__(self, max_bytes: int, ttl: float, sizeof=dataset_nbytes, on_evict=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.on_evict = on_evict
+        self._entries: OrderedDict = OrderedDict()  # chave -> (valor, bytes, criado_em)
+        self._loading: dict = {}
+        self._lock = Lock()
+        self.hits = self.misses = self.evictions = 0
+        self.bytes = 0
+
+    def _drop(self, key):
+        value, nbytes, _ = self._entries.pop(key)
+        self.bytes -= nbytes
+        self.evictions += 1
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[2] > self.ttl:
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def get(self, key):
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+            return value
+
+    def get_or_load(self, key, loader):
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            key_lock = self._loading.setdefault(key, Lock())
+        with key_lock:
+            with self._lock:
+                value = self._lookup(key)
+                if value is not None:  # outra sessão carregou enquanto esperávamos
+                    self.hits += 1
+                    return value
+                self.misses += 1
+            try:
+                value = loader()
+                nbytes = self.sizeof(value)
+                with self._lock:
+                    self._entries[key] = (value, nbytes, time.time())
+                    self.bytes += nbytes
+                    while self.bytes > self.max_bytes and len(self._entries) > 1:
+                        self._drop(next(iter(self._entries)))
+            finally:
+                # também quando a carga falha (upload corrompido, erro HTTP)
+                with self._lock:
+                    self._loading.pop(key, None)
+        return value
+
+    def discard_if(self, predicate) -> int:
+        with self._lock:
+            stale = [k for k in self._entries if predicate(k)]
+            for key in stale:
+                self._drop(key)
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return dict(
+                entradas=len(self._entries),
+                mb=round(self.bytes / 1024 / 1024, 1),
+                limite_mb=round(self.max_bytes / 1024 / 1024),
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                hit_rate=round(self.hits / total * 100, 1) if total else 0.0,
+            )
+
+
+def _forget(key, ds: Dataset):
+    # derruba também os índices derivados (códigos Likert, tabelas, IDs fatorados)
+    forget_dataset(ds.fingerprint)
+
+
+DATASETS = SharedDatasetCache(MAX_BYTES, TTL_SECONDS, on_evict=_forget)
+
+# fonte (URL, arquivo, upload) -> (hash do conteúdo, conferido_em)
+_SOURCES: dict = {}
+_SOURCES_LOCK = Lock()
+
+
+# -----------------------------------------------------------------------------
+# CARGA
+# -----------------------------------------------------------------------------
+def read_excel_bytes(data: bytes, projected: bool = False, nrows: int | None = None) -> pd.DataFrame:
+    # Com `projected`, só as colunas usadas pelas KPIs são lidas (excel_reader)
+    if not projected and nrows is None:
+        return read_workbook(data)
+    def reader(b: bytes) -> pd.DataFrame:
+        if projected:
+            return read_projected(b, nrows=nrows)
+        return pd.read_excel(io.BytesIO(b), engine="openpyxl", nrows=nrows)
+    variant = f"{'kpi' if projected else 'full'}-{nrows or 'all'}"
+    return read_workbook(data, reader=reader, variant=variant)
+
+
+def prepare_dataset(data: bytes, projected: bool = False, nrows: int | None = None,
+                    compact: bool = False) -> Dataset:
+    with probe("carga:excel", "carga"):
+        df = read_excel_bytes(data, projected, nrows)
+    with probe("carga:mapeamento", "carga"):
+        df = apply_mapping(df)  # colunas do CSV de classificação passam a ser `nome_tecnico`
+    id_col = column_index(df).find_respondent_id(ID_CANDIDATES)
+    id_values = report = None
+    if compact and id_col is not None:
+        with probe("carga:compactar", "carga"):
+            df, id_values, report = compact_dataset(df, id_col, likert_columns(df.columns))
+    with probe("carga:fingerprint", "carga"):
+        fp = dataset_fingerprint(df)
+    return Dataset(df, id_col, id_values, report, fp)
+
+
+def _options_key(projected, nrows, compact) -> tuple:
+    return (bool(projected), nrows or None, bool(compact))
+
+
+def load_source(source_key, get_bytes, ttl: float | None = None, projected: bool = False,
+                nrows: int | None = None, compact: bool = False) -> Dataset:
+    """
+    `get_bytes() -> (bytes, status)` só é chamado quando a fonte não foi vista
+    recentemente (`ttl`) ou o dataset saiu do cache.
+    """
+    opts = _options_key(projected, nrows, compact)
+    with _SOURCES_LOCK:
+        known = _SOURCES.get(source_key)
+    if known is not None and (ttl is None or time.time() - known[1] <= ttl):
+        ds = DATASETS.get((known[0],) + opts)
+        if ds is not None:
+            return ds
+    with probe("carga:fonte", "carga"):
+        data, status = get_bytes()
+        h = content_hash(data)
+    with _SOURCES_LOCK:
+        _SOURCES[source_key] = (h, time.time())
+    ds = DATASETS.get_or_load((h,) + opts, lambda: prepare_dataset(data, projected, nrows, compact))
+    return ds._replace(status=status)
+
+
+def load_url(url: str, **opts) -> Dataset:
+    def get_bytes():
+        r = fetch(url, timeout=30)
+        return r.content, r.status
+    return load_source(("url", url), get_bytes, ttl=SOURCE_TTL_SECONDS, **opts)
+
+
+def load_path(p: Path, **opts) -> Dataset:
+    info = p.stat()
+    return load_source(("path", str(p.resolve()), info.st_mtime_ns, info.st_size),
+                       lambda: (p.read_bytes(), "local"), **opts)
+
+
+def load_upload(uploaded, **opts) -> Dataset:
+    key = ("upload", getattr(uploaded, "file_id", None) or uploaded.name, uploaded.size)
+    return load_source(key, lambda: (uploaded.getvalue(), "local"), **opts)
+
+
+def load_many(loaders: dict, then=None, max_workers: int | None = None) -> dict:
+    """
+    {nome: resultado ou a exceção} de várias cargas `loader() -> Dataset` em
+    paralelo (threads: download e leitura do Arrow liberam o GIL). `then(ds)`
+    roda na mesma thread logo após a carga e o resultado vira (ds, then(ds)).
+    """
+    if not loaders:
+        return {}
+    def job(load):
+        ds = load()
+        return ds if then is None else (ds, then(ds))
+    out = {}
+    with ThreadPoolExecutor(max_workers=min(len(loaders), max_workers or LOAD_WORKERS)) as pool:
+        futures = {name: pool.submit(job, load) for name, load in loaders.items()}
+        for name, fut in futures.items():
+            try:
+                out[name] = fut.result()
+            except Exception as e:  # uma fonte com erro não derruba as outras
+                out[name] = e
+    return out
+
+
+def is_url(source: str) -> bool:
+    return source.startswith(("http://", "https://"))
+
+
+def source_slug(source: str) -> str:
+    name = unquote(Path(urlparse(source).path).stem) if is_url(source) else Path(source).stem
+    return re.sub(r"[^\w.-]+", "_", name).strip("_") or "planilha"
+
+
+def clear_datasets():
+    DATASETS.clear()
+    with _SOURCES_LOCK:
+        _SOURCES.clear()
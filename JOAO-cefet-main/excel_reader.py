@@ -0,0 +1,85 @@
+import io
+from collections import Counter
+from contextlib import contextmanager
+from itertools import islice
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from compact import compact_dtypes
+from kpi_registry import required_columns
+
+# -----------------------------------------------------------------------------
+# LEITURA PROJETADA (openpyxl read-only, só as colunas usadas pelas KPIs)
+# -----------------------------------------------------------------------------
+def _header_names(raw) -> list[str]:
+    # mesmas regras do pd.read_excel: vazio -> "Unnamed: i", repetidos -> "X.1", "X.2"...
+    names, seen = [], Counter()
+    for i, v in enumerate(raw):
+        name = f"Unnamed: {i}" if v is None or v == "" else v  # só espaços fica como está
+        if isinstance(name, float) and name.is_integer():
+            name = int(name)
+        n = seen[name]
+        seen[name] += 1
+        names.append(name if n == 0 else f"{name}.{n}")
+    return names
+
+
+@contextmanager
+def projected_rows(source, select=required_columns, nrows: int | None = None):
+    """
+    (nomes das colunas mantidas, iterador das linhas projetadas) da primeira aba,
+    em modo streaming; `source` é o conteúdo (bytes), um caminho ou um arquivo.
+    Como no read_excel, linhas em branco entre os dados viram linhas vazias e as
+    do fim da aba (ou das `nrows` primeiras linhas) são descartadas: mesmo
+    número de linhas nos dois caminhos.
+    """
+    wb = load_workbook(io.BytesIO(source) if isinstance(source, bytes) else source, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            yield [], iter(())
+            return
+        names = _header_names(header)
+        wanted = set(select(names))
+        keep = [i for i, name in enumerate(names) if name in wanted]
+
+        def projected():
+            blank = 0
+            for row in islice(rows, nrows):
+                if all(v is None for v in row):
+                    blank += 1  # só sai se vier uma linha preenchida depois
+                    continue
+                for _ in range(blank):
+                    yield [None] * len(keep)
+                blank = 0
+                width = len(row)
+                yield [row[i] if i < width else None for i in keep]
+        yield [names[i] for i in keep], projected()
+    finally:
+        wb.close()
+
+
+def read_projected(data: bytes, select=required_columns, nrows: int | None = None) -> pd.DataFrame:
+    """
+    Lê a primeira aba em modo streaming e materializa só as colunas devolvidas por
+    `select(cabeçalhos)`; `nrows` limita as linhas (pré-visualização).
+    """
+    with projected_rows(data, select, nrows) as (names, rows):
+        values = [[] for _ in names]
+        for row in rows:
+            for out, v in zip(values, row):
+                out.append(v)
+    df = pd.DataFrame({name: pd.Series(v, dtype=None if v else object) for name, v in zip(names, values)})
+    return compact_dtypes(df)
+
+
+def iter_projected(source, chunk_rows: int, select=required_columns):
+    """DataFrames de até `chunk_rows` linhas (só as colunas de `select`), sem materializar a aba inteira."""
+    with projected_rows(source, select) as (names, rows):
+        while True:
+            block = list(islice(rows, chunk_rows))
+            if not block:
+                return
+            yield pd.DataFrame(block, columns=names)
@@ -0,0 +1,102 @@
+import io
+import os
+import re
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from compact import restore_ids
+from datasets import SharedDatasetCache
+from memo import RowSubset, dataset_fingerprint
+
+# -----------------------------------------------------------------------------
+# EXPORTAÇÃO SOB DEMANDA (CSV em blocos, Parquet, XLSX com as tabelas das KPIs)
+# -----------------------------------------------------------------------------
+# Nada é gerado até alguém pedir; o resultado fica em cache pelo fingerprint
+# do dataset, então baixar de novo não recalcula. O cache é limitado por bytes
+# (e TTL): exportações do dataset inteiro têm o tamanho dos dados.
+CSV_CHUNK_ROWS = 50_000
+EXPORT_MAX_BYTES = int(os.environ.get("CEFET_EXPORT_MAX_MB", "256")) * 1024 * 1024
+EXPORT_TTL_SECONDS = 900
+_EXPORTS = SharedDatasetCache(EXPORT_MAX_BYTES, EXPORT_TTL_SECONDS, sizeof=len)
+
+MIME = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def iter_csv_chunks(df: pd.DataFrame, id_col=None, id_values=None, chunk_rows: int = CSV_CHUNK_ROWS):
+    """CSV em blocos de `chunk_rows` linhas (cabeçalho só no primeiro); IDs restaurados por bloco."""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        part = restore_ids(df.iloc[start:start + chunk_rows], id_col, id_values)
+        yield part.to_csv(index=False, header=start == 0).encode("utf-8")
+
+
+def _csv_bytes(df, id_col, id_values) -> bytes:
+    buf = io.BytesIO()
+    for chunk in iter_csv_chunks(df, id_col, id_values):
+        buf.write(chunk)
+    return buf.getvalue()
+
+
+def _arrow_table(df: pd.DataFrame) -> pa.Table:
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # colunas object com tipos misturados (ex.: ID numérico e texto) viram texto
+        fixed = df.copy()
+        for c in fixed.columns:
+            if fixed[c].dtype == object:
+                fixed[c] = fixed[c].map(lambda v: None if v is None or v != v else str(v))
+        return pa.Table.from_pandas(fixed, preserve_index=False)
+
+
+def _parquet_bytes(df, id_col, id_values) -> bytes:
+    if isinstance(df, RowSubset):
+        df = df.frame()  # recorte: as linhas só são copiadas durante a exportação
+    buf = io.BytesIO()
+    table = _arrow_table(restore_ids(df, id_col, id_values).rename(columns=str))
+    pq.write_table(table, buf, compression="zstd", row_group_size=CSV_CHUNK_ROWS)
+    return buf.getvalue()
+
+
+def _sheet_name(name: str, used: set) -> str:
+    # Excel: até 31 caracteres, sem []:*?/\ e sem repetir
+    base = re.sub(r"[\[\]:*?/\\]", " ", str(name)).strip()[:31] or "Planilha"
+    out, i = base, 1
+    while out.lower() in used:
+        suffix = f" ({i})"
+        out, i = base[:31 - len(suffix)] + suffix, i + 1
+    used.add(out.lower())
+    return out
+
+
+def _xlsx_bytes(sheets: dict) -> bytes:
+    buf = io.BytesIO()
+    used = set()
+    with pd.ExcelWriter(buf, engine="xlsxwriter") as writer:
+        for name, table in sheets.items():
+            sheet = _sheet_name(name, used)
+            table.to_excel(writer, sheet_name=sheet, index=False)
+            writer.sheets[sheet].autofit()
+    return buf.getvalue()
+
+
+def export_dataset(df: pd.DataFrame, fmt: str, id_col=None, id_values=None) -> bytes:
+    """Dataset inteiro em `fmt` ("csv" ou "parquet"), com o ID original."""
+    builders = {"csv": _csv_bytes, "parquet": _parquet_bytes}
+    key = (dataset_fingerprint(df), "dataset", fmt, id_col)
+    return _EXPORTS.get_or_load(key, lambda: builders[fmt](df, id_col, id_values))
+
+
+def export_tables(df: pd.DataFrame, build_sheets, tag: str = "kpis") -> bytes:
+    """XLSX com uma aba por tabela; `build_sheets() -> {nome: DataFrame}` só roda em cache miss."""
+    key = (dataset_fingerprint(df), "xlsx", tag)
+    return _EXPORTS.get_or_load(key, lambda: _xlsx_bytes(build_sheets()))
+
+
+def clear_exports():
+    _EXPORTS.clear()
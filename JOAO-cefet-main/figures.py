@@ -0,0 +1,32 @@
+import json
+
+from memo import BoundedCache, dataset_fingerprint
+from perf import probe
+
+# -----------------------------------------------------------------------------
+# CACHE DE FIGURAS (spec Plotly serializada uma vez por KPI/dataset/filtro/tema)
+# -----------------------------------------------------------------------------
+# Guarda o JSON da figura, não o go.Figure: texto é imutável e pode ser
+# compartilhado entre sessões e threads; cada acerto devolve um dict novo.
+_FIGURES = BoundedCache(max_entries=256, name="figuras")
+
+
+def cached_figure(kpi_id: str, df, build, state: tuple = (), theme: str | None = None) -> dict:
+    """
+    `build()` (que devolve um go.Figure) só roda em cache miss. A chave começa
+    pelo fingerprint do dataset, então a figura sai junto quando o dataset é
+    descartado (memo.forget_dataset). O dict devolvido é do chamador.
+    """
+    key = (dataset_fingerprint(df), kpi_id, tuple(state), theme)
+    def timed_build():
+        with probe(f"figura:{kpi_id}", "figura"):
+            return build().to_json()
+    return json.loads(_FIGURES.get_or_compute(key, timed_build))
+
+
+def clear_figures():
+    _FIGURES.clear()
+
+
+def figure_cache_size() -> int:
+    return len(_FIGURES)
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from threading import Lock
+from typing import NamedTuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# -----------------------------------------------------------------------------
+# DOWNLOAD CONDICIONAL (Session com pool + corpo em disco com ETag/Last-Modified)
+# -----------------------------------------------------------------------------
+HTTP_CACHE_DIR = Path(os.environ.get("CEFET_HTTP_CACHE_DIR", ".cache/http"))
+
+_SESSION: requests.Session | None = None
+_SESSION_LOCK = Lock()
+
+
+class FetchResult(NamedTuple):
+    content: bytes
+    status: str          # "baixado" | "nao_modificado" | "offline"
+    etag: str | None
+    last_modified: str | None
+
+
+def session() -> requests.Session:
+    """Session única por processo, com pool de conexões e retentativas leves."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            s = requests.Session()
+            retry = Retry(total=2, backoff_factor=0.5, status_forcelist=(502, 503, 504),
+                          allowed_methods=("GET", "HEAD"))
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _SESSION = s
+        return _SESSION
+
+
+def _paths(url: str, cache_dir: Path) -> tuple[Path, Path]:
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return cache_dir / f"{key}.body", cache_dir / f"{key}.json"
+
+
+def _read_cached(url: str, cache_dir: Path) -> tuple[bytes, dict] | None:
+    body, meta = _paths(url, cache_dir)
+    if not (body.exists() and meta.exists()):
+        return None
+    try:
+        return body.read_bytes(), json.loads(meta.read_text("utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cached(url: str, cache_dir: Path, content: bytes, meta: dict):
+    body, meta_path = _paths(url, cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for path, data in ((body, content), (meta_path, json.dumps(meta).encode("utf-8"))):
+        tmp = path.with_suffix(f"{path.suffix}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+
+def _drop_cached(url: str, cache_dir: Path):
+    for path in _paths(url, cache_dir):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def _conditional_headers(cached: tuple[bytes, dict] | None) -> dict:
+    headers = {}
+    if cached is not None:
+        _, meta = cached
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
+
+
+def fetch(url: str, timeout: float = 30, cache_dir: Path | None = None,
+          http: requests.Session | None = None) -> FetchResult:
+    """
+    GET condicional: revalida com If-None-Match/If-Modified-Since, reaproveita o
+    corpo em disco no 304 e serve a cópia local se o servidor estiver inacessível.
+    """
+    cache_dir = cache_dir or HTTP_CACHE_DIR
+    http = http or session()
+    cached = _read_cached(url, cache_dir)
+    if cached is not None and not cached[0]:
+        _drop_cached(url, cache_dir)  # corpo vazio não serve de cópia local
+        cached = None
+
+    try:
+        r = http.get(url, headers=_conditional_headers(cached), timeout=timeout)
+        if r.status_code == 304 and cached is not None:
+            content, meta = cached
+            return FetchResult(content, "nao_modificado", meta.get("etag"), meta.get("last_modified"))
+        if r.status_code == 304:
+            # 304 sem corpo guardado (cache apagado pela metade ou proxy):
+            # descarta o que sobrou e pede o arquivo inteiro uma vez
+            _drop_cached(url, cache_dir)
+            r = http.get(url, headers={"Cache-Control": "no-cache"}, timeout=timeout)
+            if r.status_code == 304:
+                raise requests.HTTPError("304 sem cópia local para reaproveitar", response=r)
+        r.raise_for_status()
+    except requests.RequestException as e:
+        # erro de rede ou 5xx: usa a última cópia conhecida
+        status = getattr(getattr(e, "response", None), "status_code", None)
+        if cached is not None and (status is None or status >= 500):
+            content, meta = cached
+            return FetchResult(content, "offline", meta.get("etag"), meta.get("last_modified"))
+        raise
+
+    meta = dict(
+        url=url,
+        etag=r.headers.get("ETag"),
+        last_modified=r.headers.get("Last-Modified"),
+        fetched_at=time.time(),
+    )
+    try:
+        _write_cached(url, cache_dir, r.content, meta)
+    except OSError:
+        pass  # sem disco gravável: segue só com o download
+    return FetchResult(r.content, "baixado", meta["etag"], meta["last_modified"])
+
+
+
+def still_current(url: str, etag: str | None, timeout: float = 5,
+                  http: requests.Session | None = None) -> bool | None:
+    """
+    HEAD condicional (If-None-Match) sem baixar o corpo: True se o recurso
+    ainda tem o `etag`, False se mudou, None se não deu para saber (offline).
+    """
+    if not etag:
+        return None
+    http = http or session()
+    try:
+        r = http.head(url, headers={"If-None-Match": etag}, timeout=timeout, allow_redirects=True)
+    except requests.RequestException:
+        return None
+    if r.status_code == 304:
+        return True
+    if r.ok:
+        return r.headers.get("ETag") == etag
+    return None
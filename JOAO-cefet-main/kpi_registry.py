@@ -0,0 +1,217 @@
+from functools import lru_cache
+from typing import NamedTuple
+
+import pandas as pd
+
+from column_index import ColumnIndex, column_index, normalize_text
+from column_mapping import DEFAULT_MAPPING, apply_column_mapping, compile_mapping, match_headers
+from memo import set_fingerprint, stored_fingerprint
+
+# -----------------------------------------------------------------------------
+# REGISTRO DE COLUNAS DAS KPIs
+# -----------------------------------------------------------------------------
+# Fonte única dos keywords usados pelas seções. O app resolve as colunas por
+# aqui e o leitor de Excel usa o mesmo registro para carregar só o necessário.
+# As colunas do CSV são renomeadas para `nome_tecnico` logo após a carga
+# (apply_mapping) e resolvidas por ele; os keywords ficam para as demais.
+CLASSIFICATION_CSV = DEFAULT_MAPPING
+
+ID_CANDIDATES = [
+    "Respondent ID", "respondent_id", "respondente_id", "id_respondente",
+    "respondentid", "idrespondente"
+]
+
+# chave -> alternativas (keywords, require_all); vale a primeira que encontrar
+COLUMN_SPECS = {
+    "perfil": [(("voce", "e"), True)],
+    "idade": [(("idade",), True)],
+    "grau": [(("grau", "graduacao"), False)],
+    "ies": [(("instituicao", "ensino"), True), (("ies",), False)],
+    "curso": [(("curso", "graduacao"), False)],
+    "conceitos": [(("o que voce entende como empreendedorismo",), True)],
+    "fundador": [(("socio",), True), (("fundador",), True)],
+    "projetos": [(("ao longo da sua graduacao, quais projetos voce ja participou",), True)],
+    "permanencia": [(("quais motivos voce considera que te fazem permanecer",), True)],
+    "evasao": [(("quais motivos voce considera que te fariam deixar",), True)],
+    "evasao_colegas": [(("voce possui colegas que deixaram a instituicao de ensino superior sem concluir o curso",), True)],
+    "prof_experiencia": [(("os(as) professores(as) da minha instituicao de ensino superior possuem experiencia no mercado de trabalho",), True)],
+    "prof_acessiveis": [(("os(as) professores(as) da minha instituicao de ensino superior sao acessiveis para apoiar as iniciativas",), True)],
+    "ingresso": [(("o quanto voce considera que a sua instituicao de ensino superior influenciou na sua decisao de ingresso",), True)],
+}
+
+# chave -> nome_tecnico no CSV de classificação (consultado antes dos keywords)
+TECH_COLUMNS = {
+    "perfil": "voce_e",
+    "idade": "idade",
+    "curso": "curso_graduacao",
+    "fundador": "socio_ou_fundador",
+    "permanencia": "permanencia_motivos",
+    "evasao_colegas": "evasao_motivos",
+    "prof_experiencia": "professores_experiencia_mercado",
+    "prof_acessiveis": "professores_acessiveis_apoiar_iniciativas",
+}
+
+# KPIs de contagem categórica (DistinctCount); "idade" entra como faixa etária
+COUNT_KEYS = [
+    "perfil", "idade", "grau", "ies", "curso", "conceitos", "fundador", "projetos",
+    "permanencia", "evasao", "evasao_colegas", "prof_experiencia", "prof_acessiveis",
+]
+
+# KPIs de múltipla escolha: a resposta "A;B;C" conta uma vez para cada opção
+MULTI_SELECT_KEYS = ["conceitos", "projetos", "permanencia", "evasao"]
+MULTI_SELECT_SEP = ";"
+
+LIKERT_BLOCKS = {
+    "alunos": dict(
+        title="👨‍🎓 Alunos — características (Likert 0–100)",
+        detect_keywords=["o quanto as seguintes caracteristicas estao presentes", "alunos"],
+        prefix_label="Alunos",
+        classe="alunos",
+    ),
+    "professores": dict(
+        title="👨‍🏫 Professores — características (Likert 0–100)",
+        detect_keywords=["o quanto as seguintes caracteristicas estao presentes", "professores"],
+        prefix_label="Professores",
+        classe="professores",
+    ),
+    "pcd": dict(
+        title="♿ Infraestrutura — pessoas com deficiência (Likert 0–100)",
+        detect_keywords=["como voce avalia a qualidade da infraestrutura destinada a pessoas com deficiencia"],
+        prefix_label="PCD",
+    ),
+    "infra": dict(
+        title="🏛️ Infraestrutura — geral (Likert 0–100)",
+        detect_keywords=["como voce avalia a qualidade da infraestrutura oferecida pela sua instituicao de ensino superior"],
+        prefix_label="Infra",
+        classe="infraestrutura",
+    ),
+    "internet": dict(
+        title="📶 Internet (Likert 0–100)",
+        detect_keywords=["como voce avalia a qualidade da internet oferecida pela sua instituicao de ensino superior"],
+        prefix_label="Internet",
+        classe="infraestrutura_internet",
+    ),
+}
+
+# chave -> (título, frases)
+FRASES = {
+    "alunos": (
+        "Frase avaliada — Postura empreendedora dos alunos",
+        ["considerando o respondido na questao anterior, como voce avalia a frase: \"os(as) alunos(as)"],
+    ),
+    "professores": (
+        "Frase avaliada — Postura empreendedora dos professores",
+        ["considerando o respondido na questao anterior, como voce avalia a frase: \"os(as) professores(as)"],
+    ),
+    "metodologia": (
+        "📚 Metodologia / Matriz / Casos (Likert 0–100)",
+        [
+            "o modelo/metodologia de ensino da minha instituicao de ensino superior contribui para que eu desenvolva postura empreendedora",
+            "a matriz curricular do curso contribui para o desenvolvimento da minha postura empreendedora",
+            "a minha instituicao de ensino superior oferece uma matriz curricular flexivel para que eu possa me engajar em atividades extra-curriculares",
+            "a instituicao de ensino superior apresenta casos de sucesso de ex-alunos(as)",
+        ],
+    ),
+}
+
+
+class Schema(NamedTuple):
+    tech: dict     # nome_tecnico -> coluna do DataFrame
+    classes: dict  # coluna -> classe
+    labels: dict   # coluna -> rótulo público
+
+
+@lru_cache(maxsize=64)
+def column_schema(index: ColumnIndex) -> Schema:
+    """Colunas reconhecidas pelo CSV de classificação (já renomeadas ou não), uma vez por esquema."""
+    mapping = compile_mapping(CLASSIFICATION_CSV)
+    if mapping is None:
+        return Schema({}, {}, {})
+    pairs = match_headers(tuple(index.columns), mapping)
+    return Schema(
+        tech={t: c for c, t in pairs},
+        classes={c: mapping.classes[t] for c, t in pairs},
+        labels={c: mapping.labels[t] for c, t in pairs},
+    )
+
+
+def apply_mapping(df: pd.DataFrame) -> pd.DataFrame:
+    """Renomeia para `nome_tecnico` as colunas do CSV de classificação (sem o CSV, nada muda)."""
+    if compile_mapping(CLASSIFICATION_CSV) is None:
+        return df
+    out = apply_column_mapping(df, CLASSIFICATION_CSV)[0]
+    fp = stored_fingerprint(df)
+    if out is not df and fp is not None:
+        # só troca nomes: deriva do pai em vez de refazer o hash do conteúdo
+        set_fingerprint(out, f"{fp}-mapa")
+    return out
+
+
+def resolve_column(index: ColumnIndex, key: str):
+    tech = TECH_COLUMNS.get(key)
+    if tech is not None:
+        col = column_schema(index).tech.get(tech)
+        if col is not None:
+            return col
+    for keywords, require_all in COLUMN_SPECS[key]:
+        col = index.find_first(*keywords, require_all=require_all)
+        if col:
+            return col
+    return None
+
+
+@lru_cache(maxsize=256)
+def block_columns(index: ColumnIndex, detect_keywords: tuple, classe: str | None = None) -> tuple:
+    """
+    Colunas de um bloco Likert: as da `classe` no CSV (menos as que são KPI
+    própria, como prof_experiencia) mais as que casam com os keywords.
+    """
+    schema = column_schema(index)
+    picked = set(index.find_cols(*detect_keywords))
+    if classe is not None:
+        own = {resolve_column(index, k) for k in TECH_COLUMNS}
+        picked.update(c for c, cls in schema.classes.items() if cls == classe and c not in own)
+    return tuple(c for c in index.columns if c in picked)
+
+
+def likert_block_columns(index: ColumnIndex, key: str) -> list:
+    block = LIKERT_BLOCKS[key]
+    return list(block_columns(index, tuple(block["detect_keywords"]), block.get("classe")))
+
+
+@lru_cache(maxsize=1)
+def classification_headers() -> frozenset:
+    mapping = compile_mapping(CLASSIFICATION_CSV)
+    if mapping is None:
+        return frozenset()
+    return frozenset(normalize_text(s.coluna_original) for s in mapping.specs)
+
+
+def required_columns(headers) -> list:
+    """Cabeçalhos (na ordem original) que alguma seção do dashboard utiliza."""
+    index = column_index(list(headers))
+    keep = set()
+    id_col = index.find_respondent_id(ID_CANDIDATES)
+    if id_col is not None:
+        keep.add(id_col)
+    for key in COLUMN_SPECS:
+        col = resolve_column(index, key)
+        if col is not None:
+            keep.add(col)
+    keep.update(likert_columns(headers))
+    keep.update(column_schema(index).classes)
+    return [c for c in index.columns if c in keep]
+
+
+def likert_columns(headers) -> list:
+    """Colunas avaliadas na escala Likert (blocos, frases e ingresso)."""
+    index = column_index(list(headers))
+    keep = set()
+    for key in LIKERT_BLOCKS:
+        keep.update(likert_block_columns(index, key))
+    for _, phrases in FRASES.values():
+        keep.update(c for c in (index.find_first(p) for p in phrases) if c is not None)
+    ingresso = resolve_column(index, "ingresso")
+    if ingresso is not None:
+        keep.add(ingresso)
+    return [c for c in index.columns if c in keep]
@@ -0,0 +1,626 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from aggregation import (
+    column_codes, counts_table, derived_codes, distinct_count_tables, n_respondents, respondents_containing,
+    respondents_in,
+)
+from bootstrap import index_interval, percent_interval
+from bundle import served
+from column_index import column_index
+from crosstab import MIN_CELL, likert_crosstab_counts, value_crosstab_counts
+from kpi_registry import (
+    COUNT_KEYS, FRASES, LIKERT_BLOCKS, MULTI_SELECT_KEYS, block_columns, column_schema, likert_columns,
+    resolve_column,
+)
+from likert_codec import (
+    INDEX_LUT, LIKERT_LABELS, NA_CODE, distinct_level_counts, index_from_codes, level_counts, likert_codes,
+    series_codes,
+)
+from memo import RowSubset, respondent_codes
+from multiselect import cooccurrence_table, option_table, respondents_with_options
+from partials import Partial, attached_partial, counts_from_table
+from perf import probed
+from reliability import cronbach_alpha, item_stats, item_total, standardized_alpha
+
+# -----------------------------------------------------------------------------
+# KPIs PURAS (sem st.*): usadas pelo dashboard e pelo relatório em lote (report.py)
+# -----------------------------------------------------------------------------
+# categorias por gráfico; o resto vira uma barra "Outros" (kpi_counts_top)
+TOP_N = int(os.environ.get("CEFET_TOP_N", "15"))
+OTHERS_LABEL = "Outros"
+
+FAIXAS_IDADE = dict(bins=[0, 19, 25, 30, 120], labels=["Até 19", "20–25", "26–30", "31+"])
+
+# chave -> (rótulo da coluna, % sobre o total de respondentes) — igual às seções
+KPI_COUNT_LABELS = {
+    "perfil": ("Perfil", False), "faixa": ("Faixa", False), "grau": ("Grau", False),
+    "ies": ("IES", False), "curso": ("Curso", False), "conceitos": ("Conceito", True),
+    "fundador": ("Resposta", True), "projetos": ("Projeto", True),
+    "permanencia": ("Motivo", True), "evasao": ("Motivo", True),
+    "evasao_colegas": ("Resposta", True), "prof_experiencia": ("Resposta", True),
+    "prof_acessiveis": ("Resposta", True),
+}
+
+
+def likert_index(series: pd.Series) -> float | None:
+    idx = index_from_codes(series_codes(series))[0]
+    return None if np.isnan(idx) else float(idx)
+
+
+@probed("kpi:likert_matrix", "kpi")
+def likert_matrix(df: pd.DataFrame, mapping: dict, id_col: str) -> pd.DataFrame:
+    """
+    mapping: { "Rótulo curto na tela": "nome da coluna no df" }
+    Retorna linhas com: Pergunta, Resposta (1..5 label), Contagem, Percentual, Total
+    e o intervalo de confiança do percentual (IC inferior, IC superior; bootstrap.py)
+
+    Total = respondentes distintos com ao menos uma resposta válida (1..5) no
+    item. Respostas fora da escala ("talvez", variações de neutros) não entram
+    no denominador, então os cinco percentuais somam ~100; itens sem nenhuma
+    resposta válida ficam de fora.
+    """
+    items = [(display, col) for display, col in mapping.items() if col in df.columns]
+    if not items:
+        return pd.DataFrame()
+    cols = [col for _, col in items]
+    partial = attached_partial(df, id_col)
+    if partial is not None and all(partial.has("likert", c) for c in cols):
+        counts, totals = partial.likert_levels(cols)
+    else:
+        # matriz int8 de todo o bloco + respondentes distintos por (item, nível)
+        codes = likert_codes(df, cols)
+        resp, n_resp = respondent_codes(df, id_col)
+        counts, totals = distinct_level_counts(codes, resp, n_resp)
+    keep = totals > 0
+    if not keep.any():
+        return pd.DataFrame()
+    counts, totals = counts[keep], totals[keep]
+    displays = [d for (d, _), k in zip(items, keep) if k]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct = np.round(counts / totals[:, None] * 100, 1)
+    low, high = percent_interval(counts, totals)
+    n_items = len(displays)
+    return pd.DataFrame({
+        "Pergunta": np.repeat(displays, 5),
+        "Resposta": np.tile(LIKERT_LABELS, n_items),
+        "Contagem": counts.ravel().astype(int),
+        "Percentual": pct.ravel(),
+        "Total": np.repeat(totals, 5).astype(int),
+        "IC inferior": np.round(low, 1).ravel(),
+        "IC superior": np.round(high, 1).ravel(),
+    })
+
+
+def likert_block_mapping(cols, prefix_label: str, labels: dict | None = None) -> dict:
+    # mapping display -> col; `labels` (coluna -> rótulo público do CSV) tem prioridade
+    mapping = {}
+    for c in cols:
+        if labels and c in labels:
+            mapping[f"{prefix_label}: {labels[c]}"] = c
+            continue
+        # tenta usar o “sufixo” mais legível
+        # pega tudo após o último fechamento de aspas ou depois do último ponto de interrogação
+        text = c
+        if "?" in text:
+            text = text.split("?")[-1]
+        text = text.replace("Caso não saiba avaliar", "").replace("Caso nao saiba avaliar", "")
+        text = text.strip(" :-—–")
+        text = re.sub(r'\s+', ' ', text).strip()
+        display = f"{prefix_label}: {text}" if text else c
+        mapping[display] = c
+    return mapping
+
+
+def _block_key(detect_keywords, prefix_label: str, classe: str | None = None) -> list:
+    # chave no artefato: o id do bloco de LIKERT_BLOCKS (a descrição completa se não for um deles)
+    spec = (list(detect_keywords), prefix_label, classe)
+    for key, block in LIKERT_BLOCKS.items():
+        if (list(block["detect_keywords"]), block["prefix_label"], block.get("classe")) == spec:
+            return [key]
+    return list(spec)
+
+
+@served(key=_block_key)
+def likert_block_spec(df: pd.DataFrame, id_col: str, detect_keywords, prefix_label: str,
+                      classe: str | None = None) -> tuple[dict, pd.DataFrame]:
+    """(mapping, matriz) de um bloco Likert descrito como em LIKERT_BLOCKS; matriz vazia se não houver colunas."""
+    index = column_index(df)
+    cols = list(block_columns(index, tuple(detect_keywords), classe))
+    if not cols:
+        return {}, pd.DataFrame()
+    mapping = likert_block_mapping(cols, prefix_label, column_schema(index).labels)
+    return mapping, likert_matrix(df, mapping, id_col)
+
+
+def likert_block(df: pd.DataFrame, id_col: str, key: str) -> tuple[dict, pd.DataFrame]:
+    """(mapping, matriz) do bloco Likert `key` de LIKERT_BLOCKS; matriz vazia se não houver colunas."""
+    block = LIKERT_BLOCKS[key]
+    return likert_block_spec(df, id_col, block["detect_keywords"], block["prefix_label"], block.get("classe"))
+
+
+@served
+def ingresso_index(df: pd.DataFrame) -> tuple[str, float | None] | None:
+    """(coluna, índice 0–100) da influência da IES no ingresso; None se a coluna não existe."""
+    col = kpi_column(df, "ingresso")
+    if not col:
+        return None
+    partial = attached_partial(df)
+    if partial is not None and partial.has("likert", col):
+        idx = partial.likert_index([col])[0]
+        return col, None if np.isnan(idx) else float(idx)
+    idx = index_from_codes(likert_codes(df, [col]))[0]
+    return col, None if np.isnan(idx) else float(idx)
+
+
+def _frase_key(phrases) -> list:
+    # chave no artefato: o id do grupo de FRASES (as frases se não for um deles)
+    for key, (_, known) in FRASES.items():
+        if list(phrases) == list(known):
+            return [key]
+    return [list(phrases)]
+
+
+@served(key=_frase_key)
+def frase_indices(df: pd.DataFrame, phrases) -> list[tuple[str, float]]:
+    """(coluna, índice 0–100 ou NaN) para cada frase encontrada, numa passada vetorizada."""
+    index = column_index(df)
+    found = [c for c in (index.find_first(p) for p in phrases) if c]
+    if not found:
+        return []
+    partial = attached_partial(df)
+    if partial is not None and all(partial.has("likert", c) for c in found):
+        return list(zip(found, partial.likert_index(found).tolist()))
+    return list(zip(found, index_from_codes(likert_codes(df, found)).tolist()))
+
+
+def _indices_with_interval(df: pd.DataFrame, cols) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # (índice, IC inferior, IC superior) por coluna; dos agregados anexados quando houver
+    cols = list(cols)
+    if not cols:
+        return np.empty(0), np.empty(0), np.empty(0)
+    partial = attached_partial(df)
+    if partial is not None and all(partial.has("likert", c) for c in cols):
+        idx, counts = partial.likert_index(cols), partial.likert_rows(cols)
+    else:
+        codes = likert_codes(df, cols)
+        idx, counts = index_from_codes(codes), level_counts(codes)
+    return (idx, *index_interval(counts))
+
+
+@served
+def likert_intervals(df: pd.DataFrame, cols) -> pd.DataFrame:
+    """Índice 0–100 e intervalo de confiança (bootstrap) das colunas Likert `cols`: Coluna, Indice, IC inferior, IC superior."""
+    cols = [c for c in cols if c in df.columns]
+    idx, low, high = _indices_with_interval(df, cols)
+    return pd.DataFrame({"Coluna": cols, "Indice": np.round(idx, 1),
+                         "IC inferior": np.round(low, 1), "IC superior": np.round(high, 1)})
+
+
+def _likert_items(df: pd.DataFrame) -> list[tuple[str, str, str]]:
+    # (bloco, pergunta, coluna) de cada item Likert: blocos, frases e ingresso
+    index = column_index(df)
+    schema = column_schema(index)
+    rows = []
+    for key, block in LIKERT_BLOCKS.items():
+        cols = block_columns(index, tuple(block["detect_keywords"]), block.get("classe"))
+        mapping = likert_block_mapping(cols, block["prefix_label"], schema.labels)
+        rows.extend((key, display, col) for display, col in mapping.items())
+    for key, (_, phrases) in FRASES.items():
+        for col in (index.find_first(p) for p in phrases):
+            if col:
+                rows.append((key, re.sub(r'^\W+|"', "", col).strip(), col))
+    ingresso = kpi_column(df, "ingresso")
+    if ingresso:
+        rows.append(("ingresso", "Influência da IES no ingresso", ingresso))
+    return rows
+
+
+@served
+def likert_item_indices(df: pd.DataFrame, id_col: str) -> pd.DataFrame:
+    """Índice 0–100 (e IC) de cada item Likert (blocos, frases e ingresso): Bloco, Pergunta, Indice, IC inferior, IC superior."""
+    rows = _likert_items(df)
+    idx, low, high = _indices_with_interval(df, [c for _, _, c in rows])
+    return pd.DataFrame({"Bloco": [r[0] for r in rows], "Pergunta": [r[1] for r in rows], "Indice": np.round(idx, 1),
+                         "IC inferior": np.round(low, 1), "IC superior": np.round(high, 1)})
+
+# -----------------------------------------------------------------------------
+# CORRELAÇÃO / CONFIABILIDADE (reliability.py)
+# -----------------------------------------------------------------------------
+RELIABILITY_ALL = "todos"
+
+
+def reliability_items(df: pd.DataFrame, key: str) -> dict:
+    """{rótulo: coluna} dos itens do bloco `key` de LIKERT_BLOCKS ou, com RELIABILITY_ALL, de todos os itens Likert."""
+    if key != RELIABILITY_ALL:
+        block = LIKERT_BLOCKS[key]
+        index = column_index(df)
+        cols = block_columns(index, tuple(block["detect_keywords"]), block.get("classe"))
+        return likert_block_mapping(cols, block["prefix_label"], column_schema(index).labels)
+    items, seen = {}, set()
+    for _, pergunta, col in _likert_items(df):
+        if col not in seen:  # rótulos dos blocos já vêm com o prefixo ("Alunos: ...")
+            seen.add(col)
+            items.setdefault(pergunta, col)
+    return items
+
+
+@served
+def likert_reliability(df: pd.DataFrame, key: str) -> dict | None:
+    """
+    Correlações entre itens, alfa de Cronbach e correlação item-total do bloco
+    `key` (LIKERT_BLOCKS ou RELIABILITY_ALL). None com menos de 2 itens ou sem
+    linhas (agregados não guardam pares de respostas).
+    {"resumo": dict, "itens": DataFrame, "correlacao": DataFrame itens × itens}
+    """
+    items = reliability_items(df, key)
+    if len(items) < 2 or not len(df):
+        return None
+    stats = item_stats(df, tuple(items.values()))
+    labels = list(items)
+    r_it, alpha_sem = item_total(stats.cov)
+    corr = stats.corr
+    off = corr[~np.eye(len(labels), dtype=bool)]
+    resumo = dict(
+        itens=len(labels),
+        alfa=round(cronbach_alpha(stats.cov), 3),
+        alfa_padronizado=round(standardized_alpha(corr), 3),
+        correlacao_media=round(float(np.nanmean(off)), 3) if np.isfinite(off).any() else float("nan"),
+        completos=stats.complete,
+    )
+    itens = pd.DataFrame({
+        "Item": labels,
+        "Respostas": np.diag(stats.pairs),
+        "Correlação item-total": np.round(r_it, 3),
+        "Alfa sem o item": np.round(alpha_sem, 3),
+    })
+    return dict(resumo=resumo, itens=itens, correlacao=pd.DataFrame(np.round(corr, 3), index=labels, columns=labels))
+
+
+@served
+def reliability_summary(df: pd.DataFrame) -> pd.DataFrame:
+    """Uma linha por bloco Likert (e todos os itens): Bloco, Itens, Linhas completas, Alfa, Alfa padronizado, Correlação média."""
+    rows = []
+    for key in [*LIKERT_BLOCKS, RELIABILITY_ALL]:
+        rel = likert_reliability(df, key)
+        if rel is not None:
+            r = rel["resumo"]
+            rows.append((key, r["itens"], r["completos"], r["alfa"], r["alfa_padronizado"], r["correlacao_media"]))
+    return pd.DataFrame(rows, columns=["Bloco", "Itens", "Linhas completas", "Alfa", "Alfa padronizado", "Correlação média"])
+
+# -----------------------------------------------------------------------------
+# CRUZAMENTOS POR DIMENSÃO (crosstab.py)
+# -----------------------------------------------------------------------------
+# dimensão -> rótulo do grupo nas tabelas; "faixa" = faixa etária de kpi_perfil
+CROSSTAB_DIMENSIONS = {
+    "curso": "Curso", "ies": "IES", "perfil": "Perfil", "faixa": "Faixa etária", "grau": "Grau",
+    "fundador": "Sócio/fundador",
+}
+# KPIs que a aba oferece: IES e curso (alta cardinalidade) entram só como dimensão
+CROSSTAB_KPIS = [k for k in KPI_COUNT_LABELS if k not in ("ies", "curso")]
+
+
+def dimension_groups(df: pd.DataFrame, dim: str):
+    """Função que monta (código do grupo por linha, grupos) da dimensão `dim`; None se a coluna não existe."""
+    if dim == "faixa":
+        idade = kpi_column(df, "idade")
+        return (lambda: derived_codes(df, faixa_etaria(df, idade))) if idade else None
+    col = kpi_column(df, dim)
+    return (lambda: column_codes(df, col)) if col else None
+
+
+@served
+def likert_crosstab(df: pd.DataFrame, id_col: str, dim: str, key: str, min_cell: int = MIN_CELL) -> pd.DataFrame | None:
+    """
+    Índice 0–100 e distribuição 1–5 (% dos respondentes válidos) de cada item
+    do bloco `key` (como em likert_reliability) × grupo da dimensão `dim`:
+    Pergunta, Grupo, Respondentes, Indice, um % por nível, Suprimido. Células com
+    menos de `min_cell` respondentes válidos ficam sem valores (Suprimido).
+    None sem a dimensão, sem itens ou sem linhas.
+    """
+    groups = dimension_groups(df, dim)
+    items = reliability_items(df, key)
+    if groups is None or not items or not len(df):
+        return None
+    ct = likert_crosstab_counts(df, id_col, dim, groups, tuple(items.values()))
+    k, g = ct.valid.shape
+    hidden = (ct.valid < min_cell).ravel()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct = (ct.counts / ct.valid[..., None] * 100).reshape(k * g, 5)
+    out = pd.DataFrame({
+        "Pergunta": np.repeat(list(items), g),
+        "Grupo": np.tile(ct.groups, k),
+        "Respondentes": ct.valid.ravel().astype(float),
+        "Indice": np.round(ct.index.ravel(), 1),
+        **{label: np.round(pct[:, j], 1) for j, label in enumerate(LIKERT_LABELS)},
+    })
+    out.loc[hidden, ["Respondentes", "Indice", *LIKERT_LABELS]] = np.nan
+    out["Suprimido"] = hidden
+    return out
+
+
+@served
+def kpi_crosstab(df: pd.DataFrame, id_col: str, dim: str, key: str, min_cell: int = MIN_CELL) -> pd.DataFrame | None:
+    """
+    Respondentes e % de cada valor da KPI categórica `key` (KPI_COUNT_LABELS)
+    dentro de cada grupo da dimensão `dim`: Grupo, <rótulo>, Respondentes, %,
+    Total do grupo, Suprimido. Grupos com menos de `min_cell` respondentes ficam
+    sem valores. None sem a dimensão, sem a KPI ou sem linhas.
+    """
+    groups = dimension_groups(df, dim)
+    label = KPI_COUNT_LABELS[key][0]
+    if key == "faixa":
+        col, values = "Faixa", dimension_groups(df, "faixa")
+    else:
+        col, values = kpi_column(df, key), None
+    if groups is None or col is None or (values is None and col not in df.columns) or not len(df):
+        return None
+    ct = value_crosstab_counts(df, id_col, dim, groups, col, values, multi=key in MULTI_SELECT_KEYS)
+    g, v = ct.counts.shape
+    hidden = np.repeat(ct.totals < min_cell, v)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct = ct.counts / ct.totals[:, None] * 100
+    out = pd.DataFrame({
+        "Grupo": np.repeat(ct.groups, v),
+        label: np.tile(np.asarray(ct.values, dtype=object), g),
+        "Respondentes": ct.counts.ravel().astype(float),
+        "%": np.round(pct.ravel(), 1),
+        "Total do grupo": np.repeat(ct.totals, v).astype(float),
+    })
+    out.loc[hidden, ["Respondentes", "%", "Total do grupo"]] = np.nan
+    out["Suprimido"] = hidden
+    return out
+
+# -----------------------------------------------------------------------------
+# AGREGAÇÕES (DistinctCount de todas as KPIs categóricas numa passada)
+# -----------------------------------------------------------------------------
+def kpi_column(df: pd.DataFrame, key: str):
+    # coluna da KPI segundo o registro (kpi_registry.COLUMN_SPECS)
+    return resolve_column(column_index(df), key)
+
+
+def faixa_etaria(df: pd.DataFrame, idade_col: str) -> pd.Series:
+    return pd.cut(pd.to_numeric(df[idade_col], errors="coerce"), **FAIXAS_IDADE)
+
+
+def kpi_count_tables(df: pd.DataFrame, id_col: str) -> dict:
+    """
+    { chave: (coluna, tabela valor -> respondentes distintos) } para todas as
+    KPIs categóricas, calculado numa única passada e cacheado pelo fingerprint.
+    A chave "faixa" traz as faixas de idade; as de MULTI_SELECT_KEYS contam
+    cada opção marcada (multiselect.option_table).
+    """
+    cols = {k: kpi_column(df, k) for k in COUNT_KEYS}
+    partial = attached_partial(df, id_col)
+    if partial is not None:
+        out = _partial_count_tables(df, partial, cols)
+        if out is not None:
+            return out
+    derived = {}
+    if cols["idade"]:
+        derived["Faixa"] = lambda: faixa_etaria(df, cols["idade"])
+    single = [c for k, c in cols.items() if k != "idade" and k not in MULTI_SELECT_KEYS]
+    tables = distinct_count_tables(df, id_col, single, derived)
+    out = {}
+    for k, c in cols.items():
+        if k in MULTI_SELECT_KEYS and c is not None and c in df.columns:
+            out[k] = (c, option_table(df, id_col, c))
+        elif k != "idade" and c in tables:
+            out[k] = (c, tables[c])
+    if "Faixa" in tables:
+        out["faixa"] = ("Faixa", tables["Faixa"])
+    return out
+
+
+def _partial_count_tables(df: pd.DataFrame, partial: Partial, cols: dict) -> dict | None:
+    # mesmas tabelas de kpi_count_tables, lidas dos agregados anexados; None se faltar alguma
+    out = {}
+    for k, c in cols.items():
+        if k == "idade" or c is None or c not in df.columns:
+            continue
+        kind = "opcoes" if k in MULTI_SELECT_KEYS else "valores"
+        if not partial.has(kind, c):
+            return None
+        out[k] = (c, partial.table(kind, c, partial.id_col))
+    if cols["idade"]:
+        if not partial.has("valores", "Faixa"):
+            return None
+        out["faixa"] = ("Faixa", partial.table("valores", "Faixa", partial.id_col))
+    return out
+
+
+def kpi_partial(df: pd.DataFrame, id_col: str, headers=None) -> Partial:
+    """
+    Agregados somáveis de `df` (contagens distintas das KPIs e somas Likert).
+    As colunas são resolvidas sobre `headers` (o esquema do conjunto inteiro),
+    para que todos os lotes agreguem as mesmas colunas.
+    """
+    index = column_index(list(headers) if headers is not None else df)
+    cols = {k: resolve_column(index, k) for k in COUNT_KEYS}
+    cols = {k: c for k, c in cols.items() if c is not None and c in df.columns}
+    derived = {}
+    if "idade" in cols:
+        derived["Faixa"] = lambda: faixa_etaria(df, cols["idade"])
+    single = [c for k, c in cols.items() if k != "idade" and k not in MULTI_SELECT_KEYS]
+    tables = distinct_count_tables(df, id_col, single, derived)
+    multi = [c for k, c in cols.items() if k in MULTI_SELECT_KEYS]
+    lik = [c for c in likert_columns(index.columns) if c in df.columns]
+    codes = likert_codes(df, lik)
+    resp, n_resp = respondent_codes(df, id_col)
+    counts, totals = distinct_level_counts(codes, resp, n_resp)
+    sums = INDEX_LUT[codes].sum(axis=0)
+    valid = (codes != NA_CODE).sum(axis=0)
+    rows = level_counts(codes)
+    likert = {c: np.concatenate([counts[j], [totals[j], sums[j], valid[j]], rows[j]]).astype(np.float64)
+              for j, c in enumerate(lik)}
+    colunas = set(df.columns) | ({"Faixa"} if "idade" in cols else set())
+    ages = pd.to_numeric(df[cols["idade"]], errors="coerce") if "idade" in cols else pd.Series(dtype=float)
+    fundador = cols.get("fundador")
+    escalares = dict(
+        idade_soma=float(ages.sum()), idade_n=int(ages.count()),
+        fundadores=respondents_containing(df, id_col, fundador, "sim") if fundador else 0,
+    )
+    return Partial(
+        id_col, len(df), n_resp, colunas,
+        valores={name: counts_from_table(t, name, id_col) for name, t in tables.items()},
+        opcoes={c: counts_from_table(option_table(df, id_col, c), c, id_col) for c in multi},
+        likert=likert,
+        ordenadas=[name for name in tables if name == "Faixa" or isinstance(df[name].dtype, pd.CategoricalDtype)],
+        escalares=escalares,
+    )
+
+
+@served
+def kpi_counts(df: pd.DataFrame, id_col: str, key: str, label: str, of_total: bool = False) -> pd.DataFrame | None:
+    # % sobre a soma das contagens ou sobre o total de respondentes distintos
+    hit = kpi_count_tables(df, id_col).get(key)
+    if hit is None:
+        return None
+    col, table = hit
+    return counts_table(table, col, id_col, label, total=n_respondents(df, id_col) if of_total else None)
+
+
+def _respondents_in_tail(df: pd.DataFrame, id_col: str, key: str, values) -> int | None:
+    # respondentes distintos em alguma categoria de `values`; None sem linhas (agregados/artefato)
+    if not isinstance(df, (pd.DataFrame, RowSubset)) or not len(df) or key == "faixa":
+        return None
+    col = kpi_column(df, key)
+    if key in MULTI_SELECT_KEYS:
+        return respondents_with_options(df, id_col, col, values)
+    return respondents_in(df, id_col, col, values)
+
+
+def kpi_counts_top(df: pd.DataFrame, id_col: str, key: str, label: str, of_total: bool = False,
+                   n: int = TOP_N) -> tuple[pd.DataFrame, pd.DataFrame] | None:
+    """
+    (gráfico, cauda) da KPI `key`: as `n` categorias com mais respondentes e uma
+    linha "Outros (k)" com as k restantes, que vão na cauda (vazia quando tudo
+    cabe; aí o gráfico é a própria tabela de kpi_counts). Com `of_total`,
+    "Outros" conta respondentes distintos em qualquer categoria da cauda (dos
+    agregados: a soma, limitada ao total); senão, a soma das contagens.
+    """
+    counts = kpi_counts(df, id_col, key, label, of_total)
+    if counts is None or len(counts) <= n + 1:  # "Outros" com uma categoria só não agrupa nada
+        return None if counts is None else (counts, counts.iloc[0:0])
+    ranked = counts.sort_values("Respondentes", ascending=False, kind="stable")
+    head, tail = ranked.iloc[:n], ranked.iloc[n:].reset_index(drop=True)
+    others = int(tail["Respondentes"].sum())
+    if of_total:
+        total = base_metrics(df, id_col)["total"]
+        exact = _respondents_in_tail(df, id_col, key, tail[label].tolist())
+        others = min(others, total) if exact is None else exact
+        pct = round(others / total * 100, 1) if total else 0.0
+    else:
+        pct = round(float(tail["%"].sum()), 1)
+    row = pd.DataFrame({label: [f"{OTHERS_LABEL} ({len(tail):,})"], "Respondentes": [others], "%": [pct]})
+    return pd.concat([head, row], ignore_index=True), tail
+
+
+@served
+def kpi_cooccurrence(df: pd.DataFrame, id_col: str, key: str, percent: bool = False) -> pd.DataFrame | None:
+    """Coocorrência das opções da KPI de múltipla escolha `key`; None sem a coluna ou com menos de 2 opções."""
+    hit = kpi_count_tables(df, id_col).get(key)
+    if hit is None or len(hit[1]) < 2 or len(df) == 0:
+        return None  # sem linhas (só agregados): não há pares de opções por respondente
+    return cooccurrence_table(df, id_col, hit[0], percent=percent)
+
+
+@served
+@probed("kpi:base", "kpi")
+def base_metrics(df: pd.DataFrame, id_col: str) -> dict:
+    """Cartões da seção Base; None quando a coluna não existe ou não tem dados."""
+    total = n_respondents(df, id_col)
+    out = dict(total=total, idade_media=None, ies_unicas=None, fundadores=None, fundadores_pct=None)
+    partial = attached_partial(df, id_col)
+    escalares = partial.escalares if partial is not None else {}
+    idade_col = kpi_column(df, "idade")
+    if idade_col is not None:
+        if "idade_n" in escalares:
+            if escalares["idade_n"]:
+                out["idade_media"] = escalares["idade_soma"] / escalares["idade_n"]
+        else:
+            ages = pd.to_numeric(df[idade_col], errors="coerce")
+            if ages.notna().any():
+                out["idade_media"] = float(ages.mean())
+    tables = kpi_count_tables(df, id_col)
+    if "ies" in tables:
+        out["ies_unicas"] = int((tables["ies"][1][id_col] > 0).sum())
+    if "fundador" in tables:
+        if "fundadores" in escalares:
+            fund = escalares["fundadores"]
+        else:
+            fund = respondents_containing(df, id_col, tables["fundador"][0], "sim")
+        out["fundadores"] = int(fund)
+        out["fundadores_pct"] = (fund / total * 100) if total else 0
+    return out
+
+# -----------------------------------------------------------------------------
+# RELATÓRIO COMPLETO
+# -----------------------------------------------------------------------------
+@served
+@probed("kpi:tabelas", "kpi")
+def kpi_export_sheets(df: pd.DataFrame, id_col: str) -> dict:
+    """{ nome da aba: tabela } com todas as contagens e matrizes Likert das KPIs."""
+    sheets = {}
+    for key in kpi_count_tables(df, id_col):
+        label, of_total = KPI_COUNT_LABELS.get(key, ("Resposta", True))
+        sheets[key] = kpi_counts(df, id_col, key, label, of_total=of_total)
+    for key in MULTI_SELECT_KEYS:
+        co = kpi_cooccurrence(df, id_col, key)
+        if co is not None:
+            sheets[f"coocorrencia_{key}"] = co.rename_axis("Opção").reset_index()
+    for key in LIKERT_BLOCKS:
+        _, matrix = likert_block(df, id_col, key)
+        if not matrix.empty:
+            sheets[f"likert_{key}"] = matrix
+    rows = []
+    for key, (_, phrases) in FRASES.items():
+        for col, idx in frase_indices(df, phrases):
+            rows.append(dict(Bloco=key, Pergunta=col, Indice=None if np.isnan(idx) else round(idx, 1)))
+    hit = ingresso_index(df)
+    if hit is not None:
+        ingresso, idx = hit
+        rows.append(dict(Bloco="ingresso", Pergunta=ingresso, Indice=None if idx is None else round(idx, 1)))
+    if rows:
+        ci = likert_intervals(df, tuple(r["Pergunta"] for r in rows))
+        sheets["indices_likert"] = pd.DataFrame(rows).assign(**{
+            "IC inferior": ci["IC inferior"].to_numpy(), "IC superior": ci["IC superior"].to_numpy(),
+        })
+    return sheets
+
+
+def compute_report(df: pd.DataFrame, id_col: str) -> dict:
+    """Todas as KPIs do dashboard: {"base": cartões, "tabelas": {nome: DataFrame}}."""
+    return dict(base=base_metrics(df, id_col), tabelas=kpi_export_sheets(df, id_col))
+
+
+def bundle_catalog(df: pd.DataFrame, id_col: str):
+    """Todas as chamadas que as seções do dashboard fazem (gravadas no artefato de agregados)."""
+    base_metrics(df, id_col)
+    for key, (label, of_total) in KPI_COUNT_LABELS.items():
+        kpi_counts(df, id_col, key, label, of_total)
+    for block in LIKERT_BLOCKS.values():
+        mapping, _ = likert_block_spec(df, id_col, block["detect_keywords"], block["prefix_label"], block.get("classe"))
+        likert_intervals(df, tuple(mapping.values()))
+    for _, phrases in FRASES.values():
+        found = frase_indices(df, tuple(phrases))
+        likert_intervals(df, tuple(c for c, _ in found))
+    hit = ingresso_index(df)
+    if hit is not None:
+        likert_intervals(df, (hit[0],))
+    likert_item_indices(df, id_col)
+    for key in [*LIKERT_BLOCKS, RELIABILITY_ALL]:
+        likert_reliability(df, key)
+    reliability_summary(df)
+    for dim in CROSSTAB_DIMENSIONS:
+        for key in [*LIKERT_BLOCKS, RELIABILITY_ALL]:
+            likert_crosstab(df, id_col, dim, key)
+        for key in CROSSTAB_KPIS:
+            if key != dim:  # a aba não cruza a dimensão com ela mesma
+                kpi_crosstab(df, id_col, dim, key)
+    for key in MULTI_SELECT_KEYS:
+        kpi_cooccurrence(df, id_col, key, True)
+    kpi_export_sheets(df, id_col)
@@ -0,0 +1,149 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from column_index import normalize_text
+from memo import BoundedCache, dataset_fingerprint, series_fingerprint, subset_parent
+from perf import probed
+
+# -----------------------------------------------------------------------------
+# LIKERT (regras)
+# -----------------------------------------------------------------------------
+LIKERT_LABELS = ["1 Muito ruim", "2 Ruim", "3 Razoável", "4 Boa", "5 Excelente"]
+LIKERT_NEUTROS = {"Não observado", "Nao observado", "Não se aplica", "Nao se aplica", "NA", "N/A", ""}
+LIKERT_TO_1_5 = {
+    "1": 1, "muitoruim": 1, "muito ruim": 1,
+    "2": 2, "ruim": 2,
+    "3": 3, "razoavel": 3, "razoável": 3,
+    "4": 4, "boa": 4,
+    "5": 5, "excelente": 5,
+}
+LIKERT_TO_INDEX = {1: 20, 2: 40, 3: 60, 4: 80, 5: 100}
+
+# código 0 = ausente/neutro; 1..5 = escala
+NA_CODE = 0
+INDEX_LUT = np.array([0] + [LIKERT_TO_INDEX[k] for k in range(1, 6)], dtype=np.float64)
+
+_NEUTROS_NORM = frozenset(normalize_text(x) for x in LIKERT_NEUTROS)
+_LEADING_DIGIT = re.compile(r"^\s*([1-5])")
+
+_CODES = BoundedCache(max_entries=512, name="likert_codigos")
+
+
+def parse_likert_value(v) -> int | None:
+    if v is None or (not isinstance(v, str) and pd.isna(v)):
+        return None
+    s = normalize_text(str(v))
+    if s in _NEUTROS_NORM:
+        return None
+    # Formatos: "4 - Boa", "4 Boa", "Boa", "4"
+    m = _LEADING_DIGIT.match(s)
+    if m:
+        return int(m.group(1))
+    return LIKERT_TO_1_5.get(s)
+
+
+@probed("likert:codificar", "likert")
+def encode_series(series: pd.Series) -> np.ndarray:
+    """Codifica a coluna em int8 (0..5) avaliando cada valor distinto uma única vez."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # categóricas (modo compacto): tabela por categoria, sem refatorar a coluna
+        return category_levels(series.dtype)[series.cat.codes.to_numpy()]
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    # última posição da tabela atende o sentinela -1 (NaN)
+    lut = np.zeros(len(uniques) + 1, dtype=np.int8)
+    for i, u in enumerate(uniques):
+        lut[i] = parse_likert_value(u) or NA_CODE
+    return lut[codes]
+
+
+def category_levels(dtype: pd.CategoricalDtype) -> np.ndarray:
+    """Nível 0..5 (int8) de cada categoria; a última posição atende o código -1 (NaN)."""
+    lut = np.zeros(len(dtype.categories) + 1, dtype=np.int8)
+    for i, u in enumerate(dtype.categories):
+        lut[i] = parse_likert_value(u) or NA_CODE
+    return lut
+
+
+def encode_column(df: pd.DataFrame, col) -> np.ndarray:
+    key = (dataset_fingerprint(df), col)
+    def build():
+        parent = subset_parent(df)
+        if parent is not None:
+            return encode_column(parent[0], col)[parent[1]]
+        return encode_series(df[col])
+    return _CODES.get_or_compute(key, build)
+
+
+def likert_categorical(series: pd.Series) -> pd.Categorical | None:
+    """
+    Categórica com códigos int8 e os valores originais como categorias (a
+    exibição e as exportações mostram a resposta como veio da planilha),
+    ordenadas pelo nível 1..5 e, depois, neutros/valores fora da escala.
+    O nível de cada categoria sai de `category_levels`. None se não couber em int8.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    if len(uniques) > np.iinfo(np.int8).max:
+        return None
+    levels = [parse_likert_value(u) or NA_CODE for u in uniques]
+    order = sorted(range(len(uniques)), key=lambda i: (levels[i] or 6, i))
+    pos = np.empty(len(uniques) + 1, dtype=np.int8)
+    pos[order] = np.arange(len(uniques))
+    pos[-1] = -1
+    return pd.Categorical.from_codes(pos[codes], categories=pd.Index(uniques, dtype=object)[order])
+
+
+def likert_codes(df: pd.DataFrame, cols) -> np.ndarray:
+    """Matriz int8 (linhas × colunas Likert); cada coluna é codificada uma vez por dataset."""
+    cols = list(cols)
+    out = np.zeros((len(df), len(cols)), dtype=np.int8)
+    for j, c in enumerate(cols):
+        out[:, j] = encode_column(df, c)
+    return out
+
+
+def series_codes(series: pd.Series) -> np.ndarray:
+    key = ("series", series_fingerprint(series))
+    return _CODES.get_or_compute(key, lambda: encode_series(series))
+
+
+# -----------------------------------------------------------------------------
+# REDUÇÕES
+# -----------------------------------------------------------------------------
+def index_from_codes(codes: np.ndarray) -> np.ndarray:
+    """Índice 0–100 por coluna (NaN quando não há respostas válidas)."""
+    codes = codes.reshape(len(codes), -1)
+    valid = (codes != NA_CODE).sum(axis=0)
+    total = INDEX_LUT[codes].sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(valid > 0, total / np.maximum(valid, 1), np.nan)
+
+
+def level_counts(codes: np.ndarray) -> np.ndarray:
+    """Linhas por (coluna, nível 1..5), sem os neutros/ausentes."""
+    n, k = codes.reshape(len(codes), -1).shape
+    flat = (codes.reshape(n, k).astype(np.int64) + 6 * np.arange(k, dtype=np.int64)).ravel()
+    return np.bincount(flat, minlength=6 * k).reshape(k, 6)[:, 1:]
+
+
+def distinct_level_counts(codes: np.ndarray, resp: np.ndarray, n_resp: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Contagem de respondentes distintos por (coluna, nível 1..5) e total de
+    respondentes distintos com resposta válida por coluna.
+    """
+    n, k = codes.shape
+    if n_resp == n:
+        # um registro por respondente: contagem direta
+        flat = (codes.astype(np.int64) + 6 * np.arange(k, dtype=np.int64)).ravel()
+        counts = np.bincount(flat, minlength=6 * k).reshape(k, 6)[:, 1:]
+        return counts, counts.sum(axis=1)
+    col = np.broadcast_to(np.arange(k, dtype=np.int64), (n, k))
+    r = np.broadcast_to(resp.astype(np.int64)[:, None], (n, k))
+    # ID ausente (-1) não conta, como no groupby().nunique()
+    valid = (codes != NA_CODE) & (r >= 0)
+    lvl = codes[valid].astype(np.int64)
+    keys = np.unique((col[valid] * n_resp + r[valid]) * 6 + lvl)
+    counts = np.bincount((keys // 6 // n_resp) * 5 + (keys % 6 - 1), minlength=k * 5).reshape(k, 5)
+    totals = np.bincount(np.unique(keys // 6) // n_resp, minlength=k)
+    return counts, totals
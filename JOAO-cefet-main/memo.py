@@ -0,0 +1,272 @@
+import hashlib
+import weakref
+from collections import OrderedDict
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------------------------
+# MEMOIZAÇÃO (impressão digital do dataset + cache LRU limitado)
+# -----------------------------------------------------------------------------
+_REGISTRY: "weakref.WeakSet[BoundedCache]" = weakref.WeakSet()
+
+
+class BoundedCache:
+    """Dicionário LRU thread-safe com número máximo de entradas."""
+
+    def __init__(self, max_entries: int = 64, name: str | None = None):
+        self.max_entries = max_entries
+        self.name = name
+        self._data: OrderedDict = OrderedDict()
+        self._lock = Lock()
+        self.hits = self.misses = 0
+        _REGISTRY.add(self)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        return value
+
+    def get_or_compute(self, key, fn):
+        hit = self.get(key, _MISSING)
+        if hit is not _MISSING:
+            return hit
+        return self.put(key, fn())
+
+    def discard_if(self, predicate) -> int:
+        with self._lock:
+            stale = [k for k in self._data if predicate(k)]
+            for k in stale:
+                del self._data[k]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_MISSING = object()
+_RESP = BoundedCache(max_entries=32, name="respondentes")
+_SUBSET_SEP = "/"
+
+# id(objeto) -> (weakref, fingerprint, shape, colunas). Fica fora de `df.attrs`
+# porque o pandas copia attrs para todo quadro derivado (sort_values, assign,
+# rename...), que herdaria o fingerprint do pai com o mesmo shape.
+_FINGERPRINTS: dict[int, tuple] = {}
+
+
+def forget_dataset(fp: str) -> int:
+    """
+    Remove de todos os caches as entradas derivadas do dataset `fp` (chave[0] == fp)
+    e dos recortes dele (chave[0] == "fp/...").
+    """
+    prefix = fp + _SUBSET_SEP
+    def derived(key):
+        return isinstance(key, tuple) and bool(key) and (
+            key[0] == fp or (isinstance(key[0], str) and key[0].startswith(prefix)))
+    return sum(cache.discard_if(derived) for cache in list(_REGISTRY))
+
+
+def cache_stats() -> list[dict]:
+    """Entradas e taxa de acerto de cada BoundedCache com nome."""
+    rows = []
+    for cache in list(_REGISTRY):
+        if cache.name is None:
+            continue
+        total = cache.hits + cache.misses
+        rows.append(dict(cache=cache.name, entradas=len(cache), hits=cache.hits, misses=cache.misses,
+                         hit_rate=round(cache.hits / total * 100, 1) if total else 0.0))
+    return sorted(rows, key=lambda r: r["cache"])
+
+
+def clear_caches():
+    """Esvazia todos os BoundedCache do processo (benchmarks a frio)."""
+    for cache in list(_REGISTRY):
+        cache.clear()
+
+
+def _blocks(df) -> tuple:
+    # arrays dos blocos do pandas: df[c] = ... troca o array da coluna
+    mgr = getattr(df, "_mgr", None)
+    return tuple(weakref.ref(b.values) for b in mgr.blocks) if mgr is not None else ()
+
+
+def _same_blocks(refs: tuple, df) -> bool:
+    mgr = getattr(df, "_mgr", None)
+    current = [b.values for b in mgr.blocks] if mgr is not None else []
+    return len(refs) == len(current) and all(r() is v for r, v in zip(refs, current))
+
+
+def _layout(df) -> tuple:
+    return df.shape, getattr(df, "columns", None), _blocks(df)
+
+
+def set_fingerprint(df: pd.DataFrame, fp: str) -> pd.DataFrame:
+    """
+    Associa `fp` a este objeto (não às cópias nem aos quadros derivados dele).
+    Colunas incluídas, removidas, renomeadas ou substituídas (df[c] = ...)
+    invalidam sozinhas; valores editados no mesmo array (df.loc/iloc/at[...] = ...)
+    não são percebidos: chame `forget_fingerprint(df)` depois de editá-los.
+    """
+    key = id(df)
+
+    def drop(ref, key=key):
+        entry = _FINGERPRINTS.get(key)
+        if entry is not None and entry[0] is ref:
+            del _FINGERPRINTS[key]
+
+    _FINGERPRINTS[key] = (weakref.ref(df, drop), fp, *_layout(df))
+    return df
+
+
+def stored_fingerprint(df: pd.DataFrame) -> str | None:
+    """Fingerprint já associado a `df`, sem calcular o hash (None se não houver)."""
+    entry = _FINGERPRINTS.get(id(df))
+    if entry is None or entry[0]() is not df:
+        return None
+    # colunas trocadas in-place (df[c] = ..., rename(inplace=True)) invalidam
+    if entry[2] != df.shape or entry[3] is not getattr(df, "columns", None) or not _same_blocks(entry[4], df):
+        return None
+    return entry[1]
+
+
+def forget_fingerprint(df: pd.DataFrame):
+    """Descarta o fingerprint de `df` (o próximo `dataset_fingerprint` refaz o hash)."""
+    entry = _FINGERPRINTS.get(id(df))
+    if entry is not None and entry[0]() is df:
+        del _FINGERPRINTS[id(df)]
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """Hash do conteúdo do DataFrame, calculado uma vez por objeto."""
+    fp = stored_fingerprint(df)
+    if fp is not None:
+        return fp
+    h = hashlib.sha1()
+    h.update("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    fp = h.hexdigest()
+    set_fingerprint(df, fp)
+    return fp
+
+
+def series_fingerprint(s: pd.Series) -> str:
+    return hashlib.sha1(pd.util.hash_pandas_object(s, index=False).values.tobytes()).hexdigest()
+
+
+# -----------------------------------------------------------------------------
+# RECORTES (subconjunto de linhas que reaproveita o que já foi calculado no pai)
+# -----------------------------------------------------------------------------
+class RowSubset:
+    """
+    Linhas `rows` (posições) de um DataFrame, sem copiar o quadro. Imita o
+    mínimo de um DataFrame que as KPIs e o app usam (`columns`, `shape`, `len`,
+    `df[col]`, `head`, `iloc[a:b]`); as agregações leem os códigos do pai
+    indexados por `rows` (ver `subset_parent`). Uma coluna pedida com `df[col]`
+    é montada na hora e não fica guardada.
+    """
+
+    def __init__(self, parent: pd.DataFrame, rows: np.ndarray):
+        self.parent = parent
+        self.rows = rows
+
+    @property
+    def columns(self) -> pd.Index:
+        return self.parent.columns
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.rows), self.parent.shape[1]
+
+    @property
+    def index(self) -> pd.Index:
+        return self.parent.index[self.rows]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.parent.columns)
+
+    def __contains__(self, col) -> bool:
+        return col in self.parent.columns
+
+    def __getitem__(self, col) -> pd.Series:
+        return self.parent[col].take(self.rows)
+
+    def take(self, positions) -> pd.DataFrame:
+        return self.parent.take(self.rows[positions])
+
+    def head(self, n: int = 5) -> pd.DataFrame:
+        return self.take(slice(0, n))
+
+    @property
+    def iloc(self):
+        # só fatias de linhas (exportação em blocos)
+        return _RowSlicer(self)
+
+    def frame(self) -> pd.DataFrame:
+        """Cópia materializada do recorte (exportação/pré-visualização inteira)."""
+        return self.parent.take(self.rows)
+
+
+class _RowSlicer:
+    def __init__(self, subset: RowSubset):
+        self.subset = subset
+
+    def __getitem__(self, key: slice) -> pd.DataFrame:
+        return self.subset.take(key)
+
+
+def subset_rows(df: pd.DataFrame, rows: np.ndarray, tag: str) -> RowSubset:
+    """
+    Linhas `rows` de `df` como RowSubset, com fingerprint derivado "fp/tag"
+    (sem re-hash do conteúdo). Os códigos por coluna do recorte saem dos
+    códigos do pai indexados por `rows` (ver `subset_parent`).
+    """
+    fp = f"{dataset_fingerprint(df)}{_SUBSET_SEP}{tag}"
+    rows = np.asarray(rows, dtype=np.int64)
+    if isinstance(df, RowSubset):
+        df, rows = df.parent, df.rows[rows]  # recorte de recorte: sempre sobre o quadro
+    return set_fingerprint(RowSubset(df, rows), fp)
+
+
+def subset_parent(df) -> tuple[pd.DataFrame, np.ndarray] | None:
+    """(DataFrame pai, linhas) se `df` é um RowSubset; senão None."""
+    if isinstance(df, RowSubset):
+        return df.parent, df.rows
+    return None
+
+
+def respondent_codes(df: pd.DataFrame, id_col) -> tuple[np.ndarray, int]:
+    """ID do respondente fatorado (-1 = ausente) e número de IDs distintos."""
+    def build():
+        parent = subset_parent(df)
+        if parent is not None:
+            # reaproveita a fatoração do pai e renumera só os IDs presentes
+            codes, n = respondent_codes(parent[0], id_col)
+            codes = codes[parent[1]]
+            present = np.zeros(n + 1, dtype=bool)
+            present[codes] = True  # -1 cai na última posição
+            present[n] = False
+            remap = np.append(np.cumsum(present[:n]) - 1, -1)
+            return remap[codes].astype(codes.dtype, copy=False), int(present.sum())
+        codes, uniques = pd.factorize(df[id_col], use_na_sentinel=True)
+        return codes, len(uniques)
+    return _RESP.get_or_compute((dataset_fingerprint(df), id_col), build)
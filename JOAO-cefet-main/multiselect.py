@@ -0,0 +1,110 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from aggregation import column_codes
+from kpi_registry import MULTI_SELECT_SEP
+from memo import BoundedCache, dataset_fingerprint, respondent_codes
+from perf import probed
+
+# -----------------------------------------------------------------------------
+# MÚLTIPLA ESCOLHA (matriz esparsa respondente × opção)
+# -----------------------------------------------------------------------------
+# Cada resposta distinta ("Bolsa;Amigos") é quebrada uma única vez; as linhas
+# só carregam o código da resposta. A matriz guarda os pares (respondente,
+# opção) distintos, então contagens e coocorrências saem de somas vetorizadas.
+_MATRICES = BoundedCache(max_entries=64, name="multiescolha")
+_MAX_BITMASK_OPTIONS = 52  # opções por respondente cabem num float64 exato
+
+
+class OptionMatrix(NamedTuple):
+    options: list[str]
+    resp: np.ndarray  # respondente de cada par (código de memo.respondent_codes)
+    opt: np.ndarray   # opção de cada par
+    n_resp: int
+
+    def counts(self) -> np.ndarray:
+        """Respondentes distintos por opção."""
+        return np.bincount(self.opt, minlength=len(self.options))
+
+    def cooccurrence(self) -> np.ndarray:
+        """Matriz opção × opção de respondentes que marcaram as duas (diagonal = contagens)."""
+        k = len(self.options)
+        if k == 0:
+            return np.zeros((0, 0), dtype=np.int64)
+        if k <= _MAX_BITMASK_OPTIONS:
+            # conjunto de opções de cada respondente como máscara de bits;
+            # a matriz sai dos perfis distintos (poucos), não das linhas
+            mask = np.bincount(self.resp, weights=np.exp2(self.opt), minlength=self.n_resp)
+            profiles, weight = np.unique(mask[mask > 0].astype(np.int64), return_counts=True)
+            bits = ((profiles[:, None] >> np.arange(k)) & 1).astype(np.int64)
+            return bits.T @ (bits * weight[:, None])
+        out = np.zeros((k, k), dtype=np.int64)
+        for j in range(k):
+            chosen = np.unique(self.resp[self.opt == j])
+            out[j] = np.bincount(self.opt[np.isin(self.resp, chosen)], minlength=k)
+        return out
+
+
+def split_options(value, sep: str = MULTI_SELECT_SEP) -> list[str]:
+    """Opções de uma resposta, sem espaços nas pontas, vazias ou repetidas."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return []
+    return list(dict.fromkeys(p.strip() for p in str(value).split(sep) if p.strip()))
+
+
+@probed("multiescolha:matriz", "agregacao")
+def _build_matrix(df: pd.DataFrame, id_col, col) -> OptionMatrix:
+    codes, uniques = column_codes(df, col)
+    parts = [split_options(u) for u in uniques]
+    options = sorted({p for ps in parts for p in ps})
+    pos = {o: i for i, o in enumerate(options)}
+    # resposta distinta -> opções (CSR: ptr/ind)
+    ind = np.array([pos[p] for ps in parts for p in ps], dtype=np.int64)
+    ptr = np.zeros(len(parts) + 1, dtype=np.int64)
+    np.cumsum([len(ps) for ps in parts], out=ptr[1:])
+
+    resp, n_resp = respondent_codes(df, id_col)
+    ok = (codes >= 0) & (resp >= 0)
+    # pares (respondente, resposta) distintos antes de expandir as opções
+    pair = np.unique(resp[ok].astype(np.int64) * max(len(uniques), 1) + codes[ok])
+    r, c = pair // max(len(uniques), 1), pair % max(len(uniques), 1)
+    width = ptr[c + 1] - ptr[c]
+    r = np.repeat(r, width)
+    o = ind[np.repeat(ptr[c], width) + (np.arange(width.sum()) - np.repeat(np.cumsum(width) - width, width))]
+    # mesma opção vinda de respostas diferentes do mesmo respondente conta uma vez
+    keys = np.unique(r * max(len(options), 1) + o)
+    return OptionMatrix(options, keys // max(len(options), 1), keys % max(len(options), 1), n_resp)
+
+
+def option_matrix(df: pd.DataFrame, id_col, col) -> OptionMatrix:
+    """Matriz esparsa da coluna de múltipla escolha `col`, cacheada com o dataset."""
+    key = (dataset_fingerprint(df), id_col, col)
+    return _MATRICES.get_or_compute(key, lambda: _build_matrix(df, id_col, col))
+
+
+def option_table(df: pd.DataFrame, id_col, col) -> pd.DataFrame:
+    """Tabela opção -> respondentes distintos, no formato de `distinct_count_tables`."""
+    m = option_matrix(df, id_col, col)
+    return pd.DataFrame({col: m.options, id_col: m.counts().astype(int)})
+
+
+def respondents_with_options(df: pd.DataFrame, id_col, col, options) -> int:
+    """Respondentes distintos que marcaram ao menos uma das `options`."""
+    m = option_matrix(df, id_col, col)
+    chosen = np.flatnonzero(pd.Index(m.options).isin(list(options)))
+    return int(np.unique(m.resp[np.isin(m.opt, chosen)]).size)
+
+
+def cooccurrence_table(df: pd.DataFrame, id_col, col, percent: bool = False) -> pd.DataFrame:
+    """
+    Opção × opção. `percent=True`: % dos respondentes da linha que também
+    marcaram a coluna (diagonal = 100).
+    """
+    m = option_matrix(df, id_col, col)
+    co = m.cooccurrence()
+    if percent:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            co = np.round(co / np.diag(co)[:, None] * 100, 1)
+    return pd.DataFrame(co, index=m.options, columns=m.options)
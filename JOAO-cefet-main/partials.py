@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+
+from memo import BoundedCache, dataset_fingerprint
+
+# -----------------------------------------------------------------------------
+# AGREGADOS PARCIAIS (somáveis entre lotes com respondentes disjuntos)
+# -----------------------------------------------------------------------------
+# Com respondentes disjuntos entre lotes (ondas deduplicadas pelo ID), contagens
+# distintas por valor/opção e as somas Likert do conjunto são a soma das de cada
+# lote. Um DataFrame montado a partir dos lotes pode trazer o Partial somado
+# (attach_partial); as KPIs o usam em vez de reagregar as linhas.
+KINDS = ("valores", "opcoes", "likert")
+# escalares somáveis dos cartões da Base (idade_soma, idade_n, fundadores)
+ESCALARES = ("idade_soma", "idade_n", "fundadores")
+# likert: [n1, n2, n3, n4, n5, respondentes válidos, soma do índice, linhas válidas,
+#          l1, l2, l3, l4, l5] (n = respondentes distintos, l = linhas por nível)
+_LIKERT_WIDTH = 13
+
+_ATTACHED = BoundedCache(max_entries=16, name="parciais")
+
+
+class Partial:
+    """
+    Contagens distintas por valor (`valores`) e por opção de múltipla escolha
+    (`opcoes`), somas Likert por coluna e total de respondentes. `colunas` são
+    as colunas presentes nos dados; uma coluna presente num lote e não agregada
+    nele fica em `incompletas` e não é servida. `escalares` (ESCALARES) só
+    sobrevivem à soma quando os dois lados os têm.
+    """
+
+    def __init__(self, id_col, linhas: int = 0, respondentes: int = 0, colunas=(),
+                 valores: dict | None = None, opcoes: dict | None = None, likert: dict | None = None,
+                 ordenadas=(), incompletas: dict | None = None, escalares: dict | None = None):
+        self.id_col = id_col
+        self.linhas = int(linhas)
+        self.respondentes = int(respondentes)
+        self.colunas = frozenset(colunas)
+        self.valores = valores or {}      # coluna -> {valor: respondentes} (ordem da tabela)
+        self.opcoes = opcoes or {}        # coluna -> {opção: respondentes}
+        self.likert = likert or {}        # coluna -> np.ndarray(_LIKERT_WIDTH)
+        self.ordenadas = frozenset(ordenadas)  # categóricas: ordem das categorias, não alfabética
+        self.incompletas = {k: frozenset((incompletas or {}).get(k, ())) for k in KINDS}
+        self.escalares = escalares or {}
+        self._tables: dict = {}
+
+    def _agg(self, kind: str) -> dict:
+        return getattr(self, kind)
+
+    def has(self, kind: str, col) -> bool:
+        """`col` foi agregada em todos os lotes que a tinham."""
+        return col in self._agg(kind) and col not in self.incompletas[kind]
+
+    def merge(self, other: "Partial") -> "Partial":
+        """Soma de dois Partials (respondentes disjuntos)."""
+        if self.id_col != other.id_col:
+            raise ValueError(f"ID diferente: {self.id_col!r} × {other.id_col!r}")
+        incompletas = {}
+        for kind in KINDS:
+            a, b = self._agg(kind), other._agg(kind)
+            incompletas[kind] = (
+                self.incompletas[kind] | other.incompletas[kind]
+                | ((self.colunas - a.keys()) & b.keys()) | ((other.colunas - b.keys()) & a.keys())
+            )
+        ordenadas = self.ordenadas | other.ordenadas
+        return Partial(
+            self.id_col, self.linhas + other.linhas, self.respondentes + other.respondentes,
+            self.colunas | other.colunas,
+            valores=_merge_counts(self.valores, other.valores, ordenadas),
+            opcoes=_merge_counts(self.opcoes, other.opcoes, ordenadas),
+            likert={c: self.likert.get(c, 0) + other.likert.get(c, 0) for c in self.likert.keys() | other.likert.keys()},
+            ordenadas=ordenadas, incompletas=incompletas,
+            escalares={k: self.escalares[k] + other.escalares[k] for k in self.escalares.keys() & other.escalares.keys()},
+        )
+
+    # -- consultas no formato dos motores de agregação --------------------------
+    def table(self, kind: str, col, id_col) -> pd.DataFrame:
+        """Tabela `valor -> respondentes` igual à de `distinct_count_tables`/`option_table` (somente leitura)."""
+        key = (kind, col, id_col)
+        if key not in self._tables:
+            counts = self._agg(kind)[col]
+            self._tables[key] = pd.DataFrame({col: list(counts), id_col: np.fromiter(counts.values(), dtype=int)})
+        return self._tables[key]
+
+    def likert_levels(self, cols) -> tuple[np.ndarray, np.ndarray]:
+        """(respondentes por nível 1..5, respondentes válidos) por coluna, como `distinct_level_counts`."""
+        block = np.array([self.likert[c] for c in cols]).reshape(len(cols), _LIKERT_WIDTH)
+        return block[:, :5].astype(np.int64), block[:, 5].astype(np.int64)
+
+    def likert_rows(self, cols) -> np.ndarray:
+        """Linhas por nível 1..5 por coluna, como `level_counts` (base do bootstrap)."""
+        block = np.array([self.likert[c] for c in cols]).reshape(len(cols), _LIKERT_WIDTH)
+        return block[:, 8:].astype(np.int64)
+
+    def likert_index(self, cols) -> np.ndarray:
+        """Índice 0–100 por coluna (NaN sem respostas válidas), como `index_from_codes`."""
+        block = np.array([self.likert[c] for c in cols], dtype=np.float64).reshape(len(cols), _LIKERT_WIDTH)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(block[:, 7] > 0, block[:, 6] / np.maximum(block[:, 7], 1), np.nan)
+
+    # -- serialização (JSON) -------------------------------------------------------
+    def to_json(self) -> dict:
+        return dict(
+            id_col=self.id_col, linhas=self.linhas, respondentes=self.respondentes,
+            colunas=sorted(self.colunas, key=str),
+            valores={c: [[plain_value(v), int(n)] for v, n in t.items()] for c, t in self.valores.items()},
+            opcoes={c: [[plain_value(v), int(n)] for v, n in t.items()] for c, t in self.opcoes.items()},
+            likert={c: [plain_value(x) for x in v] for c, v in self.likert.items()},
+            ordenadas=sorted(self.ordenadas, key=str),
+            incompletas={k: sorted(v, key=str) for k, v in self.incompletas.items() if v},
+            escalares={k: plain_value(v) for k, v in self.escalares.items()},
+        )
+
+    @classmethod
+    def from_json(cls, d: dict) -> "Partial":
+        likert = {c: np.array(v, dtype=np.float64) for c, v in d["likert"].items()}
+        # vetores gravados antes das linhas por nível: completa com zeros (a soma
+        # segue possível) e marca a coluna como incompleta, para reagregar das linhas
+        incompletas = {k: list(v) for k, v in (d.get("incompletas") or {}).items()}
+        for c, v in likert.items():
+            if len(v) < _LIKERT_WIDTH:
+                likert[c] = np.concatenate([v, np.zeros(_LIKERT_WIDTH - len(v))])
+                incompletas.setdefault("likert", []).append(c)
+        return cls(
+            d["id_col"], d["linhas"], d["respondentes"], d["colunas"],
+            valores={c: {v: n for v, n in pairs} for c, pairs in d["valores"].items()},
+            opcoes={c: {v: n for v, n in pairs} for c, pairs in d["opcoes"].items()},
+            likert=likert,
+            ordenadas=d.get("ordenadas", ()), incompletas=incompletas, escalares=d.get("escalares"),
+        )
+
+
+def plain_value(v):
+    """Valor nativo do Python (chave de contagem comparável/serializável entre lotes)."""
+    return v.item() if isinstance(v, np.generic) else v
+
+
+def _mixed_order(v) -> tuple:
+    # números antes de textos, como pd.factorize(sort=True) numa coluna object mista
+    if isinstance(v, (int, float)):
+        return (0, v, "")
+    return (1, 0, str(v))
+
+
+def sorted_counts(counts: dict) -> dict:
+    """
+    {valor: n} com chaves nativas (sem np.generic) na ordem da fatoração do
+    conjunto inteiro. Ondas/blocos com tipos diferentes na mesma coluna (texto
+    numa, número noutra) seguem a ordem mista do pandas em vez de falhar.
+    """
+    items = [(plain_value(v), n) for v, n in counts.items()]
+    try:
+        return dict(sorted(items))
+    except TypeError:
+        return dict(sorted(items, key=lambda kv: _mixed_order(kv[0])))
+
+
+def _merge_counts(a: dict, b: dict, ordenadas) -> dict:
+    out = {}
+    for col in a.keys() | b.keys():
+        merged = dict(a.get(col, {}))
+        for v, n in b.get(col, {}).items():
+            merged[v] = merged.get(v, 0) + n
+        out[col] = merged if col in ordenadas else sorted_counts(merged)
+    return out
+
+
+def counts_from_table(table: pd.DataFrame, col, id_col) -> dict:
+    """{valor: respondentes} a partir de uma tabela do motor (mantém a ordem)."""
+    return dict(zip(map(plain_value, table[col]), map(int, table[id_col])))
+
+# -----------------------------------------------------------------------------
+# DATAFRAMES COM AGREGADOS ANEXADOS
+# -----------------------------------------------------------------------------
+def attach_partial(df: pd.DataFrame, partial: Partial) -> pd.DataFrame:
+    """Associa `partial` (agregados de todas as linhas de `df`) ao fingerprint de `df`."""
+    _ATTACHED.put((dataset_fingerprint(df),), partial)
+    return df
+
+
+def attached_partial(df: pd.DataFrame, id_col=None) -> Partial | None:
+    """Partial anexado a `df` (e do mesmo ID, quando `id_col` é dado); None para os demais."""
+    partial = _ATTACHED.get((dataset_fingerprint(df),))
+    if partial is None or (id_col is not None and partial.id_col != id_col):
+        return None
+    return partial
@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+from functools import wraps
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# -----------------------------------------------------------------------------
+# INSTRUMENTAÇÃO (tempo e memória por rerun; desligada = um getattr por probe)
+# -----------------------------------------------------------------------------
+TRACE_PATH = Path(os.environ.get("CEFET_PERF_TRACE", ".cache/perf/trace.jsonl"))
+
+_NOOP = nullcontext()
+_local = threading.local()
+_TRACE_LOCK = threading.Lock()
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_mb() -> float | None:
+    """Memória residente atual do processo (Linux: /proc/self/statm)."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if os.uname().sysname == "Darwin" else peak / 1024  # bytes no macOS, KB no Linux
+
+
+class Run:
+    """Probes de um rerun (uma sessão/thread por vez)."""
+
+    def __init__(self, session: str | None = None, trace: bool = False):
+        self.id = uuid.uuid4().hex[:12]
+        self.session = session
+        self.trace = trace
+        self.events: list[dict] = []
+        self.depth = 0
+        self.t0 = time.perf_counter()
+        self.total_ms = None
+
+
+class _Probe:
+    __slots__ = ("run", "name", "kind", "t0", "rss0")
+
+    def __init__(self, run: Run, name: str, kind: str):
+        self.run, self.name, self.kind = run, name, kind
+
+    def __enter__(self):
+        self.rss0 = rss_mb()
+        self.run.depth += 1
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        ms = (time.perf_counter() - self.t0) * 1000
+        self.run.depth -= 1
+        rss = rss_mb()
+        self.run.events.append(dict(
+            nome=self.name, tipo=self.kind, ms=round(ms, 3), profundidade=self.run.depth,
+            rss_mb=None if rss is None else round(rss, 1),
+            delta_rss_mb=None if rss is None or self.rss0 is None else round(rss - self.rss0, 2),
+        ))
+        return False
+
+
+def probe(name: str, kind: str = "outro"):
+    """Context manager que mede o bloco; sem rerun ativo devolve um nullcontext compartilhado."""
+    run = getattr(_local, "run", None)
+    if run is None:
+        return _NOOP
+    return _Probe(run, name, kind)
+
+
+def probed(name: str, kind: str = "outro"):
+    """Decorator equivalente a `with probe(name, kind)`."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if getattr(_local, "run", None) is None:
+                return fn(*args, **kwargs)
+            with _Probe(_local.run, name, kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def begin_run(session: str | None = None, trace: bool = False) -> Run:
+    run = Run(session, trace)
+    _local.run = run
+    return run
+
+
+def active_run() -> Run | None:
+    return getattr(_local, "run", None)
+
+
+def end_run(extra: dict | None = None) -> Run | None:
+    """Fecha o rerun da thread atual e, se pedido, grava o trace (uma linha JSON por evento)."""
+    run = getattr(_local, "run", None)
+    _local.run = None
+    if run is None:
+        return None
+    run.total_ms = round((time.perf_counter() - run.t0) * 1000, 3)
+    if run.trace:
+        write_trace(run, extra)
+    return run
+
+
+def write_trace(run: Run, extra: dict | None = None, path: Path | None = None):
+    path = path or TRACE_PATH
+    ts = time.time()
+    head = dict(run=run.id, sessao=run.session, ts=ts)
+    lines = [json.dumps({**head, **e}, ensure_ascii=False) for e in run.events]
+    lines.append(json.dumps({**head, "tipo": "rerun", "nome": "total", "ms": run.total_ms,
+                             "pico_rss_mb": peak_rss_mb(), **(extra or {})}, ensure_ascii=False, default=str))
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _TRACE_LOCK, open(path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+    except OSError:
+        pass  # sem disco gravável: o painel continua funcionando
+
+
+def summarize(run: Run) -> pd.DataFrame:
+    """Tabela por probe: chamadas, tempo total e máximo, variação de memória."""
+    if not run.events:
+        return pd.DataFrame(columns=["nome", "tipo", "chamadas", "total_ms", "max_ms", "delta_rss_mb"])
+    ev = pd.DataFrame(run.events)
+    out = ev.groupby(["tipo", "nome"], sort=False).agg(
+        chamadas=("ms", "size"), total_ms=("ms", "sum"), max_ms=("ms", "max"), delta_rss_mb=("delta_rss_mb", "sum"),
+    ).reset_index()
+    return out.sort_values("total_ms", ascending=False).round(2)
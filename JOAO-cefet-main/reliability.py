@@ -0,0 +1,96 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from likert_codec import NA_CODE, likert_codes
+from memo import BoundedCache, dataset_fingerprint
+from perf import probed
+
+# -----------------------------------------------------------------------------
+# CORRELAÇÃO E CONFIABILIDADE (matriz Likert int8 -> produtos de matrizes)
+# -----------------------------------------------------------------------------
+# Com M = respostas válidas (0/1) e X = nível 1..5 (0 onde não há resposta),
+# todas as somas "pairwise-complete" de todos os pares de itens saem de quatro
+# produtos de matrizes: pares válidos MᵀM, somas XᵀM, quadrados (X²)ᵀM e
+# produtos cruzados XᵀX. As somas são inteiras e exatas em float32 enquanto
+# 25 × linhas < 2**24; acima disso o cálculo passa para float64. O resultado
+# (correlações, alfa, item-total) é cacheado por dataset/recorte e colunas.
+MIN_PAIRS = 3  # pares válidos mínimos para uma correlação
+
+_STATS = BoundedCache(max_entries=32, name="confiabilidade")
+
+
+class ItemStats(NamedTuple):
+    corr: np.ndarray   # itens × itens, Pearson sobre os pares válidos (NaN com < MIN_PAIRS)
+    cov: np.ndarray    # itens × itens, covariância sobre os pares válidos
+    pairs: np.ndarray  # itens × itens, linhas com os dois itens respondidos
+    complete: int      # linhas com todos os itens respondidos
+
+
+@probed("confiabilidade:matriz", "kpi")
+def pairwise_stats(codes: np.ndarray) -> ItemStats:
+    """Correlação e covariância pairwise-complete entre as colunas da matriz de códigos (linhas × itens)."""
+    codes = codes.reshape(len(codes), -1)
+    valid = codes != NA_CODE
+    complete = int(valid.all(axis=1).sum())
+    keep = valid.any(axis=1)
+    codes, valid = codes[keep], valid[keep]
+    dtype = np.float32 if 25 * len(codes) < 2 ** 24 else np.float64
+    m = valid.astype(dtype)
+    x = codes.astype(dtype)  # NA_CODE = 0: já zerado onde não há resposta
+    n = (m.T @ m).astype(np.float64)
+    sx = (x.T @ m).astype(np.float64)        # [i, j] = soma de x_i nas linhas com j válido
+    sxx = ((x * x).T @ m).astype(np.float64)
+    sxy = (x.T @ x).astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dof = np.where(n > 1, n - 1, np.nan)
+        cov = (sxy - sx * sx.T / n) / dof
+        var = (sxx - sx * sx / n) / dof      # variância de i nas linhas com j válido
+        corr = cov / np.sqrt(var * var.T)
+    corr[n < MIN_PAIRS] = np.nan
+    corr = np.clip(corr, -1.0, 1.0)
+    np.fill_diagonal(corr, np.where(np.diag(n) >= MIN_PAIRS, 1.0, np.nan))
+    return ItemStats(corr, cov, n.astype(np.int64), complete)
+
+
+def cronbach_alpha(cov: np.ndarray) -> float:
+    """Alfa de Cronbach k/(k−1)·(1 − Σ variâncias / variância do total), a partir da covariância."""
+    k = len(cov)
+    total = np.nansum(cov)
+    if k < 2 or not total > 0:
+        return float("nan")
+    return float(k / (k - 1) * (1 - np.nansum(np.diag(cov)) / total))
+
+
+def standardized_alpha(corr: np.ndarray) -> float:
+    """Alfa padronizado k·r̄ / (1 + (k−1)·r̄), com r̄ = média das correlações entre itens distintos."""
+    k = len(corr)
+    off = corr[~np.eye(k, dtype=bool)]
+    off = off[~np.isnan(off)]
+    if k < 2 or not len(off):
+        return float("nan")
+    r = off.mean()
+    return float(k * r / (1 + (k - 1) * r))
+
+
+def item_total(cov: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(correlação item-total corrigida, alfa sem o item) de cada item, sem recalcular nada sobre as linhas."""
+    k = len(cov)
+    cov = np.nan_to_num(cov)
+    var = np.diag(cov)
+    rows = cov.sum(axis=1)
+    rest = cov.sum() - 2 * rows + var            # variância da soma dos outros itens
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = (rows - var) / np.sqrt(var * rest)
+        alpha = (k - 1) / (k - 2) * (1 - (np.trace(cov) - var) / rest) if k > 2 else np.full(k, np.nan)
+    r = np.where((var > 0) & (rest > 0), r, np.nan)
+    alpha = np.where(rest > 0, alpha, np.nan)
+    return r, alpha
+
+
+def item_stats(df: pd.DataFrame, cols) -> ItemStats:
+    """`pairwise_stats` das colunas Likert `cols` de `df`, cacheado pelo fingerprint (recortes incluídos)."""
+    cols = tuple(cols)
+    return _STATS.get_or_compute((dataset_fingerprint(df), cols),
+                                 lambda: pairwise_stats(likert_codes(df, cols)))
@@ -0,0 +1,188 @@
+"""
+Relatório das KPIs em lote, sem Streamlit.
+
+    python report.py data/ outra_planilha.xlsx --out relatorios --formats json xlsx png
+    python report.py --github --workers 8
+    python report.py --github data/dados_cefet.xlsx --formats bundle --out artifacts
+    python report.py exports/ --stream --workers 2   # CSV/XLSX enormes, lidos em blocos
+
+Cada planilha (arquivo, pasta com .xlsx ou URL) é processada num processo do
+pool; o resumo de todas fica em <out>/resumo.json. O formato "bundle" grava o
+artefato de agregados que o dashboard abre sem a planilha (bundle.py). Com
+--stream, cada arquivo é agregado em blocos (streaming.py), com memória limitada.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import plotly.graph_objects as go
+
+from bundle import BUNDLE_NAME, build_bundle, source_validators, write_bundle
+from datasets import GITHUB_FILES, is_url, load_path, load_url, source_slug
+from exports import export_tables
+from kpis import bundle_catalog, compute_report, kpi_export_sheets
+from likert_codec import LIKERT_LABELS
+from streaming import STREAM_SUFFIXES, stream_path
+
+FORMATS = ("json", "xlsx", "png", "svg", "pdf", "bundle")
+EXCEL_SUFFIXES = {".xlsx", ".xls"}
+
+# -----------------------------------------------------------------------------
+# FONTES
+# -----------------------------------------------------------------------------
+def collect_sources(inputs, github: bool = False, suffixes=EXCEL_SUFFIXES) -> list[str]:
+    """Arquivos, pastas (todas as planilhas dentro) e URLs, sem repetir."""
+    out = list(GITHUB_FILES.values()) if github else []
+    for item in inputs:
+        p = Path(item)
+        if is_url(item):
+            out.append(item)
+        elif p.is_dir():
+            out.extend(str(f) for f in sorted(p.rglob("*"))
+                       if f.suffix.lower() in suffixes and not f.name.startswith("~$"))
+        else:
+            out.append(str(p))
+    return list(dict.fromkeys(out))
+
+
+# -----------------------------------------------------------------------------
+# SAÍDAS
+# -----------------------------------------------------------------------------
+def _records(table: pd.DataFrame) -> list[dict]:
+    return table.astype(object).where(table.notna(), None).to_dict("records")
+
+
+def report_figures(tables: dict) -> dict:
+    """{ nome: go.Figure } — barras para as contagens e heatmap para as matrizes Likert."""
+    figs = {}
+    for name, table in tables.items():
+        if table is None or table.empty:
+            continue
+        if name.startswith("likert_"):
+            pivot = table.pivot(index="Pergunta", columns="Resposta", values="Percentual").reindex(columns=LIKERT_LABELS)
+            fig = go.Figure(go.Heatmap(z=pivot.values, x=list(pivot.columns), y=list(pivot.index),
+                                       colorscale="RdYlGn", text=pivot.values, texttemplate="%{text:.1f}%"))
+            height = max(350, 28 * len(pivot.index) + 120)
+        elif "Respondentes" in table.columns:
+            label = table.columns[0]
+            t = table.sort_values("Respondentes")
+            fig = go.Figure(go.Bar(y=t[label].astype(str), x=t["Respondentes"], orientation="h",
+                                   text=t["Respondentes"], textposition="outside"))
+            height = max(350, 24 * len(t) + 120)
+        else:
+            continue
+        fig.update_layout(template="plotly_white", title=name, height=height,
+                          yaxis=dict(automargin=True), margin=dict(t=60))
+        figs[name] = fig
+    return figs
+
+
+def build_report(source: str, out_dir: str, formats=("json", "xlsx"), projected: bool = True,
+                 stream: bool = False) -> dict:
+    """Calcula todas as KPIs de uma planilha e grava os formatos pedidos (roda no processo do pool)."""
+    t0 = time.perf_counter()
+    result = dict(fonte=source, arquivos=[], erro=None)
+    try:
+        if stream:
+            if is_url(source):
+                raise ValueError("A leitura em blocos é só para arquivos locais.")
+            ds = stream_path(Path(source))
+        else:
+            load = load_url if is_url(source) else (lambda s, **kw: load_path(Path(s), **kw))
+            ds = load(source, projected=projected, compact=True)
+        if ds.id_col is None:
+            raise ValueError("Coluna de ID do respondente não encontrada.")
+        df, id_col = ds.df, ds.id_col
+        report = compute_report(df, id_col)
+        target = Path(out_dir) / source_slug(source)
+        target.mkdir(parents=True, exist_ok=True)
+
+        if "json" in formats:
+            payload = dict(
+                fonte=source,
+                gerado_em=datetime.now().isoformat(timespec="seconds"),
+                fingerprint=ds.fingerprint,
+                base=report["base"],
+                tabelas={name: _records(t) for name, t in report["tabelas"].items()},
+            )
+            path = target / "kpis.json"
+            path.write_text(json.dumps(payload, ensure_ascii=False, indent=2, default=str), "utf-8")
+            result["arquivos"].append(str(path))
+        if "xlsx" in formats:
+            path = target / "kpis.xlsx"
+            path.write_bytes(export_tables(df, lambda: kpi_export_sheets(df, id_col)))
+            result["arquivos"].append(str(path))
+        if "bundle" in formats:
+            source_hash, etag = source_validators(source)
+            payload = build_bundle(df, id_col, bundle_catalog, source, source_hash, etag)
+            path = write_bundle(payload, target / BUNDLE_NAME)
+            result["arquivos"].append(str(path))
+        images = [f for f in formats if f in ("png", "svg", "pdf")]
+        if images:
+            fig_dir = target / "graficos"
+            fig_dir.mkdir(exist_ok=True)
+            for name, fig in report_figures(report["tabelas"]).items():
+                for fmt in images:
+                    path = fig_dir / f"{name}.{fmt}"
+                    fig.write_image(path, format=fmt, width=1100)  # kaleido
+                    result["arquivos"].append(str(path))
+        result["respondentes"] = report["base"]["total"]
+    except Exception as e:  # uma planilha ruim não derruba o lote
+        result["erro"] = f"{type(e).__name__}: {e}"
+    result["segundos"] = round(time.perf_counter() - t0, 2)
+    return result
+
+# -----------------------------------------------------------------------------
+# CLI
+# -----------------------------------------------------------------------------
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Relatório das KPIs do dashboard CEFET-MG em lote.")
+    parser.add_argument("fontes", nargs="*", help="planilhas, pastas com planilhas ou URLs")
+    parser.add_argument("--github", action="store_true", help="inclui os arquivos de GITHUB_FILES")
+    parser.add_argument("--out", default="relatorios", help="pasta de saída (padrão: relatorios)")
+    parser.add_argument("--formats", nargs="+", default=["json", "xlsx"], choices=FORMATS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processos em paralelo (padrão: todos os núcleos)")
+    parser.add_argument("--all-columns", action="store_true",
+                        help="lê todas as colunas (padrão: só as usadas pelas KPIs)")
+    parser.add_argument("--stream", action="store_true",
+                        help="agrega cada arquivo (CSV ou XLSX) em blocos, sem carregá-lo inteiro")
+    args = parser.parse_args(argv)
+
+    sources = collect_sources(args.fontes, github=args.github,
+                              suffixes=STREAM_SUFFIXES if args.stream else EXCEL_SUFFIXES)
+    if not sources:
+        parser.error("nenhuma planilha informada (use caminhos, pastas, URLs ou --github)")
+
+    t0 = time.perf_counter()
+    workers = max(1, min(args.workers, len(sources)))
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(build_report, s, args.out, tuple(args.formats), not args.all_columns, args.stream)
+                   for s in sources]
+        for fut in as_completed(futures):
+            r = fut.result()
+            results.append(r)
+            status = f"ERRO {r['erro']}" if r["erro"] else f"{r.get('respondentes', 0)} respondentes"
+            print(f"[{len(results)}/{len(sources)}] {source_slug(r['fonte'])}: {status} ({r['segundos']}s)",
+                  flush=True)
+
+    Path(args.out).mkdir(parents=True, exist_ok=True)
+    summary = dict(
+        gerado_em=datetime.now().isoformat(timespec="seconds"),
+        workers=workers,
+        segundos=round(time.perf_counter() - t0, 2),
+        relatorios=sorted(results, key=lambda r: sources.index(r["fonte"])),
+    )
+    (Path(args.out) / "resumo.json").write_text(json.dumps(summary, ensure_ascii=False, indent=2), "utf-8")
+    return 1 if any(r["erro"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from aggregation import factorize_column
+from kpis import faixa_etaria, kpi_column
+from memo import BoundedCache, RowSubset, dataset_fingerprint, subset_rows
+from perf import probe
+
+# -----------------------------------------------------------------------------
+# SEGMENTAÇÃO (índices bitmap por valor, construídos uma vez por dataset)
+# -----------------------------------------------------------------------------
+# Cada valor de cada dimensão vira um bitmap compactado (1 bit por linha).
+# Valores da mesma dimensão combinam com OU; dimensões combinam com E ou OU.
+# O recorte resultante não copia o quadro: é um memo.RowSubset (pai + linhas),
+# e as KPIs agregam os códigos já calculados no dataset inteiro indexados pelas
+# linhas selecionadas, então trocar o filtro não refaz a codificação.
+SEGMENT_DIMENSIONS = {
+    "curso": "🎓 Curso",
+    "ies": "🏛️ IES",
+    "perfil": "👥 Perfil (você é)",
+    "faixa": "👤 Faixa etária",
+    "fundador": "🚀 Sócio/fundador",
+}
+
+_INDEXES = BoundedCache(max_entries=8, name="segmentos")
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class BitmapIndex:
+    """Bitmaps `np.packbits` (valores × ceil(linhas/8)) por dimensão."""
+
+    def __init__(self, n_rows: int):
+        self.n_rows = n_rows
+        self.columns: dict[str, str] = {}
+        self.values: dict[str, list[str]] = {}
+        self.bitmaps: dict[str, np.ndarray] = {}
+
+    def add(self, dim: str, col: str, series: pd.Series):
+        codes, uniques = factorize_column(series)
+        # só valores que aparecem (categóricas podem ter categorias vazias)
+        present = np.flatnonzero(np.bincount(codes[codes >= 0], minlength=len(uniques)))
+        bitmaps = np.empty((len(present), (self.n_rows + 7) // 8), dtype=np.uint8)
+        for j, i in enumerate(present):
+            bitmaps[j] = np.packbits(codes == i)
+        self.columns[dim] = col
+        self.values[dim] = [str(uniques[i]) for i in present]
+        self.bitmaps[dim] = bitmaps
+
+    def select(self, dim: str, values) -> np.ndarray:
+        """OU dos bitmaps dos `values` da dimensão (valores desconhecidos são ignorados)."""
+        pos = {v: i for i, v in enumerate(self.values[dim])}
+        picked = [pos[v] for v in values if v in pos]
+        if not picked:
+            return np.zeros(self.bitmaps[dim].shape[1], dtype=np.uint8)
+        return np.bitwise_or.reduce(self.bitmaps[dim][picked], axis=0)
+
+    def mask(self, filters: dict, mode: str = "and") -> np.ndarray | None:
+        """Bitmap das linhas selecionadas; None quando nenhum filtro está ativo."""
+        parts = [self.select(dim, vals) for dim, vals in filters.items() if vals and dim in self.bitmaps]
+        if not parts:
+            return None
+        op = np.bitwise_and if mode == "and" else np.bitwise_or
+        return op.reduce(parts, axis=0) if len(parts) > 1 else parts[0]
+
+    def count(self, bitmap: np.ndarray) -> int:
+        return int(_POPCOUNT[bitmap].sum(dtype=np.int64))
+
+    def rows(self, bitmap: np.ndarray) -> np.ndarray:
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.n_rows))
+
+    def value_counts(self, dim: str, bitmap: np.ndarray | None = None) -> dict[str, int]:
+        """Linhas por valor da dimensão, opcionalmente dentro de um recorte."""
+        bits = self.bitmaps[dim] if bitmap is None else self.bitmaps[dim] & bitmap
+        return dict(zip(self.values[dim], _POPCOUNT[bits].sum(axis=1, dtype=np.int64).tolist()))
+
+
+def bitmap_index(df: pd.DataFrame) -> BitmapIndex:
+    """Índice das dimensões de SEGMENT_DIMENSIONS encontradas em `df` (cacheado pelo fingerprint)."""
+    def build():
+        with probe("segmentos:indice", "segmentos"):
+            index = BitmapIndex(len(df))
+            for dim in SEGMENT_DIMENSIONS:
+                if dim == "faixa":
+                    idade = kpi_column(df, "idade")
+                    if idade:
+                        index.add(dim, idade, faixa_etaria(df, idade))
+                    continue
+                col = kpi_column(df, dim)
+                if col:
+                    index.add(dim, col, df[col])
+            return index
+    return _INDEXES.get_or_compute((dataset_fingerprint(df),), build)
+
+
+def _normalize_filters(filters: dict) -> tuple:
+    return tuple(sorted((dim, tuple(sorted(vals))) for dim, vals in filters.items() if vals))
+
+
+def segment_view(df: pd.DataFrame, filters: dict, mode: str = "and") -> pd.DataFrame | RowSubset:
+    """
+    Recorte de `df` pelos filtros {dimensão: [valores]} ("and"/"or" entre
+    dimensões), como RowSubset (sem cópia das linhas). Sem filtro ativo devolve
+    o próprio `df`. O fingerprint do recorte vem do bitmap: filtros diferentes
+    com as mesmas linhas dividem cache.
+    """
+    norm = _normalize_filters(filters)
+    if not norm:
+        return df
+    with probe("segmentos:recorte", "segmentos"):
+        index = bitmap_index(df)
+        bitmap = index.mask(dict(norm), mode)
+        if bitmap is None:
+            return df
+        tag = "seg-" + hashlib.sha1(bitmap.tobytes()).hexdigest()[:16]
+        return subset_rows(df, index.rows(bitmap), tag)
@@ -0,0 +1,423 @@
+"""
+Ingestão em blocos de exportações muito grandes (CSV ou XLSX).
+
+    python streaming.py data/export_completo.csv
+    python streaming.py data/export_completo.xlsx --chunk-rows 50000 --json agregados.json
+
+O arquivo é lido em blocos de CHUNK_ROWS linhas (só as colunas das KPIs) e cada
+bloco atualiza os agregados e é descartado: o quadro inteiro nunca fica em
+memória. O dashboard usa este modo pela opção "Ingestão em blocos" do upload.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from aggregation import factorize_column
+from column_index import column_index
+from datasets import Dataset
+from excel_reader import iter_projected
+from kpi_registry import (
+    COUNT_KEYS, ID_CANDIDATES, MULTI_SELECT_KEYS, apply_mapping, likert_columns, required_columns, resolve_column,
+)
+from kpis import faixa_etaria
+from likert_codec import INDEX_LUT, NA_CODE, encode_series, level_counts
+from memo import BoundedCache, set_fingerprint
+from multiselect import split_options
+from partials import Partial, attach_partial, plain_value, sorted_counts
+from perf import peak_rss_mb, probe
+from waves import id_keys
+
+# -----------------------------------------------------------------------------
+# CONTAGEM DISTINTA ONLINE (conjunto exato até o limite, depois HyperLogLog)
+# -----------------------------------------------------------------------------
+# Os respondentes entram como hash de 64 bits do ID. Cada contagem guarda os
+# hashes (uint64 ordenados, 8 bytes por ID) até EXACT_LIMIT; passando disso
+# vira um HyperLogLog de 2**HLL_PRECISION registradores (erro típico
+# 1.04/sqrt(2**p): ±0.8% com p=14). EXACT_BUDGET limita a soma dos conjuntos
+# exatos: os maiores viram sketch primeiro. Assim a memória dos agregados
+# depende do número de contagens (colunas × valores), não do de linhas.
+CHUNK_ROWS = int(os.environ.get("CEFET_CHUNK_ROWS", "20000"))
+EXACT_LIMIT = int(os.environ.get("CEFET_EXACT_DISTINCT", "50000"))
+EXACT_BUDGET = int(os.environ.get("CEFET_EXACT_BUDGET", "4000000"))
+HLL_PRECISION = int(os.environ.get("CEFET_HLL_PRECISION", "14"))
+STREAM_SUFFIXES = {".csv", ".xlsx"}
+
+_STREAMED = BoundedCache(max_entries=4, name="blocos")
+_EMPTY = np.empty(0, dtype=np.uint64)
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    # número de bits de cada uint64 < 2**53 (0 -> 0): exato via expoente do float64
+    return np.frexp(x.astype(np.float64))[1]
+
+
+class HyperLogLog:
+    """Sketch de cardinalidade sobre hashes uint64 (somável por máximo dos registradores)."""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        if not 11 <= precision <= 18:
+            raise ValueError(f"Precisão do HyperLogLog fora de 11..18: {precision}")
+        self.p = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, hashes: np.ndarray):
+        if not len(hashes):
+            return
+        bucket = (hashes >> np.uint64(64 - self.p)).astype(np.intp)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - _bit_length(rest) + 1  # posição do primeiro bit 1
+        np.maximum.at(self.registers, bucket, rank.astype(np.uint8))
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        out = HyperLogLog(self.p)
+        out.registers = np.maximum(self.registers, other.registers)
+        return out
+
+    def count(self) -> int:
+        m = len(self.registers)
+        est = 0.7213 / (1 + 1.079 / m) * m * m / np.exp2(-self.registers.astype(np.float64)).sum()
+        zeros = int((self.registers == 0).sum())
+        if est <= 2.5 * m and zeros:
+            est = m * np.log(m / zeros)  # poucos elementos: contagem linear
+        return int(round(est))
+
+
+class DistinctCount:
+    """Respondentes distintos: hashes exatos até `limit`, depois HyperLogLog."""
+    __slots__ = ("exact", "sketch", "limit")
+
+    def __init__(self, limit: int = EXACT_LIMIT):
+        self.exact = _EMPTY
+        self.sketch = None
+        self.limit = limit
+
+    def add(self, hashes: np.ndarray):
+        if not len(hashes):
+            return
+        if self.sketch is not None:
+            self.sketch.add(hashes)
+            return
+        new = np.unique(hashes)
+        if len(self.exact):
+            pos = np.searchsorted(self.exact, new)
+            seen = self.exact[np.minimum(pos, len(self.exact) - 1)] == new
+            new, pos = new[~seen], pos[~seen]
+            if not len(new):
+                return
+            new = np.insert(self.exact, pos, new)
+        self.exact = new
+        if len(self.exact) > self.limit:
+            self.to_sketch()
+
+    def to_sketch(self):
+        self.sketch = HyperLogLog()
+        self.sketch.add(self.exact)
+        self.exact = _EMPTY
+
+    @property
+    def approximate(self) -> bool:
+        return self.sketch is not None
+
+    @property
+    def nbytes(self) -> int:
+        return self.exact.nbytes + (self.sketch.registers.nbytes if self.sketch is not None else 0)
+
+    def __len__(self) -> int:
+        return len(self.exact) if self.sketch is None else self.sketch.count()
+
+
+def _groups(codes: np.ndarray, hashes: np.ndarray):
+    # (código, hashes das linhas com o código) para cada código presente (>= 0)
+    ok = codes >= 0
+    codes, hashes = codes[ok], hashes[ok]
+    if not len(codes):
+        return
+    order = np.argsort(codes, kind="stable")
+    codes, hashes = codes[order], hashes[order]
+    cuts = np.flatnonzero(np.diff(codes)) + 1
+    yield from zip(codes[np.r_[0, cuts]].tolist(), np.split(hashes, cuts))
+
+
+# -----------------------------------------------------------------------------
+# AGREGAÇÃO ONLINE (um bloco por vez -> partials.Partial)
+# -----------------------------------------------------------------------------
+class StreamStats(NamedTuple):
+    linhas: int
+    blocos: int
+    contagens: int      # DistinctCount mantidas
+    aproximadas: int    # delas, quantas viraram HyperLogLog
+    agregados_mb: float  # memória dos agregados no fim
+    pico_mb: float | None  # pico de RSS do processo
+    segundos: float
+
+
+class StreamAggregator:
+    """
+    Mesmos agregados de `kpis.kpi_partial`, atualizados bloco a bloco. As
+    colunas são resolvidas no primeiro bloco (todos têm o mesmo cabeçalho).
+    """
+
+    def __init__(self, exact_limit: int = EXACT_LIMIT, exact_budget: int = EXACT_BUDGET):
+        self.exact_limit = exact_limit
+        self.exact_budget = exact_budget
+        self.id_col = None
+        self.columns: list = []
+        self.cols: dict = {}      # chave da KPI -> coluna
+        self.single = self.multi = self.likert = []
+        self.linhas = self.blocos = 0
+        self.respondentes = DistinctCount(exact_limit)
+        self.valores: dict = {}   # coluna -> {valor: DistinctCount}
+        self.opcoes: dict = {}    # coluna -> {opção: DistinctCount}
+        self.niveis: dict = {}    # coluna Likert -> [DistinctCount níveis 1..5, válidos]
+        self.somas: dict = {}     # coluna Likert -> [soma do índice, linhas válidas]
+        self.linhas_nivel: dict = {}  # coluna Likert -> linhas por nível 1..5 (base do bootstrap)
+        self.fundadores = DistinctCount(exact_limit)
+        self.idade = [0.0, 0]
+        self.ordenadas: set = set()
+
+    def _counter(self) -> DistinctCount:
+        return DistinctCount(self.exact_limit)
+
+    def _resolve(self, chunk: pd.DataFrame):
+        self.columns = list(chunk.columns)
+        index = column_index(self.columns)
+        self.id_col = index.find_respondent_id(ID_CANDIDATES)
+        if self.id_col is None:
+            raise ValueError("Coluna de ID do respondente não encontrada.")
+        cols = {k: resolve_column(index, k) for k in COUNT_KEYS}
+        self.cols = {k: c for k, c in cols.items() if c is not None}
+        self.single = [c for k, c in self.cols.items() if k != "idade" and k not in MULTI_SELECT_KEYS]
+        self.multi = [c for k, c in self.cols.items() if k in MULTI_SELECT_KEYS]
+        self.likert = likert_columns(index.columns)
+        for c in self.single + (["Faixa"] if "idade" in self.cols else []):
+            self.valores[c] = {}
+        for c in self.multi:
+            self.opcoes[c] = {}
+        for c in self.likert:
+            self.niveis[c] = [self._counter() for _ in range(6)]
+            self.somas[c] = [0.0, 0]
+            self.linhas_nivel[c] = np.zeros(5, dtype=np.int64)
+
+    def update(self, chunk: pd.DataFrame):
+        chunk = apply_mapping(chunk)
+        if self.blocos == 0:
+            self._resolve(chunk)
+        self.blocos += 1
+        self.linhas += len(chunk)
+        ids = chunk[self.id_col]
+        has = ids.notna().to_numpy()
+        # hash de 64 bits do ID normalizado (12 e 12.0 são o mesmo respondente)
+        hashes = pd.util.hash_array(id_keys(ids[has]).to_numpy(dtype=object))
+        self.respondentes.add(hashes)
+
+        series = {c: chunk[c] for c in self.single}
+        if "idade" in self.cols:
+            series["Faixa"] = faixa_etaria(chunk, self.cols["idade"])
+            self.ordenadas.add("Faixa")
+            ages = pd.to_numeric(chunk[self.cols["idade"]], errors="coerce")
+            self.idade[0] += float(ages.sum())
+            self.idade[1] += int(ages.count())
+        for name, s in series.items():
+            codes, uniques = factorize_column(s)
+            counts = self.valores[name]
+            if isinstance(s.dtype, pd.CategoricalDtype):
+                for u in uniques:  # categóricas listam todas as categorias, mesmo sem respostas
+                    counts.setdefault(plain_value(u), self._counter())
+            for code, h in _groups(codes[has], hashes):
+                counts.setdefault(plain_value(uniques[code]), self._counter()).add(h)
+
+        for c in self.multi:
+            codes, uniques = factorize_column(chunk[c])
+            parts = [split_options(u) for u in uniques]
+            counts = self.opcoes[c]
+            for code, h in _groups(codes[has], hashes):
+                for option in parts[code]:
+                    counts.setdefault(option, self._counter()).add(h)
+
+        for c in self.likert:
+            codes = encode_series(chunk[c])
+            acc = self.somas[c]
+            acc[0] += float(INDEX_LUT[codes].sum())
+            acc[1] += int((codes != NA_CODE).sum())
+            self.linhas_nivel[c] += level_counts(codes)[0]
+            levels = self.niveis[c]
+            own = codes[has]
+            for code, h in _groups(own.astype(np.int64) - 1, hashes):
+                levels[code].add(h)
+            levels[5].add(hashes[own != NA_CODE])
+
+        fundador = self.cols.get("fundador")
+        if fundador:
+            codes, uniques = factorize_column(chunk[fundador])
+            lut = np.array([("sim" in str(u).lower()) for u in uniques] + [False], dtype=bool)
+            self.fundadores.add(hashes[lut[codes[has]]])
+        self._enforce_budget()
+
+    def counters(self):
+        yield self.respondentes
+        yield self.fundadores
+        for counts in (*self.valores.values(), *self.opcoes.values()):
+            yield from counts.values()
+        for levels in self.niveis.values():
+            yield from levels
+
+    def _enforce_budget(self):
+        exact = [d for d in self.counters() if not d.approximate]
+        total = sum(len(d.exact) for d in exact)
+        for d in sorted(exact, key=lambda d: len(d.exact), reverse=True):
+            if total <= self.exact_budget:
+                break
+            total -= len(d.exact)
+            d.to_sketch()
+
+    def nbytes(self) -> int:
+        return sum(d.nbytes for d in self.counters())
+
+    def partial(self) -> Partial:
+        """Agregados finais no formato de `kpis.kpi_partial` (contagens estimadas onde houve sketch)."""
+        def counts(table: dict, name) -> dict:
+            out = {v: len(d) for v, d in table.items()}
+            return out if name in self.ordenadas else sorted_counts(out)
+        likert = {}
+        for c in self.likert:
+            levels = self.niveis[c]
+            likert[c] = np.array([*(len(d) for d in levels), *self.somas[c], *self.linhas_nivel[c]],
+                                 dtype=np.float64)
+        return Partial(
+            self.id_col, self.linhas, len(self.respondentes),
+            set(self.columns) | ({"Faixa"} if "idade" in self.cols else set()),
+            valores={c: counts(t, c) for c, t in self.valores.items()},
+            opcoes={c: sorted_counts({o: len(d) for o, d in t.items()}) for c, t in self.opcoes.items()},
+            likert=likert,
+            ordenadas=self.ordenadas,
+            escalares=dict(idade_soma=self.idade[0], idade_n=self.idade[1], fundadores=len(self.fundadores)),
+        )
+
+# -----------------------------------------------------------------------------
+# LEITURA EM BLOCOS
+# -----------------------------------------------------------------------------
+def _csv_sep(source) -> str:
+    # separador mais frequente na linha do cabeçalho (exportações em pt-BR usam ";")
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            head = f.readline()
+    else:
+        head = source.readline()
+        source.seek(0)
+    head = head.decode("utf-8", "replace") if isinstance(head, bytes) else head
+    return max([",", ";", "\t", "|"], key=head.count)
+
+
+def iter_chunks(source, kind: str, chunk_rows: int = CHUNK_ROWS):
+    """
+    DataFrames de até `chunk_rows` linhas com só as colunas usadas pelas KPIs.
+    `source`: caminho ou arquivo aberto (binário); `kind`: "csv" ou "xlsx".
+    """
+    if kind == "xlsx":
+        yield from iter_projected(source, chunk_rows)
+        return
+    if kind != "csv":
+        raise ValueError(f"Formato sem leitura em blocos: {kind!r} (use CSV ou XLSX).")
+    sep = _csv_sep(source)
+    header = pd.read_csv(source, sep=sep, nrows=0, encoding="utf-8-sig").columns
+    if not isinstance(source, (str, Path)):
+        source.seek(0)
+    wanted = set(required_columns(list(header)))
+    yield from pd.read_csv(source, sep=sep, usecols=lambda c: c in wanted, chunksize=chunk_rows,
+                           encoding="utf-8-sig")
+
+
+def stream_partial(source, kind: str, chunk_rows: int = CHUNK_ROWS, exact_limit: int = EXACT_LIMIT,
+                   exact_budget: int = EXACT_BUDGET) -> tuple[Partial, list, StreamStats]:
+    """Lê `source` em blocos: (agregados, colunas na ordem do arquivo, estatísticas da leitura)."""
+    t0 = time.perf_counter()
+    agg = StreamAggregator(exact_limit, exact_budget)
+    with probe("blocos:leitura", "carga"):
+        for chunk in iter_chunks(source, kind, chunk_rows):
+            agg.update(chunk)
+    if agg.blocos == 0:
+        raise ValueError("Arquivo sem linhas de dados.")
+    counters = list(agg.counters())
+    stats = StreamStats(
+        agg.linhas, agg.blocos, len(counters), sum(d.approximate for d in counters),
+        round(agg.nbytes() / 1024 / 1024, 2), peak_rss_mb(), round(time.perf_counter() - t0, 2),
+    )
+    return agg.partial(), agg.columns, stats
+
+
+def stream_dataset(source_key, open_source, kind: str, **opts) -> Dataset:
+    """
+    Dataset sem linhas (só o cabeçalho) com os agregados da leitura em blocos
+    anexados: as KPIs saem do Partial. `open_source()` só é chamado quando
+    `source_key` não está no cache.
+    """
+    fp = "blocos-" + hashlib.sha1(repr(source_key).encode("utf-8")).hexdigest()[:32]
+    def build():
+        partial, columns, stats = stream_partial(open_source(), kind, **opts)
+        df = pd.DataFrame({c: pd.Series(dtype=object) for c in columns})
+        set_fingerprint(df, fp)
+        return Dataset(df, partial.id_col, None, None, fp, status="blocos"), partial, stats
+    ds, partial, _ = _STREAMED.get_or_compute((fp,), build)
+    attach_partial(ds.df, partial)  # de novo a cada acesso: o registro de agregados é limitado
+    return ds
+
+
+def stream_stats(ds: Dataset) -> StreamStats | None:
+    hit = _STREAMED.get((ds.fingerprint,))
+    return hit[2] if hit is not None else None
+
+
+def stream_kind(name: str) -> str:
+    suffix = Path(name).suffix.lower()
+    if suffix not in STREAM_SUFFIXES:
+        raise ValueError(f"A ingestão em blocos lê CSV ou XLSX, não {suffix or name!r}.")
+    return suffix[1:]
+
+
+def stream_path(p: Path, **opts) -> Dataset:
+    info = p.stat()
+    return stream_dataset(("path", str(p.resolve()), info.st_mtime_ns, info.st_size), lambda: p, stream_kind(p.name), **opts)
+
+
+def stream_upload(uploaded, **opts) -> Dataset:
+    # o UploadedFile já é um arquivo em memória: lido em blocos sem cópia
+    def open_source():
+        uploaded.seek(0)
+        return uploaded
+    key = ("upload", getattr(uploaded, "file_id", None) or uploaded.name, uploaded.size)
+    return stream_dataset(key, open_source, stream_kind(uploaded.name), **opts)
+
+
+def clear_streamed():
+    _STREAMED.clear()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Agregados das KPIs de um CSV/XLSX grande, lido em blocos.")
+    parser.add_argument("arquivo")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help=f"linhas por bloco (padrão: {CHUNK_ROWS})")
+    parser.add_argument("--exact-limit", type=int, default=EXACT_LIMIT,
+                        help=f"IDs exatos por contagem antes do HyperLogLog (padrão: {EXACT_LIMIT})")
+    parser.add_argument("--json", default=None, help="grava os agregados (Partial) neste arquivo")
+    args = parser.parse_args(argv)
+
+    p = Path(args.arquivo)
+    partial, _, stats = stream_partial(p, stream_kind(p.name), args.chunk_rows, args.exact_limit)
+    print(f"{p.name}: {stats.linhas:,} linhas em {stats.blocos} blocos • {partial.respondentes:,} respondentes • "
+          f"{stats.aproximadas}/{stats.contagens} contagens estimadas (HyperLogLog) • "
+          f"agregados {stats.agregados_mb} MB • pico de RSS {stats.pico_mb or 0:.0f} MB ({stats.segundos}s)")
+    if args.json:
+        Path(args.json).write_text(json.dumps(partial.to_json(), ensure_ascii=False), "utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
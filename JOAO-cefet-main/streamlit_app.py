@@ -1,15 +1,42 @@
-import io
 import re
-import unicodedata
+import threading
+import uuid
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-import requests
 import streamlit as st
 
+from aggregation import n_respondents
+from bootstrap import BOOTSTRAP_RESAMPLES, CONFIDENCE
+from bundle import BundleMiss, KpiBundle, clear_bundles, fresh_bundle
+from compact import restore_ids
+from column_index import column_index, normalize_text
+from compare import compare_base, compare_counts, compare_likert, source_summary
+from crosstab import MIN_CELL
+from datasets import DATASETS, GITHUB_FILES, Dataset, clear_datasets, load_many, load_path, load_upload, load_url
+from exports import MIME, clear_exports, export_dataset, export_tables
+from figures import cached_figure, clear_figures
+from kpi_registry import FRASES, ID_CANDIDATES, LIKERT_BLOCKS, likert_block_columns
+from kpis import (
+    CROSSTAB_DIMENSIONS, CROSSTAB_KPIS, KPI_COUNT_LABELS, RELIABILITY_ALL, TOP_N, base_metrics, frase_indices,
+    ingresso_index, kpi_column, kpi_cooccurrence, kpi_count_tables, kpi_counts, kpi_counts_top, kpi_crosstab,
+    kpi_export_sheets, likert_block_spec, likert_crosstab, likert_intervals, likert_reliability, reliability_summary,
+)
+from likert_codec import LIKERT_LABELS, likert_codes
+from likert_codec import parse_likert_value as _parse_likert_value
+from memo import cache_stats, dataset_fingerprint, respondent_codes
+import perf
+from perf import probe, probed
+from partials import attached_partial
+from segments import SEGMENT_DIMENSIONS, bitmap_index, segment_view
+from streaming import clear_streamed, stream_stats, stream_upload
+from waves import WaveStore, clear_wave_frames
+from workbook_cache import cache_info, cache_size, clear_cache
+
 # -----------------------------------------------------------------------------
 # CONFIG
 # -----------------------------------------------------------------------------
@@ -23,13 +50,7 @@ st.set_page_config(
 # ADD-ONLY – NUNCA remover KPIs, abas ou funções sem autorização
 ADD_ONLY = True
 
-# URLs de dados no GitHub (Raw)
-GITHUB_FILES = {
-    "dados_cefet.xlsx":
-        "https://raw.githubusercontent.com/Totishuro/JOAO-cefet/main/JOAO-cefet-main/data/dados_cefet.xlsx",
-    "Dados CEFET_MG (Sem dados pessoais).xlsx":
-        "https://raw.githubusercontent.com/Totishuro/JOAO-cefet/main/JOAO-cefet-main/data/Dados%20CEFET_MG%20-%20Sem%20dados%20pessoais%20(2).xlsx",
-}
+# URLs de dados no GitHub (Raw): GITHUB_FILES em datasets.py
 
 # Arquivo local de demonstração (deve existir no repositório)
 LOCAL_DEMO = Path("data/dados_cefet.xlsx")
@@ -37,16 +58,7 @@ LOCAL_DEMO = Path("data/dados_cefet.xlsx")
 # -----------------------------------------------------------------------------
 # REGRAS OBRIGATÓRIAS (RESUMO)
 # -----------------------------------------------------------------------------
-LIKERT_LABELS = ["1 Muito ruim", "2 Ruim", "3 Razoável", "4 Boa", "5 Excelente"]
-LIKERT_NEUTROS = {"Não observado", "Nao observado", "Não se aplica", "Nao se aplica", "NA", "N/A", ""}
-LIKERT_TO_1_5 = {
-    "1": 1, "muitoruim": 1, "muito ruim": 1,
-    "2": 2, "ruim": 2,
-    "3": 3, "razoavel": 3, "razoável": 3,
-    "4": 4, "boa": 4,
-    "5": 5, "excelente": 5,
-}
-LIKERT_TO_INDEX = {1: 20, 2: 40, 3: 60, 4: 80, 5: 100}
+# Escala, neutros e mapeamentos: ver likert_codec.py
 LIKERT_COLORS = {
     "1 Muito ruim": "#ff4d4f",
     "2 Ruim": "#ffa940",
@@ -55,48 +67,28 @@ LIKERT_COLORS = {
     "5 Excelente": "#36cfc9",
 }
 
-ID_CANDIDATES = [
-    "Respondent ID", "respondent_id", "respondente_id", "id_respondente",
-    "respondentid", "idrespondente"
-]
+# ID_CANDIDATES e os keywords de cada KPI: ver kpi_registry.py
 
 # -----------------------------------------------------------------------------
 # UTILITÁRIAS
 # -----------------------------------------------------------------------------
-def normalize_text(s: str) -> str:
-    if not isinstance(s, str):
-        s = str(s)
-    s = s.strip().lower()
-    s = ''.join(ch for ch in unicodedata.normalize('NFD', s) if unicodedata.category(ch) != 'Mn')
-    return s
+# normalize_text vem de column_index (memoizada)
 
 def contains_all(haystack: str, *needles: str) -> bool:
     h = normalize_text(haystack)
     return all(normalize_text(n) in h for n in needles)
 
 def find_cols(df: pd.DataFrame, *keywords, require_all=True):
-    cols = []
-    for c in df.columns:
-        ok = contains_all(c, *keywords) if require_all else any(normalize_text(k) in normalize_text(c) for k in keywords)
-        if ok:
-            cols.append(c)
-    return cols
+    # resolvido pelo ColumnIndex do esquema (normalização + memo por consulta)
+    return column_index(df).find_cols(*keywords, require_all=require_all)
 
 def find_first(df: pd.DataFrame, *keywords, require_all=True):
-    cols = find_cols(df, *keywords, require_all=require_all)
-    return cols[0] if cols else None
+    return column_index(df).find_first(*keywords, require_all=require_all)
 
 def find_respondent_id_col(df: pd.DataFrame) -> str:
-    # 1) candidatos exatos
-    norm_map = {normalize_text(c): c for c in df.columns}
-    for c in ID_CANDIDATES:
-        if normalize_text(c) in norm_map:
-            return norm_map[normalize_text(c)]
-    # 2) heurística
-    for c in df.columns:
-        n = normalize_text(c)
-        if "respondent" in n or "respondente" in n:
-            return c
+    col = column_index(df).find_respondent_id(ID_CANDIDATES)
+    if col is not None:
+        return col
     raise ValueError("Coluna de ID do respondente não encontrada. Candidatos esperados: " + ", ".join(ID_CANDIDATES))
 
 def distinct_count(series: pd.Series, df: pd.DataFrame, id_col: str) -> int:
@@ -104,25 +96,17 @@ def distinct_count(series: pd.Series, df: pd.DataFrame, id_col: str) -> int:
     return df.loc[mask, id_col].nunique()
 
 def parse_likert_value(v) -> int | None:
-    if pd.isna(v):
-        return None
-    s = normalize_text(str(v))
-    if s in normalize_text("|".join(LIKERT_NEUTROS)):
-        return None
-    # Formatos: "4 - Boa", "4 Boa", "Boa", "4"
-    # tenta número na frente
-    m = re.match(r"^\s*([1-5])", s)
-    if m:
-        return int(m.group(1))
-    # tenta mapeamento textual
-    return LIKERT_TO_1_5.get(s)
-
-def likert_index(series: pd.Series) -> float | None:
-    values_1_5 = [parse_likert_value(v) for v in series if parse_likert_value(v) is not None]
-    if not values_1_5:
-        return None
-    indexes = [LIKERT_TO_INDEX[v] for v in values_1_5]
-    return float(np.mean(indexes))
+    # neutros comparados por igualdade (após normalizar), nunca por substring
+    return _parse_likert_value(v)
+
+def current_theme() -> str:
+    return st.get_option("theme.base") or "dark"
+
+def plot_kpi(kpi_id: str, df: pd.DataFrame, build, *state):
+    # spec cacheada por (KPI, fingerprint, estado dos filtros, tema): build() só roda em miss
+    fig = cached_figure(kpi_id, df, build, state, current_theme())
+    with probe(f"render:{kpi_id}", "render"):
+        st.plotly_chart(fig, use_container_width=True)
 
 def base_layout():
     # Herda fundo do app (transparente) e ajusta contraste
@@ -142,6 +126,7 @@ def base_layout():
 
 
 
+@lru_cache(maxsize=8192)
 def wrap(text: str, width: int = 28) -> str:
     if not isinstance(text, str):
         text = str(text)
@@ -173,6 +158,95 @@ def barh_from_counts(df_counts: pd.DataFrame, y_col: str, x_col: str, color="#34
     fig.update_layout(**base_layout(), height=dynamic_height(len(df_counts)))
     return fig
 
+def top_n() -> int:
+    return int(st.session_state.get("top_n", TOP_N))
+
+def plot_top_counts(kpi_id: str, df: pd.DataFrame, id_col: str, key: str, label: str, color: str,
+                    of_total: bool = False, ascending: bool = True, tail: bool = True) -> pd.DataFrame | None:
+    # top-N + "Outros" montados no servidor: o gráfico tem no máximo N+1 barras
+    # seja qual for a cardinalidade; a cauda vai para uma tabela paginada
+    hit = kpi_counts_top(df, id_col, key, label, of_total, top_n())
+    if hit is None:
+        return None
+    head, rest = hit
+    def build():
+        if rest.empty:
+            return barh_from_counts(head.sort_values("Respondentes", ascending=ascending), label, "Respondentes", color=color)
+        bars = head.iloc[:-1].sort_values("Respondentes", ascending=ascending)
+        others = head.iloc[-1:]  # "Outros" fica na ponta das menores
+        bars = pd.concat([others, bars] if ascending else [bars, others], ignore_index=True)
+        return barh_from_counts(bars, label, "Respondentes", color=color)
+    plot_kpi(kpi_id, df, build, top_n())
+    if tail and not rest.empty:
+        with st.expander(f"📋 {head[label].iloc[-1]} — categorias agrupadas"):
+            paged_table(kpi_id, rest, label)
+    return head
+
+PAGE_ROWS = 50
+
+def paged_table(key: str, table: pd.DataFrame, search_col: str):
+    # busca e paginação no servidor: só a página visível vai para o navegador
+    if len(table) <= PAGE_ROWS:
+        st.dataframe(table, hide_index=True, use_container_width=True)
+        return
+    # sem st.columns: a tabela pode estar dentro de colunas (permanência/evasão)
+    query = st.text_input("🔎 Buscar", key=f"busca:{key}", placeholder=f"Filtrar por {search_col.lower()}")
+    if query:
+        needle = normalize_text(query)
+        table = table[table[search_col].astype(str).map(normalize_text).str.contains(needle, regex=False)]
+    pages = max(1, -(-len(table) // PAGE_ROWS))
+    if st.session_state.get(f"pagina:{key}", 1) > pages:  # a busca encolheu a tabela
+        st.session_state[f"pagina:{key}"] = 1
+    page = st.number_input("Página", min_value=1, max_value=pages, value=1, step=1, key=f"pagina:{key}")
+    st.dataframe(table.iloc[(page - 1) * PAGE_ROWS:page * PAGE_ROWS], hide_index=True, use_container_width=True)
+    st.caption(f"{len(table):,} linha(s) • página {page} de {pages}")
+
+HEATMAP_MAX_CELLS = 10_000  # teto do payload: células enviadas ao navegador por heatmap
+HEATMAP_MAX_HEIGHT = 1200
+
+def ci_label() -> str:
+    return f"IC {CONFIDENCE:.0%} (bootstrap, {BOOTSTRAP_RESAMPLES:,} reamostras)"
+
+def index_ci_bars(labels, ci: pd.DataFrame, color="#2980b9"):
+    # índice 0–100 por item com o intervalo de confiança como barra de erro
+    fig = go.Figure(go.Bar(
+        y=[wrap(x) for x in labels],
+        x=ci["Indice"],
+        orientation="h",
+        marker_color=color,
+        text=[f"{v:.1f}" for v in ci["Indice"]],
+        textposition="inside",
+        error_x=dict(type="data", symmetric=False, array=(ci["IC superior"] - ci["Indice"]).round(1),
+                     arrayminus=(ci["Indice"] - ci["IC inferior"]).round(1)),
+        customdata=ci[["IC inferior", "IC superior"]].to_numpy(),
+        hovertemplate="%{y}<br>Índice %{x:.1f} (IC %{customdata[0]:.1f}–%{customdata[1]:.1f})<extra></extra>",
+    ))
+    fig.update_layout(**base_layout(), height=dynamic_height(len(labels)))
+    fig.update_layout(xaxis_range=[0, 100], xaxis_title=f"Índice 0–100 • {ci_label()}")
+    return fig
+
+def cooccurrence_expander(key: str, df: pd.DataFrame, id_col: str):
+    # múltipla escolha: quem marcou a opção da linha também marcou a da coluna (%)
+    co = kpi_cooccurrence(df, id_col, key, True)
+    if co is None:
+        return
+    with st.expander("🔗 Coocorrência entre opções"):
+        if len(co) > top_n():
+            # só as N opções mais marcadas (o payload cresce com o quadrado das opções)
+            label = KPI_COUNT_LABELS[key][0]
+            top = set(kpi_counts(df, id_col, key, label, True).nlargest(top_n(), "Respondentes")[label])
+            st.caption(f"As {top_n()} opções mais marcadas de {len(co):,}.")
+            co = co.loc[[o for o in co.index if o in top], [o for o in co.columns if o in top]]
+        def build():
+            fig = go.Figure(data=go.Heatmap(
+                z=co.values, x=[wrap(c, 18) for c in co.columns], y=[wrap(i) for i in co.index],
+                colorscale="Blues", zmin=0, zmax=100, text=co.values, texttemplate="%{text:.0f}%",
+                hovertemplate="%{y} → %{x}: %{z:.1f}%<extra></extra>",
+            ))
+            fig.update_layout(**base_layout(), height=dynamic_height(len(co.index)))
+            return fig
+        plot_kpi(f"coocorrencia:{key}", df, build, top_n())
+
 def likert_stack(df_matrix: pd.DataFrame, pergunta: str):
     row = df_matrix[df_matrix["Pergunta"] == pergunta]
     if row.empty:
@@ -197,66 +271,60 @@ def likert_stack(df_matrix: pd.DataFrame, pergunta: str):
     )
     return fig
 
-def likert_matrix(df: pd.DataFrame, mapping: dict, id_col: str) -> pd.DataFrame:
-    """
-    mapping: { "Rótulo curto na tela": "nome da coluna no df" }
-    Retorna linhas com: Pergunta, Resposta (1..5 label), Contagem, Percentual, Total
-    """
-    out = []
-    for display, col in mapping.items():
-        if col not in df.columns:
-            continue
-        # filtra neutros
-        mask_valid = df[col].notna() & (~df[col].isin(LIKERT_NEUTROS))
-        tmp = df.loc[mask_valid, [col, id_col]].copy()
-        if tmp.empty:
-            continue
-        # conta respondentes distintos por valor
-        counts = tmp.groupby(col)[id_col].nunique()
-        # normaliza ordem
-        # converte valores para labels padronizados quando possível
-        order = []
-        for lab in LIKERT_LABELS:
-            # aceita ambos “4 Boa” e “4 - Boa”
-            order.append(lab)
-        # para percentuais, usa total de respondentes válidos (distintos)
-        total = tmp[id_col].nunique()
-        for lab in order:
-            # soma todos que “batem” com o lab pelo número 1..5
-            n = parse_likert_value(lab.split()[0])  # 1..5
-            # soma contagens cujos valores do df correspondam a esse n
-            matching = [idx for idx in counts.index if parse_likert_value(idx) == n]
-            c = int(sum(counts.loc[matching])) if matching else 0
-            p = round((c / total * 100), 1) if total else 0.0
-            out.append(dict(Pergunta=display, Resposta=lab, Contagem=c, Percentual=p, Total=total))
-    return pd.DataFrame(out)
-
 # -----------------------------------------------------------------------------
 # CARREGAMENTO DE DADOS (GitHub + Upload + Local demo)
 # -----------------------------------------------------------------------------
-@st.cache_data(show_spinner=False)
-def load_from_github(url: str) -> pd.DataFrame | None:
+# Todas as leituras passam por read_workbook: o Excel só é interpretado na
+# primeira vez; depois o arquivo Arrow em .cache/workbooks é mapeado em memória.
+# O download é condicional (ETag/Last-Modified em .cache/http): revalidar é barato,
+# então a URL é conferida de tempos em tempos.
+# O dataset pronto (já compacto) fica no cache compartilhado do processo
+# (datasets.DATASETS): todas as sessões recebem o mesmo objeto, sem cópias.
+@probed("carga:github", "carga")
+def load_from_github(url: str, projected: bool = False, nrows: int | None = None,
+                     compact: bool = False) -> Dataset | None:
     try:
-        r = requests.get(url, timeout=30)
-        r.raise_for_status()
-        return pd.read_excel(io.BytesIO(r.content), engine="openpyxl")
+        ds = load_url(url, projected=projected, nrows=nrows, compact=compact)
+        if ds.status == "offline":
+            st.warning("⚠️ GitHub inacessível — usando a última cópia baixada.")
+        return ds
     except Exception as e:
         st.error(f"❌ Erro ao baixar do GitHub: {e}")
         return None
 
-@st.cache_data(show_spinner=False)
-def load_from_upload(uploaded) -> pd.DataFrame | None:
+@probed("carga:upload", "carga")
+def load_from_upload(uploaded, projected: bool = False, nrows: int | None = None,
+                     compact: bool = False) -> Dataset | None:
     try:
-        return pd.read_excel(uploaded, engine="openpyxl")
+        return load_upload(uploaded, projected=projected, nrows=nrows, compact=compact)
     except Exception as e:
         st.error(f"❌ Erro ao ler upload: {e}")
         return None
 
-@st.cache_data(show_spinner=False)
-def load_from_local(p: Path) -> pd.DataFrame | None:
+@probed("carga:blocos", "carga")
+def load_from_stream(uploaded) -> Dataset | None:
+    # leitura em blocos: só os agregados ficam em memória (streaming.py)
+    try:
+        return stream_upload(uploaded)
+    except Exception as e:
+        st.error(f"❌ Erro na ingestão em blocos: {e}")
+        return None
+
+@probed("carga:ondas", "carga")
+def load_from_waves(store: WaveStore, projected: bool = False, compact: bool = False) -> Dataset | None:
+    # linhas de todas as ondas; contagens e somas Likert vêm dos agregados do acervo
+    try:
+        return store.dataset(projected=projected, compact=compact)
+    except Exception as e:
+        st.error(f"❌ Erro ao abrir o acervo de ondas: {e}")
+        return None
+
+@probed("carga:local", "carga")
+def load_from_local(p: Path, projected: bool = False, nrows: int | None = None,
+                    compact: bool = False) -> Dataset | None:
     try:
         if p.exists():
-            return pd.read_excel(p, engine="openpyxl")
+            return load_path(p, projected=projected, nrows=nrows, compact=compact)
         return None
     except Exception as e:
         st.error(f"❌ Erro ao ler arquivo local: {e}")
@@ -267,32 +335,17 @@ def load_from_local(p: Path) -> pd.DataFrame | None:
 # -----------------------------------------------------------------------------
 def kpi_base(df: pd.DataFrame, id_col: str):
     st.subheader("📌 Base")
-    total = df[id_col].nunique()
+    m = base_metrics(df, id_col)
     c1, c2, c3, c4 = st.columns(4)
     with c1:
-        st.metric("📝 Total de Respondentes", f"{total:,}")
-
-    idade_col = find_first(df, "idade")
+        st.metric("📝 Total de Respondentes", f"{m['total']:,}")
     with c2:
-        if idade_col is not None:
-            ages = pd.to_numeric(df[idade_col], errors="coerce")
-            st.metric("👤 Idade média", f"{ages.mean():.1f} anos" if ages.notna().any() else "N/A")
-        else:
-            st.metric("👤 Idade média", "N/A")
-
-    ies_col = find_first(df, "instituicao", "ensino", require_all=True) or find_first(df, "ies", require_all=False)
+        st.metric("👤 Idade média", f"{m['idade_media']:.1f} anos" if m["idade_media"] is not None else "N/A")
     with c3:
-        if ies_col:
-            st.metric("🏛️ IES únicas", df[ies_col].nunique())
-        else:
-            st.metric("🏛️ IES únicas", "N/A")
-
-    fundador_col = find_first(df, "socio") or find_first(df, "fundador")
+        st.metric("🏛️ IES únicas", m["ies_unicas"] if m["ies_unicas"] is not None else "N/A")
     with c4:
-        if fundador_col:
-            fund = df.loc[df[fundador_col].astype(str).str.lower().str.contains("sim"), id_col].nunique()
-            pct = (fund / total * 100) if total else 0
-            st.metric("🚀 Fundadores / Sócios", f"{fund} ({pct:.1f}%)")
+        if m["fundadores"] is not None:
+            st.metric("🚀 Fundadores / Sócios", f"{m['fundadores']} ({m['fundadores_pct']:.1f}%)")
         else:
             st.metric("🚀 Fundadores / Sócios", "N/A")
 
@@ -302,48 +355,43 @@ def kpi_perfil(df: pd.DataFrame, id_col: str):
 
     # VOCE É
     with c1:
-        voce_col = find_first(df, "voce", "e")
-        if voce_col:
-            counts = df.groupby(voce_col)[id_col].nunique().reset_index().rename(columns={voce_col: "Perfil", id_col: "Respondentes"})
-            counts["%"] = (counts["Respondentes"] / counts["Respondentes"].sum() * 100).round(1)
-            fig = barh_from_counts(counts.sort_values("Respondentes", ascending=True), "Perfil", "Respondentes", color="#667eea")
-            st.plotly_chart(fig, use_container_width=True)
-            st.dataframe(counts, hide_index=True, use_container_width=True)
+        counts = kpi_counts(df, id_col, "perfil", "Perfil")
+        if counts is not None:
+            plot_top_counts("perfil", df, id_col, "perfil", "Perfil", "#667eea", tail=False)
+            paged_table("perfil", counts, "Perfil")
         else:
             st.info("📎 Coluna de perfil (\"Você é\") não encontrada.")
 
     # Idade (faixas)
     with c2:
-        idade_col = find_first(df, "idade")
-        if idade_col:
-            t = df[[idade_col, id_col]].copy()
-            t[idade_col] = pd.to_numeric(t[idade_col], errors="coerce")
-            t["Faixa"] = pd.cut(t[idade_col], bins=[0, 19, 25, 30, 120], labels=["Até 19", "20–25", "26–30", "31+"])
-            counts = t.groupby("Faixa")[id_col].nunique().reset_index().rename(columns={id_col: "Respondentes"})
-            counts["%"] = (counts["Respondentes"] / counts["Respondentes"].sum() * 100).round(1)
-            fig = go.Figure([
-                go.Bar(
-                    x=counts["Faixa"],
-                    y=counts["Respondentes"],
-                    text=[f"{r} ({p}%)" for r, p in zip(counts["Respondentes"], counts["%"])],
-                    textposition="outside",
-                    marker_color="#764ba2"
+        counts = kpi_counts(df, id_col, "faixa", "Faixa")
+        if counts is not None:
+            def build():
+                fig = go.Figure([
+                    go.Bar(
+                        x=counts["Faixa"],
+                        y=counts["Respondentes"],
+                        text=[f"{r} ({p}%)" for r, p in zip(counts["Respondentes"], counts["%"])],
+                        textposition="outside",
+                        marker_color="#764ba2"
+                    )
+                ])
+
+                # Evita conflito de kwargs: duas chamadas
+                fig.update_layout(**base_layout())
+                fig.update_layout(
+                    height=420,
+                    margin=dict(l=40, r=20, t=40, b=120),
+                    xaxis=dict(automargin=True, tickangle=-30)
                 )
-            ])
-                    
-            # Evita conflito de kwargs: duas chamadas
-            fig.update_layout(**base_layout())
-            fig.update_layout(
-                height=420,
-                margin=dict(l=40, r=20, t=40, b=120),
-                xaxis=dict(automargin=True, tickangle=-30)
-            )
-                    
-            # Não cortar texto “outside” e dar folga no topo
-            fig.update_traces(cliponaxis=False)
-            fig.update_yaxes(range=[0, max(1, counts["Respondentes"].max() * 1.18)], automargin=True)
-            
-            st.plotly_chart(fig, use_container_width=True)
+
+                # Não cortar texto “outside” e dar folga no topo
+                fig.update_traces(cliponaxis=False)
+                fig.update_yaxes(range=[0, max(1, counts["Respondentes"].max() * 1.18)], automargin=True)
+
+                return fig
+
+            plot_kpi("faixa", df, build)
 
             st.dataframe(counts, hide_index=True, use_container_width=True)
         else:
@@ -351,147 +399,134 @@ def kpi_perfil(df: pd.DataFrame, id_col: str):
 
     # Grau
     st.markdown("### 🎓 Grau de formação")
-    grau_col = find_first(df, "grau", "graduacao", require_all=False)
-    if grau_col:
-        counts = df.groupby(grau_col)[id_col].nunique().reset_index().rename(columns={grau_col: "Grau", id_col: "Respondentes"})
-        counts["%"] = (counts["Respondentes"] / counts["Respondentes"].sum() * 100).round(1)
-        st.plotly_chart(barh_from_counts(counts.sort_values("Respondentes", ascending=True), "Grau", "Respondentes", color="#f39c12"), use_container_width=True)
-        st.dataframe(counts, hide_index=True, use_container_width=True)
+    counts = kpi_counts(df, id_col, "grau", "Grau")
+    if counts is not None:
+        plot_top_counts("grau", df, id_col, "grau", "Grau", "#f39c12", tail=False)
+        paged_table("grau", counts, "Grau")
     else:
         st.info("📎 Coluna de grau não encontrada.")
 
     # IES
     st.markdown("### 🏛️ Instituições (IES)")
-    ies_col = find_first(df, "instituicao", "ensino", require_all=True) or find_first(df, "ies", require_all=False)
-    if ies_col:
-        counts = df.groupby(ies_col)[id_col].nunique().reset_index().rename(columns={ies_col: "IES", id_col: "Respondentes"})
-        counts["%"] = (counts["Respondentes"] / counts["Respondentes"].sum() * 100).round(1)
+    counts = kpi_counts(df, id_col, "ies", "IES")
+    if counts is not None:
         counts = counts.sort_values("Respondentes", ascending=False)
-        st.plotly_chart(barh_from_counts(counts, "IES", "Respondentes", color="#9b59b6"), use_container_width=True)
+        plot_top_counts("ies", df, id_col, "ies", "IES", "#9b59b6", ascending=False, tail=False)
         with st.expander("📋 Tabela completa"):
-            st.dataframe(counts, hide_index=True, use_container_width=True)
+            paged_table("ies", counts, "IES")
     else:
         st.info("📎 Coluna de IES não encontrada.")
 
 def kpi_cursos(df: pd.DataFrame, id_col: str):
     st.subheader("🎓 Cursos")
-    curso_col = find_first(df, "curso", "graduacao", require_all=False)
-    if curso_col:
-        counts = df.groupby(curso_col)[id_col].nunique().reset_index().rename(columns={curso_col: "Curso", id_col: "Respondentes"})
-        counts["%"] = (counts["Respondentes"] / counts["Respondentes"].sum() * 100).round(1)
-        top15 = counts.sort_values("Respondentes", ascending=False).head(15).sort_values("Respondentes")
-        st.plotly_chart(barh_from_counts(top15, "Curso", "Respondentes", color="#2ecc71"), use_container_width=True)
+    counts = kpi_counts(df, id_col, "curso", "Curso")
+    if counts is not None:
+        plot_top_counts("curso", df, id_col, "curso", "Curso", "#2ecc71", tail=False)
         with st.expander("📋 Ver todos os cursos"):
-            st.dataframe(counts.sort_values("Respondentes", ascending=False), hide_index=True, use_container_width=True)
+            paged_table("curso", counts.sort_values("Respondentes", ascending=False), "Curso")
     else:
         st.info("📎 Coluna de curso não encontrada.")
 
 def kpi_emp_rela(df: pd.DataFrame, id_col: str):
     st.subheader("🚀 Empreendedorismo – Conceitos, Fundadores, Projetos")
     # Conceitos (múltipla ou single)
-    conceitos_col = find_first(df, "o que voce entende como empreendedorismo")
-    if conceitos_col:
-        counts = df.groupby(conceitos_col)[id_col].nunique().reset_index().rename(columns={conceitos_col: "Conceito", id_col: "Respondentes"})
-        counts["%"] = (counts["Respondentes"] / df[id_col].nunique() * 100).round(1)
-        st.plotly_chart(barh_from_counts(counts.sort_values("Respondentes", ascending=True), "Conceito", "Respondentes", color="#3498db"), use_container_width=True)
+    counts = kpi_counts(df, id_col, "conceitos", "Conceito", of_total=True)
+    if counts is not None:
+        plot_top_counts("conceitos", df, id_col, "conceitos", "Conceito", "#3498db", of_total=True)
+        cooccurrence_expander("conceitos", df, id_col)
     else:
         st.info("📎 Coluna de 'conceitos de empreendedorismo' não encontrada.")
 
     # Fundadores
-    fundador_col = find_first(df, "socio") or find_first(df, "fundador")
-    if fundador_col:
-        counts = df.groupby(fundador_col)[id_col].nunique().reset_index().rename(columns={fundador_col: "Resposta", id_col: "Respondentes"})
-        counts["%"] = (counts["Respondentes"] / df[id_col].nunique() * 100).round(1)
-        fig = go.Figure([go.Bar(x=counts["Resposta"], y=counts["Respondentes"], text=[f"{r} ({p}%)" for r, p in zip(counts["Respondentes"], counts["%"])], textposition="outside", marker_color="#e67e22")])
-        fig.update_layout(**base_layout(), height=400)
-        st.plotly_chart(fig, use_container_width=True)
-        fund = df.loc[df[fundador_col].astype(str).str.lower().str.contains("sim"), id_col].nunique()
-        pct = (fund / df[id_col].nunique() * 100) if df[id_col].nunique() else 0
-        st.metric("🎯 Total de Fundadores/Sócios", f"{fund} ({pct:.1f}%)")
+    counts = kpi_counts(df, id_col, "fundador", "Resposta", of_total=True)
+    if counts is not None:
+        def build():
+            fig = go.Figure([go.Bar(x=counts["Resposta"], y=counts["Respondentes"], text=[f"{r} ({p}%)" for r, p in zip(counts["Respondentes"], counts["%"])], textposition="outside", marker_color="#e67e22")])
+            fig.update_layout(**base_layout(), height=400)
+            return fig
+        plot_kpi("fundador", df, build)
+        m = base_metrics(df, id_col)
+        st.metric("🎯 Total de Fundadores/Sócios", f"{m['fundadores']} ({m['fundadores_pct']:.1f}%)")
     else:
         st.info("📎 Coluna de fundadores/sócios não encontrada.")
 
     # Projetos
-    projetos_col = find_first(df, "ao longo da sua graduacao, quais projetos voce ja participou")
-    if projetos_col:
-        counts = df.groupby(projetos_col)[id_col].nunique().reset_index().rename(columns={projetos_col: "Projeto", id_col: "Respondentes"})
-        counts["%"] = (counts["Respondentes"] / df[id_col].nunique() * 100).round(1)
-        st.plotly_chart(barh_from_counts(counts.sort_values("Respondentes", ascending=True), "Projeto", "Respondentes", color="#16a085"), use_container_width=True)
+    counts = kpi_counts(df, id_col, "projetos", "Projeto", of_total=True)
+    if counts is not None:
+        plot_top_counts("projetos", df, id_col, "projetos", "Projeto", "#16a085", of_total=True)
+        cooccurrence_expander("projetos", df, id_col)
     else:
         st.info("📎 Coluna de projetos não encontrada.")
 
-def kpi_likert_block(df: pd.DataFrame, id_col: str, title: str, detect_keywords: list[str], prefix_label: str):
+def kpi_likert_block(df: pd.DataFrame, id_col: str, title: str, detect_keywords: list[str], prefix_label: str,
+                     classe: str | None = None):
     st.subheader(title)
-    # pega colunas que atendem aos keywords (todas)
-    cols = []
-    for c in df.columns:
-        if all(normalize_text(k) in normalize_text(c) for k in detect_keywords):
-            cols.append(c)
-    if not cols:
+    # colunas da classe no CSV de classificação + as que atendem aos keywords (todas)
+    mapping, df_matrix = likert_block_spec(df, id_col, detect_keywords, prefix_label, classe)
+    if not mapping:
         st.info("📎 Nenhuma coluna encontrada para este bloco.")
         return
-    # mapping display -> col
-    mapping = {}
-    for c in cols:
-        # tenta usar o “sufixo” mais legível
-        # pega tudo após o último fechamento de aspas ou depois do último ponto de interrogação
-        text = c
-        if "?" in text:
-            text = text.split("?")[-1]
-        text = text.replace("Caso não saiba avaliar", "").replace("Caso nao saiba avaliar", "")
-        text = text.strip(" :-—–")
-        text = re.sub(r'\s+', ' ', text).strip()
-        display = f"{prefix_label}: {text}" if text else c
-        mapping[display] = c
-
-    df_matrix = likert_matrix(df, mapping, id_col)
     if df_matrix.empty:
         st.info("Sem dados válidos (após remover neutros).")
         return
 
-    # Heatmap (matriz)
-    pivot = df_matrix.pivot(index="Pergunta", columns="Resposta", values="Percentual").reindex(columns=LIKERT_LABELS)
-    fig = go.Figure(data=go.Heatmap(
-        z=pivot.values,
-        x=pivot.columns,
-        y=[wrap(x) for x in pivot.index],
-        colorscale=[
-            [0, LIKERT_COLORS["1 Muito ruim"]],
-            [0.25, LIKERT_COLORS["2 Ruim"]],
-            [0.5, LIKERT_COLORS["3 Razoável"]],
-            [0.75, LIKERT_COLORS["4 Boa"]],
-            [1, LIKERT_COLORS["5 Excelente"]],
-        ],
-        text=pivot.values,
-        texttemplate="%{text:.1f}%",
-        hoverongaps=False,
-    ))
-    fig.update_layout(**base_layout(), height=dynamic_height(len(pivot.index)), margin=dict(l=240, r=20, t=40, b=60))
-    st.plotly_chart(fig, use_container_width=True)
+    # Heatmap (matriz); o intervalo de cada percentual aparece no hover
+    def build():
+        pivot = df_matrix.pivot(index="Pergunta", columns="Resposta", values="Percentual").reindex(columns=LIKERT_LABELS)
+        bounds = np.dstack([
+            df_matrix.pivot(index="Pergunta", columns="Resposta", values=c).reindex(index=pivot.index, columns=LIKERT_LABELS).values
+            for c in ("IC inferior", "IC superior")
+        ])
+        fig = go.Figure(data=go.Heatmap(
+            z=pivot.values,
+            x=pivot.columns,
+            y=[wrap(x) for x in pivot.index],
+            colorscale=[
+                [0, LIKERT_COLORS["1 Muito ruim"]],
+                [0.25, LIKERT_COLORS["2 Ruim"]],
+                [0.5, LIKERT_COLORS["3 Razoável"]],
+                [0.75, LIKERT_COLORS["4 Boa"]],
+                [1, LIKERT_COLORS["5 Excelente"]],
+            ],
+            text=pivot.values,
+            texttemplate="%{text:.1f}%",
+            customdata=bounds,
+            hovertemplate="%{y}<br>%{x}: %{z:.1f}% (IC %{customdata[0]:.1f}–%{customdata[1]:.1f}%)<extra></extra>",
+            hoverongaps=False,
+        ))
+        fig.update_layout(**base_layout(), height=dynamic_height(len(pivot.index)), margin=dict(l=240, r=20, t=40, b=60))
+        return fig
+    plot_kpi(f"likert:{prefix_label}", df, build, tuple(mapping.items()))
+
+    # Índice 0–100 por item com intervalo de confiança
+    ci = likert_intervals(df, tuple(mapping.values())).dropna(subset=["Indice"])
+    if not ci.empty:
+        labels = {col: display for display, col in mapping.items()}
+        plot_kpi(f"likert_ic:{prefix_label}", df, lambda: index_ci_bars([labels[c] for c in ci["Coluna"]], ci),
+                 tuple(mapping.items()))
 
 def kpi_frases_likert(df: pd.DataFrame, id_col: str, title: str, *phrases):
     st.subheader(title)
-    found = []
-    for p in phrases:
-        col = find_first(df, p)
-        if col:
-            found.append((p, col))
+    # um único passo vetorizado para todas as frases
+    found = frase_indices(df, phrases)
     if not found:
         st.info("📎 Nenhuma coluna dessas frases foi encontrada.")
         return
     metrics = []
-    for _, col in found:
-        idx = likert_index(df[col])
-        if idx is not None:
+    for col, idx in found:
+        if not np.isnan(idx):
             label = re.sub(r'^\W+|"', "", col).strip()
-            metrics.append((label, idx))
+            metrics.append((label, float(idx)))
     if not metrics:
         st.info("Sem dados válidos (após remover neutros).")
         return
+    ci = likert_intervals(df, tuple(col for col, _ in found)).dropna(subset=["Indice"])
     cols = st.columns(min(4, len(metrics)))
-    for i, (label, val) in enumerate(metrics):
+    for i, ((label, val), (low, high)) in enumerate(zip(metrics, zip(ci["IC inferior"], ci["IC superior"]))):
         with cols[i % len(cols)]:
-            st.metric(wrap(label, 30).replace("<br>", " "), f"{val:.1f}/100")
+            st.metric(wrap(label, 30).replace("<br>", " "), f"{val:.1f}/100",
+                      help=f"{ci_label()}: {low:.1f}–{high:.1f}")
+    plot_kpi(f"frases_ic:{title}", df, lambda: index_ci_bars([label for label, _ in metrics], ci), phrases)
 
 def kpi_permanencia_evasao(df: pd.DataFrame, id_col: str):
     st.subheader("🎓 Permanência e Evasão")
@@ -499,40 +534,381 @@ def kpi_permanencia_evasao(df: pd.DataFrame, id_col: str):
 
     # Permanência
     with c1:
-        col = find_first(df, "quais motivos voce considera que te fazem permanecer")
-        if col:
-            counts = df.groupby(col)[id_col].nunique().reset_index().rename(columns={col: "Motivo", id_col: "Respondentes"})
-            counts["%"] = (counts["Respondentes"] / df[id_col].nunique() * 100).round(1)
-            st.plotly_chart(barh_from_counts(counts.sort_values("Respondentes", ascending=True), "Motivo", "Respondentes", color="#2ecc71"), use_container_width=True)
+        counts = kpi_counts(df, id_col, "permanencia", "Motivo", of_total=True)
+        if counts is not None:
+            plot_top_counts("permanencia", df, id_col, "permanencia", "Motivo", "#2ecc71", of_total=True, tail=False)
             with st.expander("📋 Tabela"):
-                st.dataframe(counts, hide_index=True, use_container_width=True)
+                paged_table("permanencia", counts, "Motivo")
+            cooccurrence_expander("permanencia", df, id_col)
         else:
             st.info("📎 Coluna de permanência não encontrada.")
 
     # Evasão
     with c2:
-        col = find_first(df, "quais motivos voce considera que te fariam deixar")
-        if col:
-            counts = df.groupby(col)[id_col].nunique().reset_index().rename(columns={col: "Motivo", id_col: "Respondentes"})
-            counts["%"] = (counts["Respondentes"] / df[id_col].nunique() * 100).round(1)
-            st.plotly_chart(barh_from_counts(counts.sort_values("Respondentes", ascending=True), "Motivo", "Respondentes", color="#e74c3c"), use_container_width=True)
+        counts = kpi_counts(df, id_col, "evasao", "Motivo", of_total=True)
+        if counts is not None:
+            plot_top_counts("evasao", df, id_col, "evasao", "Motivo", "#e74c3c", of_total=True, tail=False)
             with st.expander("📋 Tabela"):
-                st.dataframe(counts, hide_index=True, use_container_width=True)
+                paged_table("evasao", counts, "Motivo")
+            cooccurrence_expander("evasao", df, id_col)
         else:
             st.info("📎 Coluna de evasão não encontrada.")
 
     # Evasão (colegas)
     st.markdown("### 👥 Evasão de colegas")
-    col = find_first(df, "voce possui colegas que deixaram a instituicao de ensino superior sem concluir o curso")
-    if col:
-        counts = df.groupby(col)[id_col].nunique().reset_index().rename(columns={col: "Resposta", id_col: "Respondentes"})
-        counts["%"] = (counts["Respondentes"] / df[id_col].nunique() * 100).round(1)
-        fig = go.Figure([go.Pie(labels=counts["Resposta"], values=counts["Respondentes"], text=[f"{r} ({p}%)" for r, p in zip(counts["Respondentes"], counts["%"])], textinfo="label+text")])
-        fig.update_layout(**base_layout(), height=420)
-        st.plotly_chart(fig, use_container_width=True)
+    counts = kpi_counts(df, id_col, "evasao_colegas", "Resposta", of_total=True)
+    if counts is not None:
+        def build():
+            fig = go.Figure([go.Pie(labels=counts["Resposta"], values=counts["Respondentes"], text=[f"{r} ({p}%)" for r, p in zip(counts["Respondentes"], counts["%"])], textinfo="label+text")])
+            fig.update_layout(**base_layout(), height=420)
+            return fig
+        plot_kpi("evasao_colegas", df, build)
     else:
         st.info("📎 Coluna sobre evasão de colegas não encontrada.")
 
+# -----------------------------------------------------------------------------
+# NAVEGAÇÃO (uma função por seção; renderizadas como fragmentos isolados)
+# -----------------------------------------------------------------------------
+def secao_alunos(df: pd.DataFrame, id_col: str):
+    # Alunos – “O quanto as seguintes características estão presentes nos(as) ALUNOS(AS) ...”
+    kpi_likert_block(df, id_col, **LIKERT_BLOCKS["alunos"])
+    # Frase: "os(as) ALUNOS(AS) ... possuem postura empreendedora"
+    kpi_frases_likert(df, id_col, FRASES["alunos"][0], *FRASES["alunos"][1])
+
+def secao_professores(df: pd.DataFrame, id_col: str):
+    # Professores – características
+    kpi_likert_block(df, id_col, **LIKERT_BLOCKS["professores"])
+    # Frase: "os(as) PROFESSORES(AS) ... possuem postura empreendedora"
+    kpi_frases_likert(df, id_col, FRASES["professores"][0], *FRASES["professores"][1])
+    # Experiência / Acessíveis (distribuição)
+    for k in ["prof_experiencia", "prof_acessiveis"]:
+        counts = kpi_counts(df, id_col, k, "Resposta", of_total=True)
+        if counts is not None:
+            plot_top_counts(k, df, id_col, k, "Resposta", "#e67e22", of_total=True)
+
+def secao_infraestrutura(df: pd.DataFrame, id_col: str):
+    # PCD – “Como você avalia a qualidade da infraestrutura destinada à pessoas com deficiência ...”
+    kpi_likert_block(df, id_col, **LIKERT_BLOCKS["pcd"])
+    # Geral – “Como você avalia a qualidade da infraestrutura oferecida ...”
+    kpi_likert_block(df, id_col, **LIKERT_BLOCKS["infra"])
+    # Internet – “Como você avalia a qualidade da internet oferecida ...”
+    kpi_likert_block(df, id_col, **LIKERT_BLOCKS["internet"])
+
+def secao_metodologia(df: pd.DataFrame, id_col: str):
+    # Metodologia / Matriz / Casos
+    kpi_frases_likert(df, id_col, FRASES["metodologia"][0], *FRASES["metodologia"][1])
+
+def secao_ingresso(df: pd.DataFrame, id_col: str):
+    # Ingresso – influência
+    hit = ingresso_index(df)
+    if hit is not None:
+        idx = hit[1]
+        if idx is not None:
+            ci = likert_intervals(df, (hit[0],)).iloc[0]
+            st.metric("Influência da IES no ingresso", f"{idx:.1f}/100",
+                      help=f"{ci_label()}: {ci['IC inferior']:.1f}–{ci['IC superior']:.1f}")
+    else:
+        st.info("📎 Coluna de influência no ingresso não encontrada.")
+
+RELIABILITY_LABELS = {**{key: block["prefix_label"] for key, block in LIKERT_BLOCKS.items()},
+                      RELIABILITY_ALL: "Todos os itens Likert"}
+HEATMAP_TEXT_MAX = 25  # itens com valor escrito na célula; acima disso só no hover
+
+def secao_confiabilidade(df: pd.DataFrame, id_col: str):
+    st.subheader("🔗 Correlação entre itens e confiabilidade")
+    summary = reliability_summary(df)
+    if summary.empty:
+        if not isinstance(df, KpiBundle) and len(df) == 0 and attached_partial(df, id_col) is not None:
+            st.info("Ingestão em blocos: os agregados não guardam as respostas de cada linha, "
+                    "então correlações e alfa de Cronbach precisam dos dados completos.")
+        else:
+            st.info("📎 Nenhum bloco Likert com pelo menos dois itens.")
+        return
+    st.caption("Correlação de Pearson entre os níveis 1–5 de cada par de itens, usando as linhas que responderam "
+               "aos dois (neutros e ausentes ficam de fora). Alfa de Cronbach ≥ 0.7 costuma indicar consistência interna aceitável.")
+    st.dataframe(summary.assign(Bloco=summary["Bloco"].map(RELIABILITY_LABELS)), hide_index=True, use_container_width=True)
+
+    keys = list(summary["Bloco"])
+    key = st.selectbox("Bloco", keys, format_func=RELIABILITY_LABELS.get, key="confiabilidade_bloco")
+    rel = likert_reliability(df, key)
+    resumo = rel["resumo"]
+    c1, c2, c3 = st.columns(3)
+    alfa = lambda v: "—" if pd.isna(v) else f"{v:.3f}"
+    c1.metric("Alfa de Cronbach", alfa(resumo["alfa"]))
+    c2.metric("Alfa padronizado", alfa(resumo["alfa_padronizado"]))
+    c3.metric("Linhas completas", f"{resumo['completos']:,}",
+              help="Linhas com todos os itens do bloco respondidos; as correlações usam cada par disponível.")
+
+    corr = rel["correlacao"]
+    k_max = int(HEATMAP_MAX_CELLS ** 0.5)
+    if len(corr) > k_max:
+        st.caption(f"Heatmap com os primeiros {k_max} de {len(corr)} itens; a tabela item-total traz todos.")
+        corr = corr.iloc[:k_max, :k_max]
+    def build():
+        n = len(corr)
+        fig = go.Figure(data=go.Heatmap(
+            z=corr.values,
+            x=[wrap(c) for c in corr.columns],
+            y=[wrap(c) for c in corr.index],
+            zmin=-1, zmax=1, colorscale="RdBu", reversescale=True,
+            text=corr.values if n <= HEATMAP_TEXT_MAX else None,
+            texttemplate="%{text:.2f}" if n <= HEATMAP_TEXT_MAX else None,
+            hovertemplate="%{y}<br>%{x}<br>r = %{z:.3f}<extra></extra>",
+            hoverongaps=False,
+        ))
+        fig.update_layout(**base_layout(), height=min(dynamic_height(n), HEATMAP_MAX_HEIGHT),
+                          margin=dict(l=240, r=20, t=40, b=60))
+        fig.update_xaxes(showticklabels=n <= HEATMAP_TEXT_MAX)
+        fig.update_yaxes(autorange="reversed", showticklabels=n <= 2 * HEATMAP_TEXT_MAX)
+        return fig
+    plot_kpi(f"confiabilidade:{key}", df, build)
+
+    st.markdown("#### Item-total")
+    st.caption("Correlação de cada item com a soma dos demais e o alfa do bloco sem o item: "
+               "itens com correlação baixa ou que aumentam o alfa ao sair destoam do bloco.")
+    paged_table(f"confiabilidade:{key}", rel["itens"], "Item")
+
+def largest_groups(table: pd.DataFrame, base_col: str, n: int) -> pd.DataFrame:
+    # só os `n` grupos com maior base (suprimidas contam 0), na ordem original
+    sizes = table.groupby("Grupo", sort=False)[base_col].sum()
+    if len(sizes) <= n:
+        return table
+    return table[table["Grupo"].isin(sizes.nlargest(n).index)]
+
+def crosstab_heatmap(table: pd.DataFrame, rows: str, cols: str, value: str, colorscale, zmin: float, zmax: float,
+                     suffix: str = ""):
+    # células suprimidas ficam em branco; o hover mostra a base (respondentes)
+    base_col = "Respondentes" if rows == "Pergunta" else "Total do grupo"
+    table = largest_groups(table, base_col, top_n())
+    if cols != "Grupo":
+        # valores da KPI nas colunas: só os N com mais respondentes
+        top = table.groupby(cols, sort=False)["Respondentes"].sum().nlargest(top_n()).index
+        table = table[table[cols].isin(top)]
+    z = table.pivot(index=rows, columns=cols, values=value)
+    z = z.reindex(index=table[rows].drop_duplicates(), columns=table[cols].drop_duplicates())
+    z = z.iloc[:HEATMAP_MAX_CELLS // max(z.shape[1], 1)]
+    base = table.pivot(index=rows, columns=cols, values=base_col).reindex(index=z.index, columns=z.columns)
+    small = z.size <= HEATMAP_TEXT_MAX * 8
+    fig = go.Figure(data=go.Heatmap(
+        z=z.values,
+        x=[wrap(c, 18) for c in z.columns],
+        y=[wrap(r) for r in z.index],
+        zmin=zmin, zmax=zmax, colorscale=colorscale,
+        text=z.values if small else None,
+        texttemplate=f"%{{text:.1f}}{suffix}" if small else None,
+        customdata=base.values,
+        hovertemplate=f"%{{y}}<br>%{{x}}: %{{z:.1f}}{suffix} (n = %{{customdata:,.0f}})<extra></extra>",
+        hoverongaps=False,
+    ))
+    fig.update_layout(**base_layout(), height=min(dynamic_height(len(z.index)), HEATMAP_MAX_HEIGHT),
+                      margin=dict(l=240, r=20, t=40, b=80))
+    fig.update_yaxes(autorange="reversed")
+    return fig
+
+def secao_cruzamentos(df: pd.DataFrame, id_col: str):
+    st.subheader("🧮 Cruzamentos por dimensão")
+    st.caption(f"Cada célula usa só os respondentes do grupo; células com menos de {MIN_CELL} respondentes "
+               "válidos são suprimidas (em branco).")
+    c1, c2 = st.columns(2)
+    dim = c1.selectbox("Dimensão", list(CROSSTAB_DIMENSIONS), format_func=CROSSTAB_DIMENSIONS.get, key="cruzamento_dim")
+    key = c2.selectbox("Itens Likert", [*LIKERT_BLOCKS, RELIABILITY_ALL], format_func=RELIABILITY_LABELS.get,
+                       key="cruzamento_bloco")
+
+    table = likert_crosstab(df, id_col, dim, key)
+    if table is None:
+        if not isinstance(df, KpiBundle) and len(df) == 0 and attached_partial(df, id_col) is not None:
+            st.info("Ingestão em blocos: os agregados não guardam o grupo de cada resposta, "
+                    "então os cruzamentos precisam dos dados completos.")
+        else:
+            st.info("📎 Dimensão ou itens Likert não encontrados.")
+        return
+    st.markdown(f"### 📈 Índice Likert (0–100) por {CROSSTAB_DIMENSIONS[dim].lower()}")
+    plot_kpi(f"cruzamento:{dim}:{key}", df, lambda: crosstab_heatmap(
+        table, "Pergunta", "Grupo", "Indice", [[0, LIKERT_COLORS["1 Muito ruim"]], [0.5, LIKERT_COLORS["3 Razoável"]],
+                                               [1, LIKERT_COLORS["5 Excelente"]]], 0, 100), top_n())
+    n_groups = table["Grupo"].nunique()
+    if n_groups > top_n():
+        st.caption(f"Heatmap com os {top_n()} maiores grupos de {n_groups:,}; todos estão na tabela.")
+    with st.expander("📋 Distribuição 1–5 por grupo (%)"):
+        paged_table(f"cruzamento:{dim}:{key}", table, "Grupo")
+
+    st.markdown(f"### 📊 KPI categórica por {CROSSTAB_DIMENSIONS[dim].lower()}")
+    kpi = st.selectbox("KPI", CROSSTAB_KPIS, index=CROSSTAB_KPIS.index("fundador"), format_func=lambda k: COMPARE_TITLES.get(k, k),
+                       key="cruzamento_kpi")
+    if kpi == dim:
+        st.info("Escolha uma KPI diferente da dimensão.")
+        return
+    counts = kpi_crosstab(df, id_col, dim, kpi)
+    if counts is None or counts.empty:
+        st.info("📎 Coluna da KPI não encontrada.")
+        return
+    label = KPI_COUNT_LABELS[kpi][0]
+    plot_kpi(f"cruzamento_kpi:{dim}:{kpi}", df,
+             lambda: crosstab_heatmap(counts, "Grupo", label, "%", "Blues", 0, 100, "%"), top_n())
+    n_values = counts[label].nunique()
+    if n_values > top_n():
+        st.caption(f"Heatmap com as {top_n()} respostas mais frequentes de {n_values:,}; todas estão na tabela.")
+    with st.expander("📋 Tabela"):
+        paged_table(f"cruzamento_kpi:{dim}:{kpi}", counts, "Grupo")
+
+COMPARE_TITLES = {
+    "perfil": "👥 Perfil", "faixa": "👤 Faixa etária", "grau": "🎓 Grau de formação", "ies": "🏛️ IES",
+    "curso": "🎓 Cursos", "conceitos": "💡 Conceitos de empreendedorismo", "fundador": "🚀 Fundadores / Sócios",
+    "projetos": "🧪 Projetos", "permanencia": "🎓 Permanência", "evasao": "🚪 Evasão",
+    "evasao_colegas": "👥 Evasão de colegas", "prof_experiencia": "👨‍🏫 Professores — experiência no mercado",
+    "prof_acessiveis": "👨‍🏫 Professores — acessíveis",
+}
+COMPARE_TOP = 15  # categorias no gráfico (a tabela traz todas)
+
+def secao_comparacao(df: pd.DataFrame, id_col: str):
+    st.subheader("⚖️ Comparação entre fontes")
+    # resumos montados na carga (um por fonte); aqui só se juntam as tabelas
+    summaries = st.session_state.get("_comparacao") or {}
+    if len(summaries) < 2:
+        st.info("Selecione outras fontes em “⚖️ Comparar fontes” (barra lateral) para vê-las lado a lado com a atual.")
+        return
+    names = list(summaries)
+    state = tuple((n, s.fingerprint) for n, s in summaries.items())
+
+    st.markdown("### 📌 Base")
+    st.dataframe(compare_base(summaries), use_container_width=True)
+
+    st.markdown("### 📈 Índices Likert (0–100)")
+    table = compare_likert(summaries)
+    deltas = [f"Δ {n}" for n in names[1:]]
+    if not table.empty:
+        def build():
+            fig = go.Figure()
+            for col in deltas:
+                fig.add_bar(y=[wrap(p) for p in table["Pergunta"]], x=table[col], name=col, orientation="h",
+                            text=[f"{v:+.1f}" if pd.notna(v) else "" for v in table[col]], textposition="outside")
+            fig.update_layout(**base_layout(), barmode="group", height=dynamic_height(len(table) * len(deltas)),
+                              xaxis_title=f"Δ índice em relação a {names[0]}")
+            fig.update_traces(cliponaxis=False)
+            return fig
+        plot_kpi("comparacao:likert", df, build, state)
+        st.dataframe(table, hide_index=True, use_container_width=True)
+    else:
+        st.info("Nenhum item Likert encontrado nas fontes.")
+
+    st.markdown("### 📊 KPIs categóricas (% por fonte)")
+    for key, (label, _) in KPI_COUNT_LABELS.items():
+        long = compare_counts(summaries, key)
+        if long is None:
+            continue
+        with st.expander(COMPARE_TITLES.get(key, key)):
+            wide = long.pivot_table(index=label, columns="Fonte", values="%", sort=False).reindex(columns=names)
+            top = wide.loc[wide.max(axis=1).sort_values(ascending=False).index[:COMPARE_TOP]]
+            def build(top=top):
+                fig = go.Figure()
+                for name in top.columns:
+                    fig.add_bar(y=[wrap(v) for v in top.index], x=top[name], name=name, orientation="h")
+                fig.update_layout(**base_layout())
+                fig.update_layout(barmode="group", height=dynamic_height(len(top) * len(names)),
+                                  xaxis_title="% dos respondentes", yaxis_autorange="reversed")
+                return fig
+            plot_kpi(f"comparacao:{key}", df, build, state)
+            st.dataframe(long, hide_index=True, use_container_width=True)
+
+EXPORT_FORMATS = {
+    "CSV (dados)": ("csv", "dados_cefet_export.csv"),
+    "Parquet (dados)": ("parquet", "dados_cefet_export.parquet"),
+    "XLSX (tabelas das KPIs)": ("xlsx", "kpis_cefet.xlsx"),
+}
+
+def secao_dados(df: pd.DataFrame, id_col: str):
+    if isinstance(df, KpiBundle):
+        # artefato de agregados: não há linhas, só as tabelas das KPIs
+        st.info("Modo agregado: o dashboard foi aberto a partir do artefato de KPIs, sem os dados brutos. "
+                "Desligue “Usar artefato de agregados” para ver e exportar as respostas.")
+        st.download_button(
+            "📥 Baixar XLSX (tabelas das KPIs)",
+            export_tables(df, lambda: kpi_export_sheets(df, id_col)),
+            file_name="kpis_cefet.xlsx", mime=MIME["xlsx"], use_container_width=True,
+        )
+        return
+    if len(df) == 0 and attached_partial(df, id_col) is not None:
+        # ingestão em blocos: as linhas foram descartadas depois de agregadas
+        st.info("Ingestão em blocos: o arquivo foi agregado bloco a bloco e as respostas não ficam em memória. "
+                "Desligue “Ingestão em blocos” (XLSX) para ver e exportar as respostas.")
+        st.download_button(
+            "📥 Baixar XLSX (tabelas das KPIs)",
+            export_tables(df, lambda: kpi_export_sheets(df, id_col)),
+            file_name="kpis_cefet.xlsx", mime=MIME["xlsx"], use_container_width=True,
+        )
+        return
+    st.caption("Pré-visualização (100 primeiras linhas)")
+    # no modo compacto o ID é um inteiro; exibe/exporta o valor original
+    id_values = st.session_state.get("_id_values")
+    st.dataframe(restore_ids(df.head(100), id_col, id_values), use_container_width=True)
+    # exportação só é gerada ao pedir (cache por fingerprint: repetir é grátis)
+    c1, c2 = st.columns([2, 1])
+    with c1:
+        choice = st.selectbox("Formato de exportação", list(EXPORT_FORMATS), key="export_fmt")
+    fmt, file_name = EXPORT_FORMATS[choice]
+    with c2:
+        st.write("")
+        requested = st.button("⚙️ Gerar arquivo", use_container_width=True, key="export_go")
+    if requested:
+        st.session_state["_export"] = (dataset_fingerprint(df), fmt)
+    if st.session_state.get("_export") == (dataset_fingerprint(df), fmt):
+        with st.spinner("Gerando exportação..."):
+            if fmt == "xlsx":
+                data = export_tables(df, lambda: kpi_export_sheets(df, id_col))
+            else:
+                data = export_dataset(df, fmt, id_col, id_values)
+        st.download_button(
+            f"📥 Baixar {choice}",
+            data,
+            file_name=file_name,
+            mime=MIME[fmt],
+            use_container_width=True
+        )
+
+# rótulo da aba -> função da seção (ordem = ordem das abas)
+SECTIONS = {
+    "📌 Base": kpi_base,
+    "👥 Perfil": kpi_perfil,
+    "🎓 Cursos": kpi_cursos,
+    "🚀 Empreendedorismo": kpi_emp_rela,
+    "👨‍🎓 Alunos": secao_alunos,
+    "👨‍🏫 Professores": secao_professores,
+    "🏢 Infraestrutura (PCD/Geral/Internet)": secao_infraestrutura,
+    "📚 Metodologia / Matriz / Casos": secao_metodologia,
+    "🎯 Ingresso": secao_ingresso,
+    "🎓 Permanência / Evasão": kpi_permanencia_evasao,
+    "🔗 Correlação / Confiabilidade": secao_confiabilidade,
+    "🧮 Cruzamentos": secao_cruzamentos,
+    "🗂️ Dados (preview)": secao_dados,
+    "⚖️ Comparação": secao_comparacao,
+}
+
+@st.fragment
+def render_section(label: str, df: pd.DataFrame, id_col: str):
+    # fragmento: widgets de uma seção reexecutam só a própria seção
+    own_run = st.session_state.get("_perf_on") and perf.active_run() is None  # rerun só do fragmento
+    if own_run:
+        perf.begin_run(st.session_state.get("_perf_session"), trace=st.session_state.get("_perf_trace", False))
+    with probe(f"secao:{label}", "secao"):
+        try:
+            SECTIONS[label](df, id_col)
+        except BundleMiss:
+            st.warning("Esta seção não está no artefato de agregados (gere-o de novo com `report.py --formats bundle`).")
+    if own_run:
+        perf.end_run()
+
+def prewarm_sections(df: pd.DataFrame, id_col: str):
+    """Preenche os caches puros (sem st.*) usados pelas seções não exibidas."""
+    kpi_count_tables(df, id_col)
+    respondent_codes(df, id_col)
+    for key in LIKERT_BLOCKS:
+        likert_codes(df, likert_block_columns(column_index(df), key))
+    for _, phrases in FRASES.values():
+        likert_codes(df, [c for c in (find_first(df, p) for p in phrases) if c])
+    ingresso = kpi_column(df, "ingresso")
+    if ingresso:
+        likert_codes(df, [ingresso])
+
 # -----------------------------------------------------------------------------
 # APP
 # -----------------------------------------------------------------------------
@@ -553,160 +929,256 @@ with st.sidebar:
     if use_github:
         selected_key = st.selectbox("Selecione o arquivo", list(GITHUB_FILES.keys()))
     st.markdown("**OU**")
-    uploaded = st.file_uploader("📤 Upload de Excel", type=["xlsx", "xls"])
+    uploaded = st.file_uploader("📤 Upload de Excel", type=["xlsx", "xls", "csv"])
+    stream_mode = st.toggle(
+        "Ingestão em blocos (arquivos muito grandes)", value=False, key="stream_mode",
+        help="Lê o upload em blocos e guarda só os agregados das KPIs (memória limitada). "
+             "Uploads CSV sempre usam este modo; segmentação e pré-visualização ficam indisponíveis.",
+    )
+    projected = st.toggle(
+        "Carregar só as colunas usadas pelas KPIs", value=True,
+        help="Lê a planilha em modo streaming e ignora as demais colunas (menos memória e tempo).",
+    )
+    nrows = st.number_input("Limitar linhas (0 = todas)", min_value=0, value=0, step=1000) or None
+    st.number_input(
+        "Categorias por gráfico", min_value=5, max_value=100, value=TOP_N, step=5, key="top_n",
+        help="Gráficos de barras e heatmaps mostram as N maiores categorias; o resto vira “Outros” "
+             "e fica numa tabela paginada.",
+    )
+    use_bundle = st.toggle(
+        "Usar artefato de agregados", value=True,
+        help="Abre as KPIs pré-calculadas (report.py --formats bundle) quando o artefato corresponde à fonte; "
+             "uploads e artefatos desatualizados usam os dados brutos.",
+    )
+    with st.expander("🗄️ Cache de planilhas"):
+        st.caption(f"{cache_size() / 1024 / 1024:.1f} MB em disco")
+        st.dataframe(cache_info(), hide_index=True, use_container_width=True)
+        if st.button("Limpar cache", use_container_width=True):
+            n = clear_cache()
+            clear_datasets()
+            clear_figures()
+            clear_bundles()
+            clear_wave_frames()
+            clear_streamed()
+            clear_exports()
+            st.cache_data.clear()
+            st.toast(f"{n} arquivo(s) removido(s) do cache.")
+    compact_mode = st.toggle(
+        "Representação compacta em memória", value=True,
+        help="Respostas repetitivas como categorias, ID como inteiro e Likert como códigos int8.",
+    )
+    with st.expander("🧠 Cache compartilhado de datasets"):
+        stats = DATASETS.stats()
+        st.caption(
+            f"{stats['entradas']} dataset(s) • {stats['mb']} / {stats['limite_mb']} MB • "
+            f"hits {stats['hits']} • misses {stats['misses']} ({stats['hit_rate']}% hits) • "
+            f"evictions {stats['evictions']}"
+        )
+    with st.expander("🌊 Ondas de respostas"):
+        wave_store = WaveStore()
+        use_waves = st.toggle(
+            "Usar o acervo de ondas", value=False, key="use_waves",
+            help="Abre todas as ondas importadas (respondentes deduplicados pelo ID) no lugar da fonte acima.",
+        )
+        wave_file = st.file_uploader("Nova onda (Excel)", type=["xlsx", "xls"], key="onda_upload")
+        if wave_file is not None and st.button("➕ Adicionar ao acervo", use_container_width=True):
+            with st.spinner("Importando onda..."):
+                try:
+                    res = wave_store.append(wave_file.getvalue(), wave_file.name)
+                except ValueError as e:
+                    st.error(str(e))
+                else:
+                    if res.status == "repetida":
+                        st.toast("Esta planilha já foi importada.")
+                    else:
+                        st.toast(f"Onda {res.onda}: {res.novas:,} linhas novas • {res.duplicadas:,} de respondentes já vistos"
+                                 + (f" • {res.sem_id:,} sem ID (ignoradas)" if res.sem_id else ""))
+        waves_table = wave_store.summary()
+        if not waves_table.empty:
+            st.dataframe(waves_table, hide_index=True, use_container_width=True)
+        elif use_waves:
+            st.caption("Acervo vazio: adicione uma planilha.")
+    with st.expander("⚖️ Comparar fontes"):
+        compare_options = list(GITHUB_FILES) + ([str(LOCAL_DEMO)] if LOCAL_DEMO.exists() else [])
+        if not waves_table.empty:
+            compare_options.append("Acervo de ondas")
+        compare_keys = st.multiselect("Fontes para comparar com a atual", compare_options, key="cmp_sources")
+        compare_uploads = st.file_uploader("Uploads para comparar", type=["xlsx", "xls"],
+                                           accept_multiple_files=True, key="cmp_uploads")
+    seg_box = st.container()  # preenchido depois da carga (valores vêm do dataset)
+    st.markdown("### 🧭 Navegação")
+    nav_mode = st.radio(
+        "Modo", ["Seção única", "Todas as abas"], index=0,
+        help="Seção única calcula só a seção aberta; Todas as abas calcula tudo a cada interação.",
+    )
+    prewarm = st.toggle("Pré-aquecer outras seções em segundo plano", value=True)
+    st.markdown("### ⏱️ Desempenho")
+    perf_on = st.toggle("Medir desempenho", value=False, key="_perf_on",
+                        help="Tempo e memória de carga, agregações, figuras e seções a cada rerun.")
+    perf_trace = st.toggle("Gravar trace (JSON lines)", value=False, key="_perf_trace", disabled=not perf_on,
+                           help=f"Anexa os eventos de cada rerun em {perf.TRACE_PATH}.")
+    perf_box = st.container()
     st.markdown("---")
     st.info("Regra de contagem: sempre **DistinctCount(Respondent ID)**.\nLikert → **0–100**, ignorando **“Não observado”**.\nSem sobreposição de eixos (altura dinâmica + automargem).")
 
+# Instrumentação do rerun (desligada: probes viram nullcontext)
+perf.end_run()  # descarta um rerun interrompido (st.stop) desta thread
+if perf_on:
+    perf.begin_run(st.session_state.setdefault("_perf_session", uuid.uuid4().hex[:8]), trace=perf_trace)
+
+# Artefato de agregados: sobe sem baixar/ler a planilha quando está atual
+bundle = None
+bundle_source = None
+use_waves = use_waves and not waves_table.empty
+if use_bundle and nrows is None and not use_waves:
+    if use_github and selected_key:
+        bundle_source = GITHUB_FILES[selected_key]
+    elif uploaded is None and LOCAL_DEMO.exists():
+        bundle_source = str(LOCAL_DEMO)
+if bundle_source is not None:
+    with probe("carga:artefato", "carga"):
+        bundle, bundle_status = fresh_bundle(bundle_source)
+    if bundle is None and bundle_status == "desatualizado":
+        st.sidebar.caption("📦 Artefato de agregados desatualizado: usando os dados brutos.")
+
 # Carrega dados
-df = None
+dataset = None
 src = ""
-if use_github and selected_key:
+if bundle is not None:
+    src = f"Artefato de agregados ({bundle.meta['gerado_em']})"
+elif use_waves:
+    with st.spinner("Abrindo acervo de ondas..."):
+        dataset = load_from_waves(wave_store, projected, compact_mode)
+        src = f"Acervo de ondas: {len(waves_table)} onda(s)"
+elif use_github and selected_key:
     with st.spinner("Baixando do GitHub..."):
-        df = load_from_github(GITHUB_FILES[selected_key])
+        dataset = load_from_github(GITHUB_FILES[selected_key], projected, nrows, compact_mode)
         src = f"GitHub: {selected_key}"
+elif uploaded is not None and (stream_mode or uploaded.name.lower().endswith(".csv")):
+    with st.spinner("Lendo upload em blocos..."):
+        dataset = load_from_stream(uploaded)
+        src = f"Upload (em blocos): {uploaded.name}"
 elif uploaded is not None:
     with st.spinner("Lendo upload..."):
-        df = load_from_upload(uploaded)
+        dataset = load_from_upload(uploaded, projected, nrows, compact_mode)
         src = f"Upload: {uploaded.name}"
 elif LOCAL_DEMO.exists():
     with st.spinner("Abrindo arquivo local demo..."):
-        df = load_from_local(LOCAL_DEMO)
+        dataset = load_from_local(LOCAL_DEMO, projected, nrows, compact_mode)
         src = f"Arquivo local: {LOCAL_DEMO}"
 
+df = bundle if bundle is not None else dataset.df if dataset is not None else None
 if df is None:
     st.warning("Configure a fonte de dados na barra lateral. Opcionalmente, adicione `data/dados_cefet.xlsx` ao repositório.")
     st.stop()
 
 # Detecta ID
-try:
-    id_col = find_respondent_id_col(df)
-except Exception as e:
-    st.error(str(e))
-    st.stop()
-
-st.success(f"✅ {src} • Respondentes únicos: **{df[id_col].nunique():,}**")
-
-# TABS (sem remover KPIs)
-tabs = st.tabs([
-    "📌 Base",
-    "👥 Perfil",
-    "🎓 Cursos",
-    "🚀 Empreendedorismo",
-    "👨‍🎓 Alunos",
-    "👨‍🏫 Professores",
-    "🏢 Infraestrutura (PCD/Geral/Internet)",
-    "📚 Metodologia / Matriz / Casos",
-    "🎯 Ingresso",
-    "🎓 Permanência / Evasão",
-    "🗂️ Dados (preview)"
-])
-
-with tabs[0]:
-    kpi_base(df, id_col)
-
-with tabs[1]:
-    kpi_perfil(df, id_col)
-
-with tabs[2]:
-    kpi_cursos(df, id_col)
-
-with tabs[3]:
-    kpi_emp_rela(df, id_col)
-
-with tabs[4]:
-    # Alunos – “O quanto as seguintes características estão presentes nos(as) ALUNOS(AS) ...”
-    kpi_likert_block(
-        df, id_col,
-        "👨‍🎓 Alunos — características (Likert 0–100)",
-        ["o quanto as seguintes caracteristicas estao presentes", "alunos"],
-        "Alunos"
-    )
-    # Frase: "os(as) ALUNOS(AS) ... possuem postura empreendedora"
-    kpi_frases_likert(
-        df, id_col,
-        "Frase avaliada — Postura empreendedora dos alunos",
-        "considerando o respondido na questao anterior, como voce avalia a frase: \"os(as) alunos(as)"
-    )
-
-with tabs[5]:
-    # Professores – características
-    kpi_likert_block(
-        df, id_col,
-        "👨‍🏫 Professores — características (Likert 0–100)",
-        ["o quanto as seguintes caracteristicas estao presentes", "professores"],
-        "Professores"
-    )
-    # Frase: "os(as) PROFESSORES(AS) ... possuem postura empreendedora"
-    kpi_frases_likert(
-        df, id_col,
-        "Frase avaliada — Postura empreendedora dos professores",
-        "considerando o respondido na questao anterior, como voce avalia a frase: \"os(as) professores(as)"
-    )
-    # Experiência / Acessíveis (distribuição)
-    for k in [
-        "os(as) professores(as) da minha instituicao de ensino superior possuem experiencia no mercado de trabalho",
-        "os(as) professores(as) da minha instituicao de ensino superior sao acessiveis para apoiar as iniciativas"
-    ]:
-        col = find_first(df, k)
-        if col:
-            counts = df.groupby(col)[id_col].nunique().reset_index().rename(columns={col: "Resposta", id_col: "Respondentes"})
-            counts["%"] = (counts["Respondentes"] / df[id_col].nunique() * 100).round(1)
-            st.plotly_chart(barh_from_counts(counts.sort_values("Respondentes", ascending=True), "Resposta", "Respondentes", color="#e67e22"), use_container_width=True)
-
-with tabs[6]:
-    # PCD – “Como você avalia a qualidade da infraestrutura destinada à pessoas com deficiência ...”
-    kpi_likert_block(
-        df, id_col,
-        "♿ Infraestrutura — pessoas com deficiência (Likert 0–100)",
-        ["como voce avalia a qualidade da infraestrutura destinada a pessoas com deficiencia"],
-        "PCD"
-    )
-    # Geral – “Como você avalia a qualidade da infraestrutura oferecida ...”
-    kpi_likert_block(
-        df, id_col,
-        "🏛️ Infraestrutura — geral (Likert 0–100)",
-        ["como voce avalia a qualidade da infraestrutura oferecida pela sua instituicao de ensino superior"],
-        "Infra"
-    )
-    # Internet – “Como você avalia a qualidade da internet oferecida ...”
-    kpi_likert_block(
-        df, id_col,
-        "📶 Internet (Likert 0–100)",
-        ["como voce avalia a qualidade da internet oferecida pela sua instituicao de ensino superior"],
-        "Internet"
+if bundle is not None:
+    id_col, id_values, mem_report = bundle.id_col, None, None
+else:
+    try:
+        id_col = find_respondent_id_col(df)
+    except Exception as e:
+        st.error(str(e))
+        st.stop()
+    id_values, mem_report = dataset.id_values, dataset.report
+if mem_report is not None:
+    st.sidebar.caption(
+        f"💾 Memória: {mem_report['antes_mb']} MB → {mem_report['depois_mb']} MB "
+        f"(−{mem_report['economia_pct']}%) • {mem_report['likert']} colunas Likert em int8"
     )
-
-with tabs[7]:
-    # Metodologia / Matriz / Casos
-    kpi_frases_likert(
-        df, id_col,
-        "📚 Metodologia / Matriz / Casos (Likert 0–100)",
-        "o modelo/metodologia de ensino da minha instituicao de ensino superior contribui para que eu desenvolva postura empreendedora",
-        "a matriz curricular do curso contribui para o desenvolvimento da minha postura empreendedora",
-        "a minha instituicao de ensino superior oferece uma matriz curricular flexivel para que eu possa me engajar em atividades extra-curriculares",
-        "a instituicao de ensino superior apresenta casos de sucesso de ex-alunos(as)"
+st.session_state["_id_values"] = id_values
+streamed = stream_stats(dataset) if dataset is not None and dataset.status == "blocos" else None
+if streamed is not None:
+    st.sidebar.caption(
+        f"🧱 {streamed.linhas:,} linhas em {streamed.blocos} blocos • agregados {streamed.agregados_mb} MB"
+        + (f" • {streamed.aproximadas} de {streamed.contagens} contagens estimadas (HyperLogLog, ±1%)"
+           if streamed.aproximadas else "")
     )
 
-with tabs[8]:
-    # Ingresso – influência
-    col = find_first(df, "o quanto voce considera que a sua instituicao de ensino superior influenciou na sua decisao de ingresso")
-    if col:
-        idx = likert_index(df[col])
-        if idx is not None:
-            st.metric("Influência da IES no ingresso", f"{idx:.1f}/100")
-    else:
-        st.info("📎 Coluna de influência no ingresso não encontrada.")
-
-with tabs[9]:
-    kpi_permanencia_evasao(df, id_col)
-
-with tabs[10]:
-    st.caption("Pré-visualização (100 primeiras linhas)")
-    st.dataframe(df.head(100), use_container_width=True)
-    st.download_button(
-        "📥 Baixar dados em CSV",
-        df.to_csv(index=False).encode("utf-8"),
-        file_name="dados_cefet_export.csv",
-        mime="text/csv",
-        use_container_width=True
-    )
+# Segmentação: bitmaps por valor (uma vez por dataset); o recorte segue para todas as seções
+df_full = df
+seg_note = ""
+if bundle is not None or streamed is not None:
+    seg_box.caption("🔎 Segmentação indisponível no modo agregado (precisa dos dados brutos).")
+else:
+    seg_index = bitmap_index(df)
+    with seg_box:
+        st.markdown("### 🔎 Segmentação")
+        seg_filters = {
+            dim: st.multiselect(label, seg_index.values[dim], key=f"seg_{dim}")
+            for dim, label in SEGMENT_DIMENSIONS.items() if dim in seg_index.values
+        }
+        seg_mode = st.radio(
+            "Combinar dimensões", ["E", "OU"], horizontal=True, key="seg_mode",
+            help="Valores da mesma dimensão sempre somam (OU); aqui se escolhe como as dimensões se combinam.",
+        )
+    df = segment_view(df_full, seg_filters, "and" if seg_mode == "E" else "or")
+    if df is not df_full:
+        if len(df) == 0:
+            st.warning("Nenhum respondente no segmento selecionado.")
+            st.stop()
+        seg_box.caption(f"Segmento: {len(df):,} de {len(df_full):,} linhas")
+        seg_note = f" • Segmento: **{n_respondents(df, id_col):,}** de {n_respondents(df_full, id_col):,}"
+
+total = base_metrics(df_full, id_col)["total"] if bundle is not None else n_respondents(df_full, id_col)
+st.success(f"✅ {src} • Respondentes únicos: **{total:,}**{seg_note}")
+
+# Comparação: as outras fontes são baixadas/lidas em paralelo e cada uma é resumida uma vez
+comparison = {}
+if compare_keys or compare_uploads:
+    opts = dict(projected=projected, compact=compact_mode)
+    loaders = {}
+    for key in compare_keys:
+        if key in GITHUB_FILES:
+            loaders[key] = lambda url=GITHUB_FILES[key]: load_url(url, **opts)
+        elif key == "Acervo de ondas":
+            loaders[key] = lambda: wave_store.dataset(**opts)
+        else:
+            loaders[key] = lambda: load_path(LOCAL_DEMO, **opts)
+    for up in compare_uploads or []:
+        loaders[f"Upload: {up.name}"] = lambda up=up: load_upload(up, **opts)
+    ref_name = src + (" [segmento]" if df is not df_full else "")
+    try:
+        comparison[ref_name] = source_summary(df, id_col)
+    except BundleMiss:
+        st.sidebar.caption("⚖️ O artefato de agregados não tem os índices por item: a fonte atual fica fora da comparação.")
+    with st.spinner(f"Carregando {len(loaders)} fonte(s) para comparar..."), probe("carga:comparacao", "carga"):
+        loaded = load_many(loaders, then=lambda ds: source_summary(ds.df, ds.id_col))
+    for name, res in loaded.items():
+        if isinstance(res, Exception):
+            st.sidebar.warning(f"⚖️ {name}: {res}")
+            continue
+        comparison[name if name not in comparison else f"{name} (2)"] = res[1]
+st.session_state["_comparacao"] = comparison
+
+# Pré-aquecimento: calcula em segundo plano as agregações das outras seções
+if prewarm and bundle is None and st.session_state.get("_prewarmed") != dataset_fingerprint(df):
+    st.session_state["_prewarmed"] = dataset_fingerprint(df)
+    threading.Thread(target=prewarm_sections, args=(df, id_col), daemon=True).start()
+
+if nav_mode == "Todas as abas":
+    # TABS (sem remover KPIs) — cada aba é um fragmento isolado
+    tabs = st.tabs(list(SECTIONS))
+    for tab, label in zip(tabs, SECTIONS):
+        with tab:
+            render_section(label, df, id_col)
+else:
+    # Só a seção ativa é calculada
+    active = st.radio("Seção", list(SECTIONS), horizontal=True, label_visibility="collapsed", key="secao_ativa")
+    render_section(active, df, id_col)
+
+# Painel de desempenho (só quando ligado)
+run = perf.end_run(extra=dict(caches=cache_stats(), datasets=DATASETS.stats()))
+if run is not None:
+    with perf_box.expander("⏱️ Performance", expanded=True):
+        peak = perf.peak_rss_mb()
+        st.caption(
+            f"Rerun: **{run.total_ms:,.0f} ms** • pico de RSS: **{peak or 0:,.0f} MB** • "
+            f"RSS atual: {perf.rss_mb() or 0:,.0f} MB"
+        )
+        st.dataframe(perf.summarize(run), hide_index=True, use_container_width=True)
+        st.caption("Caches (acertos acumulados no processo)")
+        st.dataframe(pd.DataFrame(cache_stats()), hide_index=True, use_container_width=True)
+        if run.trace:
+            st.caption(f"Trace: `{perf.TRACE_PATH}`")
@@ -0,0 +1,178 @@
+"""
+Gerador de pesquisas sintéticas com os mesmos cabeçalhos da planilha real.
+
+    python synthetic.py 100000 data/sintetico_100k.xlsx --likert-items 8 --neutros 0.15
+
+Os cabeçalhos vêm de columns_classification.csv (mais as colunas que as KPIs
+procuram por keyword e que não estão no CSV), então o dashboard, o report.py e
+o benchmark.py reconhecem tudo como reconhecem a planilha de verdade.
+"""
+import argparse
+import io
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+from kpi_registry import CLASSIFICATION_CSV, FRASES
+
+LIKERT_ANSWERS = ["1 - Muito ruim", "2 - Ruim", "3 - Razoável", "4 - Boa", "5 - Excelente"]
+NEUTRO = "Não observado"
+
+# colunas que as KPIs usam e que não estão em columns_classification.csv
+EXTRA_HEADERS = dict(
+    ies="Instituição de Ensino Superior",
+    grau="Grau de formação",
+    conceitos="O que você entende como empreendedorismo?",
+    projetos="Ao longo da sua graduação, quais projetos você já participou?",
+    evasao="Quais motivos você considera que te fariam deixar a Instituição de Ensino Superior?",
+    ingresso="O quanto você considera que a sua Instituição de Ensino Superior influenciou na sua decisão de ingresso?",
+    pcd="Como você avalia a qualidade da infraestrutura destinada à pessoas com deficiência? ",
+)
+PCD_ITEMS = ["Rampas", "Banheiros adaptados", "Elevadores", "Sinalização tátil"]
+CONCEITOS = ["Abrir uma empresa", "Inovar", "Transformar a realidade", "Gerar renda", "Resolver problemas"]
+PROJETOS = ["Empresa júnior", "Iniciação científica", "Extensão", "Monitoria", "Nenhum"]
+MOTIVOS = ["Qualidade do ensino", "Bolsa", "Amigos", "Localização", "Reconhecimento do diploma", "Estágio"]
+EVASAO = ["Financeiro", "Distância", "Saúde", "Trabalho", "Desinteresse pelo curso"]
+
+
+def _likert_item(rng, n: int, neutral_rate: float, missing_rate: float) -> pd.Categorical:
+    # cada item tem a própria distribuição (umas perguntas bem avaliadas, outras não)
+    p = rng.dirichlet(np.full(5, 2.0)) * (1 - neutral_rate - missing_rate)
+    p = np.append(p, [neutral_rate, missing_rate])
+    codes = rng.choice(7, size=n, p=p / p.sum()).astype(np.int8)
+    codes[codes == 6] = -1  # em branco
+    return pd.Categorical.from_codes(codes, categories=LIKERT_ANSWERS + [NEUTRO])
+
+
+def _multi_select(rng, n: int, options: list[str], max_choices: int = 3) -> pd.Categorical:
+    # respostas de múltipla escolha como o Forms exporta ("A;B;C"); combinações limitadas
+    combos = sorted({";".join(sorted(rng.choice(options, size=k, replace=False)))
+                     for k in range(1, max_choices + 1) for _ in range(4 * len(options))})
+    return pd.Categorical.from_codes(rng.integers(0, len(combos), n), categories=combos)
+
+
+def _single(rng, n: int, options: list[str], skew: float = 1.2) -> pd.Categorical:
+    p = 1 / np.arange(1, len(options) + 1) ** skew  # poucas categorias concentram as respostas
+    return pd.Categorical.from_codes(rng.choice(len(options), size=n, p=p / p.sum()), categories=options)
+
+
+def synthetic_survey(
+    n_respondents: int = 1000,
+    likert_items: int | None = None,
+    neutral_rate: float = 0.1,
+    missing_rate: float = 0.02,
+    n_cursos: int = 40,
+    n_ies: int = 12,
+    duplicate_rate: float = 0.0,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    DataFrame com `n_respondents` linhas (colunas categóricas para caber 1M linhas
+    na memória). `likert_items` fixa quantos itens cada bloco Likert tem (None =
+    os do CSV); `duplicate_rate` repete IDs para exercitar o DistinctCount.
+    """
+    rng = np.random.default_rng(seed)
+    n = n_respondents
+    spec = pd.read_csv(CLASSIFICATION_CSV)
+    ids = rng.choice(np.arange(10**9, 10**9 + 4 * n, dtype=np.int64), size=n, replace=False)
+    if duplicate_rate > 0:
+        dup = rng.random(n) < duplicate_rate
+        ids[dup] = rng.choice(ids, size=int(dup.sum()))
+
+    cursos = [f"Engenharia {i:02d}" if i % 3 else f"Licenciatura {i:02d}" for i in range(n_cursos)]
+    ies = ["CEFET-MG"] + [f"IES {i:02d}" for i in range(1, n_ies)]
+    likert = lambda: _likert_item(rng, n, neutral_rate, missing_rate)
+
+    # IES e grau vêm antes das perguntas (como no formulário): as KPIs pegam a
+    # primeira coluna que casa com os keywords
+    cols = {
+        "Respondent ID": ids,
+        EXTRA_HEADERS["ies"]: _single(rng, n, ies),
+        EXTRA_HEADERS["grau"]: _single(rng, n, ["Bacharelado", "Tecnólogo", "Licenciatura"]),
+    }
+
+    blocks: dict[str, list[str]] = {}
+    for header, tecnico, classe in spec[["coluna_original", "nome_tecnico", "classe"]].itertuples(index=False):
+        if tecnico == "voce_e":
+            cols[header] = _single(rng, n, ["Aluno(a)", "Egresso(a)"], skew=0.3)
+        elif tecnico == "idade":
+            cols[header] = np.clip(rng.gamma(6.0, 4.0, n) + 16, 16, 70).astype(np.int16)
+        elif tecnico == "curso_graduacao":
+            cols[header] = _single(rng, n, cursos)
+        elif tecnico == "socio_ou_fundador":
+            cols[header] = _single(rng, n, ["Não", "Sim"], skew=2.0)
+        elif classe == "permanencia":
+            cols[header] = _multi_select(rng, n, MOTIVOS)
+        elif classe == "evasao":
+            cols[header] = _single(rng, n, ["Não", "Sim, financeiro", "Sim, distância", "Sim, outros"])
+        else:
+            blocks.setdefault(header.rsplit("?", 1)[0] if "?" in header else header, []).append(header)
+            cols[header] = likert()
+
+    if likert_items is not None:
+        # ajusta os blocos ao tamanho pedido (remove ou cria itens "Item N")
+        for headers in blocks.values():
+            if len(headers) < 2:
+                continue
+            for h in headers[likert_items:]:
+                del cols[h]
+            stem = headers[0][: len(headers[0]) - len(headers[0].rsplit("?", 1)[-1])]
+            for i in range(len(headers), likert_items):
+                cols[f"{stem}Item {i + 1}"] = likert()
+
+    cols[EXTRA_HEADERS["conceitos"]] = _multi_select(rng, n, CONCEITOS)
+    cols[EXTRA_HEADERS["projetos"]] = _multi_select(rng, n, PROJETOS)
+    cols[EXTRA_HEADERS["evasao"]] = _multi_select(rng, n, EVASAO)
+    cols[EXTRA_HEADERS["ingresso"]] = likert()
+    for item in PCD_ITEMS[: likert_items or len(PCD_ITEMS)]:
+        cols[EXTRA_HEADERS["pcd"] + item] = likert()
+    for _, phrases in FRASES.values():
+        for phrase in phrases:
+            header = phrase[0].upper() + phrase[1:]
+            cols[header + ('"' if header.count('"') % 2 else "")] = likert()
+    return pd.DataFrame(cols)
+
+
+def to_workbook_bytes(df: pd.DataFrame) -> bytes:
+    """Planilha .xlsx (xlsxwriter em modo constant_memory: não guarda a planilha inteira)."""
+    # constant_memory só aceita escrita linha a linha; o to_excel do pandas escreve
+    # coluna a coluna e perderia as células das linhas já descarregadas
+    buf = io.BytesIO()
+    wb = xlsxwriter.Workbook(buf, {"constant_memory": True})
+    ws = wb.add_worksheet()
+    ws.write_row(0, 0, [str(c) for c in df.columns])
+    cols = [df[c].astype(object).where(df[c].notna(), None).tolist() for c in df.columns]
+    for i, row in enumerate(zip(*cols), start=1):
+        ws.write_row(i, 0, row)
+    wb.close()
+    return buf.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera uma planilha sintética da pesquisa.")
+    parser.add_argument("respondentes", type=int)
+    parser.add_argument("saida", help="arquivo .xlsx, .csv ou .parquet")
+    parser.add_argument("--likert-items", type=int, default=None, help="itens por bloco Likert")
+    parser.add_argument("--neutros", type=float, default=0.1, help="taxa de 'Não observado'")
+    parser.add_argument("--brancos", type=float, default=0.02, help="taxa de respostas em branco")
+    parser.add_argument("--cursos", type=int, default=40, help="cardinalidade de cursos")
+    parser.add_argument("--ies", type=int, default=12, help="cardinalidade de IES")
+    parser.add_argument("--duplicados", type=float, default=0.0, help="taxa de IDs repetidos")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    df = synthetic_survey(args.respondentes, args.likert_items, args.neutros, args.brancos,
+                          args.cursos, args.ies, args.duplicados, args.seed)
+    if args.saida.endswith(".csv"):
+        df.to_csv(args.saida, index=False)
+    elif args.saida.endswith(".parquet"):
+        df.to_parquet(args.saida, index=False)
+    else:
+        with open(args.saida, "wb") as f:
+            f.write(to_workbook_bytes(df))
+    print(f"{args.saida}: {df.shape[0]} linhas × {df.shape[1]} colunas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from aggregation import distinct_count_tables, n_respondents, respondents_containing, respondents_in
+from memo import set_fingerprint, subset_rows
+
+
+def _naive(df, col, id_col):
+    return df.dropna(subset=[id_col]).groupby(col, observed=False)[id_col].nunique()
+
+
+def _check(df, cols, id_col="id"):
+    tables = distinct_count_tables(df, id_col, cols)
+    for c in cols:
+        got = tables[c].set_index(c)[id_col]
+        want = _naive(df, c, id_col).reindex(got.index, fill_value=0)
+        assert got.to_dict() == want.to_dict(), c
+
+
+def test_codigos_int8_nao_transbordam_com_um_registro_por_respondente():
+    # duas categóricas de 100 categorias: base 100 + código int8 passa de 127
+    rng = np.random.default_rng(0)
+    cats = [f"v{i:03d}" for i in range(100)]
+    df = pd.DataFrame({
+        "id": np.arange(500),
+        "a": pd.Categorical(rng.choice(cats, 500), categories=cats),
+        "b": pd.Categorical(rng.choice(cats, 500), categories=cats),
+    })
+    assert df["b"].cat.codes.dtype == np.int8
+    set_fingerprint(df, "teste-int8")
+    _check(df, ["a", "b"])
+
+
+def _survey(n=2_000, seed=1):
+    # respondentes repetidos (várias linhas por ID), IDs e respostas ausentes
+    rng = np.random.default_rng(seed)
+    ids = rng.integers(0, n // 4, n).astype(float)
+    ids[rng.random(n) < 0.05] = np.nan
+    curso = rng.choice(["ADM", "DIR", "ENG", "MED", None], n, p=[0.3, 0.3, 0.2, 0.1, 0.1])
+    uf = pd.Categorical(rng.choice(["MG", "RJ", "SP"], n), categories=["ES", "MG", "RJ", "SP"])
+    return pd.DataFrame({"id": ids, "curso": curso, "uf": uf, "idade": rng.integers(17, 60, n)})
+
+
+def test_respondentes_repetidos_e_ids_ausentes_contam_como_nunique():
+    df = _survey()
+    set_fingerprint(df, "teste-repetidos")
+    _check(df, ["curso", "uf", "idade"])
+    # categoria sem respostas aparece com zero, como em observed=False
+    assert distinct_count_tables(df, "id", ["uf"])["uf"].set_index("uf").loc["ES", "id"] == 0
+
+
+def test_recorte_e_serie_derivada():
+    df = _survey(seed=2)
+    set_fingerprint(df, "teste-recorte")
+    rows = np.flatnonzero(df["curso"].eq("ENG").to_numpy())
+    sub = subset_rows(df, rows, "eng")
+
+    def faixa():
+        return pd.cut(sub["idade"], [0, 24, 34, 200], labels=["até 24", "25-34", "35+"])
+
+    tables = distinct_count_tables(sub, "id", ["uf"], derived={"faixa": faixa})
+    plain = sub.frame().reset_index(drop=True).assign(faixa=faixa().to_numpy())
+    for c in ["uf", "faixa"]:
+        got = tables[c].set_index(c)["id"]
+        assert got.to_dict() == _naive(plain, c, "id").reindex(got.index, fill_value=0).to_dict()
+    assert n_respondents(sub, "id") == sub["id"].nunique()
+
+
+def test_respondentes_em_valores_e_por_trecho():
+    df = _survey(seed=3)
+    set_fingerprint(df, "teste-contem")
+    with_id = df.dropna(subset=["id"])
+    em = with_id["curso"].isin(["ADM", "MED"])
+    assert respondents_in(df, "id", "curso", ["ADM", "MED"]) == with_id[em]["id"].nunique()
+    contem = with_id["curso"].str.lower().str.contains("d", na=False)
+    assert respondents_containing(df, "id", "curso", "d") == with_id[contem]["id"].nunique()
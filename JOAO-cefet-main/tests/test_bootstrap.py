@@ -0,0 +1,57 @@
+import numpy as np
+
+from bootstrap import index_interval, percent_interval, resample_counts
+
+LEVELS = np.array([20.0, 40.0, 60.0, 80.0, 100.0])
+COUNTS = np.array([[12, 30, 55, 80, 23], [0, 0, 0, 0, 0], [0, 0, 40, 0, 0], [3, 1, 0, 2, 9]])
+
+
+def _row_bootstrap(counts, resamples, seed):
+    # bootstrap direto: reamostra as respostas (linhas) de cada item
+    rng = np.random.default_rng(seed)
+    out = []
+    for c in counts:
+        answers = np.repeat(LEVELS, c)
+        picks = rng.integers(0, len(answers), size=(resamples, len(answers)))
+        out.append(answers[picks].mean(axis=1))
+    stat = np.array(out).T
+    return np.quantile(stat, [0.025, 0.975], axis=0)
+
+
+def test_reamostragem_preserva_o_total_e_e_reprodutivel():
+    draws = resample_counts(COUNTS, resamples=200, seed=7)
+    assert draws.shape == (200, 4, 5)
+    np.testing.assert_array_equal(draws.sum(axis=2), np.broadcast_to(COUNTS.sum(axis=1), (200, 4)))
+    np.testing.assert_array_equal(draws[:, 2], np.broadcast_to(COUNTS[2], (200, 5)))  # um nível só: sem variação
+    np.testing.assert_array_equal(draws, resample_counts(COUNTS, resamples=200, seed=7))
+    assert not np.array_equal(draws, resample_counts(COUNTS, resamples=200, seed=8))
+
+
+def test_intervalo_do_indice_igual_ao_bootstrap_por_linhas():
+    low, high = index_interval(COUNTS, resamples=4_000, seed=1)
+    point = (COUNTS @ LEVELS) / np.maximum(COUNTS.sum(axis=1), 1)
+    assert np.isnan(low[1]) and np.isnan(high[1])  # item sem respostas válidas
+    assert low[2] == high[2] == 60.0
+    ok = [0, 2, 3]
+    assert (low[ok] <= point[ok]).all() and (point[ok] <= high[ok]).all()
+    # multinomial sobre as contagens ≡ reamostrar as linhas (mesma distribuição)
+    naive = _row_bootstrap(COUNTS[ok], 4_000, seed=2)
+    np.testing.assert_allclose(low[ok], naive[0], atol=1.5)
+    np.testing.assert_allclose(high[ok], naive[1], atol=1.5)
+
+
+def test_intervalo_do_percentual_contem_a_estimativa():
+    totals = np.array([250, 0, 45, 15])  # totais de respondentes podem passar da soma das contagens
+    low, high = percent_interval(COUNTS, totals, resamples=2_000, seed=3)
+    assert low.shape == high.shape == (4, 5)
+    assert np.isnan(low[1]).all()
+    pct = COUNTS[[0, 2, 3]] / totals[[0, 2, 3], None] * 100
+    assert (low[[0, 2, 3]] <= pct + 1e-9).all() and (pct - 1e-9 <= high[[0, 2, 3]]).all()
+
+
+def test_percentual_com_respondente_em_mais_de_um_nivel_fica_ate_100():
+    # respondentes repetidos: as contagens por nível somam mais que o total
+    counts, totals = np.array([[0, 0, 0, 2, 1]]), np.array([2])
+    low, high = percent_interval(counts, totals, resamples=500, seed=4)
+    assert (high <= 100).all() and (low >= 0).all()
+    assert low[0, 3] == high[0, 3] == 100.0
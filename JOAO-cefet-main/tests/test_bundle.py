@@ -0,0 +1,71 @@
+import json
+
+import pandas as pd
+import pytest
+
+import workbook_cache
+from bundle import BundleMiss, KpiBundle, _decode, _encode, build_bundle
+from datasets import prepare_dataset
+from kpi_registry import LIKERT_BLOCKS
+from kpis import bundle_catalog, kpi_counts, kpi_crosstab, likert_block_spec
+from synthetic import synthetic_survey, to_workbook_bytes
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    # Arrow da planilha num diretório do teste, não no .cache do usuário
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(workbook_cache, "CACHE_DIR", tmp_path_factory.mktemp("workbooks"))
+        return prepare_dataset(to_workbook_bytes(synthetic_survey(300, seed=7)))
+
+
+@pytest.fixture(scope="module")
+def payload(dataset):
+    return build_bundle(dataset.df, dataset.id_col, bundle_catalog, "teste.xlsx", "hash-teste")
+
+
+def _bundle(payload) -> KpiBundle:
+    # mesmo caminho do arquivo: JSON de ida e volta
+    raw = json.loads(json.dumps(payload, ensure_ascii=False))
+    return KpiBundle(raw["meta"], {k: _decode(v) for k, v in raw["respostas"].items()})
+
+
+def _same(a, b) -> bool:
+    return json.dumps(_encode(a), sort_keys=True, default=str) == json.dumps(_encode(b), sort_keys=True, default=str)
+
+
+def test_dataframe_ida_e_volta():
+    df = pd.DataFrame({"Grupo": ["a", "a", None, "b"], "n": [1, 2, 3, 4], "%": [1.5, float("nan"), 2.0, 0.0]})
+    back = _decode(json.loads(json.dumps(_encode(df))))
+    pd.testing.assert_frame_equal(back, df)
+    empty = pd.DataFrame(columns=["a", "b"])
+    pd.testing.assert_frame_equal(_decode(json.loads(json.dumps(_encode(empty)))), empty)
+
+
+def test_chaves_canonicas(payload):
+    keys = set(payload["respostas"])
+    # blocos pelo id, sem a coluna de ID na chave
+    assert {f'likert_block_spec:["{k}"]' for k in LIKERT_BLOCKS} <= keys
+    assert 'kpi_counts:["perfil", "Perfil", false]' in keys
+    # a aba não cruza a dimensão com ela mesma nem usa IES/curso como KPI
+    assert not any(k.startswith("kpi_crosstab:") and k.split(",")[1].strip() in ('"ies"', '"curso"') for k in keys)
+
+
+def test_artefato_responde_como_os_dados(dataset, payload):
+    bundle = _bundle(payload)
+    df, id_col = dataset.df, dataset.id_col
+    block = LIKERT_BLOCKS["alunos"]
+    args = (block["detect_keywords"], block["prefix_label"], block.get("classe"))
+    assert _same(likert_block_spec(bundle, id_col, *args), likert_block_spec(df, id_col, *args))
+    assert _same(kpi_counts(bundle, id_col, "grau", "Grau"), kpi_counts(df, id_col, "grau", "Grau"))
+    assert _same(kpi_crosstab(bundle, id_col, "curso", "fundador"), kpi_crosstab(df, id_col, "curso", "fundador"))
+    # todas as chamadas do catálogo são atendidas pelo artefato
+    bundle_catalog(bundle, id_col)
+
+
+def test_id_diferente_nao_e_atendido(payload):
+    bundle = _bundle(payload)
+    with pytest.raises(BundleMiss):
+        kpi_counts(bundle, "outro_id", "grau", "Grau")
+    with pytest.raises(BundleMiss):
+        kpi_counts(bundle, bundle.id_col, "grau", "Rótulo novo")
@@ -0,0 +1,78 @@
+import pytest
+
+from column_index import ColumnIndex, normalize_text
+from kpi_registry import COLUMN_SPECS, ID_CANDIDATES, LIKERT_BLOCKS
+from synthetic import synthetic_survey
+
+
+def _baseline_find_cols(columns, *keywords, require_all=True):
+    # laço original do app: substring sobre o texto normalizado, coluna a coluna
+    out = []
+    for c in columns:
+        h = normalize_text(c)
+        if require_all:
+            ok = all(normalize_text(k) in h for k in keywords)
+        else:
+            ok = any(normalize_text(k) in h for k in keywords)
+        if ok:
+            out.append(c)
+    return out
+
+
+def _baseline_respondent_id(columns, candidates):
+    norm_map = {normalize_text(c): c for c in columns}
+    for c in candidates:
+        if normalize_text(c) in norm_map:
+            return norm_map[normalize_text(c)]
+    for c in columns:
+        n = normalize_text(c)
+        if "respondent" in n or "respondente" in n:
+            return c
+    return None
+
+
+HEADERS = [
+    *synthetic_survey(5, seed=0).columns,
+    # variações de acento/caixa, cabeçalhos repetidos após normalizar, não-texto
+    "INSTITUIÇÃO DE ENSINO SUPERIOR", "instituicao de ensino superior", " Instituição de Ensino Superior ",
+    "Curso (graduação)", "Sócio/fundador?", "E-mail", 2024, "respondente_id",
+]
+KEYWORDS = [
+    *[(kw, True) for specs in COLUMN_SPECS.values() for kw, _ in specs],
+    *[(tuple(b["detect_keywords"]), True) for b in LIKERT_BLOCKS.values()],
+    # pedaços de token, pontuação, vazio e palavras que atravessam tokens
+    (("profess",), True), (("ngenh", "ensino"), True), (("o d",), True), (("?",), True),
+    (("(gradua",), True), (("",), True), (("/fund",), True), (("2024",), True), ((), True), ((), False),
+    (("curso", "grau", "inexistente"), False), (("SÓCIO", "e-mail"), False),
+]
+
+
+@pytest.mark.parametrize("keywords,require_all", KEYWORDS)
+def test_find_cols_igual_ao_laco_original(keywords, require_all):
+    index = ColumnIndex(HEADERS)
+    for mode in (require_all, not require_all):
+        got = index.find_cols(*keywords, require_all=mode)
+        assert got == _baseline_find_cols(HEADERS, *keywords, require_all=mode)
+        assert index.find_first(*keywords, require_all=mode) == (got[0] if got else None)
+
+
+def test_blocos_likert_encontram_colunas():
+    # a paridade acima não pode ser só de listas vazias
+    index = ColumnIndex(HEADERS)
+    assert all(index.find_cols(*b["detect_keywords"]) for b in LIKERT_BLOCKS.values())
+
+
+def test_colunas_repetidas_mantem_ordem_e_repeticao():
+    headers = ["Curso", "IES", "Curso", "curso "]
+    assert ColumnIndex(headers).find_cols("curso") == ["Curso", "Curso", "curso "]
+
+
+@pytest.mark.parametrize("headers", [
+    HEADERS,
+    ["id_respondente", "Respondent ID", "respondent id"],  # normalizados iguais: vale o último, como no dict
+    ["Nome", "Código do respondente", "Respondentes únicos"],
+    ["Nome", "Curso"],
+])
+def test_find_respondent_id_igual_ao_original(headers):
+    assert ColumnIndex(headers).find_respondent_id(ID_CANDIDATES) == _baseline_respondent_id(headers, ID_CANDIDATES)
+
@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+from column_mapping import ColumnMapping, ColumnSpec, apply_column_mapping, compile_mapping, match_headers
+
+STEM = "O quanto as seguintes características estão presentes nos(as) ALUNOS(AS) da minha Instituição?"
+SPECS = [
+    ColumnSpec("IDADE", "idade", "Idade", "perfil"),
+    ColumnSpec("Qual é o seu curso de graduação?", "curso_graduacao", "Curso", "perfil"),
+    ColumnSpec(STEM + "Visão para oportunidades", "alunos_visao_oportunidades", "Visão", "alunos"),
+    ColumnSpec(STEM + "Inconformismo com a realidade", "alunos_inconformismo", "Inconformismo", "alunos"),
+]
+
+
+@pytest.fixture
+def mapping():
+    return ColumnMapping(SPECS)
+
+
+def _match(mapping, headers):
+    return dict(match_headers(tuple(headers), mapping))
+
+
+def test_exato_e_tecnico(mapping):
+    assert _match(mapping, ["IDADE", "curso_graduacao", "Outra"]) == {"IDADE": "idade", "curso_graduacao": "curso_graduacao"}
+
+
+def test_variacao_de_acento_caixa_e_sufixo_response(mapping):
+    headers = ["qual e o seu CURSO de graduacao", "Idade Response", STEM.upper() + "VISAO PARA OPORTUNIDADES"]
+    assert _match(mapping, headers) == {
+        headers[0]: "curso_graduacao", headers[1]: "idade", headers[2]: "alunos_visao_oportunidades",
+    }
+
+
+def test_erro_de_digitacao_casa_pelo_aproximado(mapping):
+    typo = "Qual é o seu curso de graduaçao ?"  # sem o til e com espaço antes da interrogação
+    typo2 = STEM + "Visão para oportunidads"
+    assert _match(mapping, [typo, typo2]) == {typo: "curso_graduacao", typo2: "alunos_visao_oportunidades"}
+
+
+@pytest.mark.parametrize("header", [
+    STEM + "Visão para problemas",       # mesma matriz, item diferente: o final não casa
+    STEM + "Inconformismo",              # prefixo de outro item
+    "Qual é o seu curso de pós-graduação?",
+    "IDADES",
+])
+def test_quase_igual_nao_casa(mapping, header):
+    assert _match(mapping, [header]) == {}
+
+
+def test_dois_cabecalhos_disputando_o_mesmo_nome_tecnico(mapping):
+    # o exato vence o normalizado, mesmo vindo depois; o outro fica com o nome original
+    assert _match(mapping, ["idade ", "IDADE"]) == {"IDADE": "idade"}
+    # entre aproximados, vence o mais parecido
+    far, near = "Qual é o seu curso de graduaçãozz", "Qual é o seu curso de graduaçã?"
+    assert _match(mapping, [far, near]) == {near: "curso_graduacao"}
+    # cada nome técnico é usado uma vez
+    assert _match(mapping, ["IDADE", "Idade", "idade"]) == {"IDADE": "idade"}
+
+
+def test_renomeia_sem_colidir_com_coluna_existente(tmp_path):
+    path = tmp_path / "mapa.csv"
+    pd.DataFrame(SPECS).to_csv(path, index=False)
+    df = pd.DataFrame(columns=["IDADE", "curso_graduacao", "Qual é o seu curso de graduação?"])
+    out, labels, classes = apply_column_mapping(df, path)
+    assert list(out.columns) == ["idade", "curso_graduacao", "Qual é o seu curso de graduação?"]
+    assert labels["idade"] == "Idade" and classes["alunos_inconformismo"] == "alunos"
+    assert compile_mapping(path) is compile_mapping(path)  # compilado uma vez por versão do arquivo
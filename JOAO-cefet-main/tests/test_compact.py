@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from compact import compact_dataset, restore_ids
+from likert_codec import likert_codes
+from memo import set_fingerprint
+
+LIKERT = ["4 - Boa", "Boa", None, "Não observado", "5", "1 Muito ruim", "Excelente", "2 Ruim", "Boa", "Razoável"]
+
+
+def _survey() -> pd.DataFrame:
+    df = pd.DataFrame({
+        "Respondent ID": ["a", "b", "c", "c", None, "f", "g", "h", "i", "j"],
+        "q1": LIKERT,
+        "q2": LIKERT[::-1],
+        "curso": ["Eng", "Adm", "Eng", "Eng", "Adm", "Eng", "Adm", "Eng", "Adm", "Eng"],
+    })
+    return set_fingerprint(df, "teste-compacto")
+
+
+def test_compacto_mantem_as_respostas_originais():
+    raw = _survey()
+    out, id_values, report = compact_dataset(raw, "Respondent ID", ["q1", "q2"])
+    assert report["likert"] == 2
+    assert out["q1"].cat.codes.dtype == np.int8
+    restored = restore_ids(out, "Respondent ID", id_values)
+    for c in raw.columns:
+        assert restored[c].astype(object).where(restored[c].notna(), None).tolist() == raw[c].tolist(), c
+    # CSV igual ao dos dados brutos
+    assert restored.to_csv(index=False) == raw.to_csv(index=False)
+
+
+def test_compacto_codifica_os_mesmos_niveis():
+    raw = _survey()
+    out, _, _ = compact_dataset(raw, "Respondent ID", ["q1", "q2"])
+    assert (likert_codes(out, ["q1", "q2"]) == likert_codes(raw, ["q1", "q2"])).all()
+    # categorias na ordem da escala, neutros por último
+    assert list(out["q1"].cat.categories[:2]) == ["1 Muito ruim", "2 Ruim"]
+    assert out["q1"].cat.categories[-1] == "Não observado"
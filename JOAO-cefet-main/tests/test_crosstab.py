@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregation import factorize_column
+from crosstab import likert_crosstab_counts, value_crosstab_counts
+from likert_codec import parse_likert_value
+from memo import set_fingerprint
+from multiselect import split_options
+
+ITEMS = ["q1", "q2", "q3"]
+ANSWERS = ["1 Muito ruim", "2 Ruim", "3 Razoável", "4 Boa", "5 Excelente", "Não se aplica", "talvez", None]
+
+
+def _survey(duplicates: bool, n=1_200, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = rng.integers(0, n // 3, n).astype(float) if duplicates else np.arange(n, dtype=float)
+    if duplicates:
+        ids[rng.random(n) < 0.05] = np.nan
+    df = pd.DataFrame({
+        "id": ids,
+        "curso": rng.choice(["ADM", "DIR", "ENG", None], n, p=[0.4, 0.3, 0.25, 0.05]),
+        "grau": pd.Categorical(rng.choice(["Bacharelado", "Licenciatura"], n),
+                               categories=["Bacharelado", "Licenciatura", "Tecnólogo"]),
+        "fonte": rng.choice(["Bolsa", "Amigos;Bolsa", "Site", "Site ; Amigos", None], n),
+        **{q: rng.choice(ANSWERS, n) for q in ITEMS},
+    })
+    set_fingerprint(df, f"teste-cruzamento-{duplicates}-{seed}")
+    return df
+
+
+def _naive_likert(df, dim):
+    long = df.melt(id_vars=["id", dim], value_vars=ITEMS, var_name="item", value_name="resp")
+    long["nivel"] = long["resp"].map(parse_likert_value)
+    long = long.dropna(subset=[dim, "nivel"])
+    index = long.assign(v=long["nivel"] * 20).groupby(["item", dim], observed=True)["v"].mean()
+    ids = long.dropna(subset=["id"])
+    counts = ids.groupby(["item", dim, "nivel"], observed=True)["id"].nunique()
+    valid = ids.groupby(["item", dim], observed=True)["id"].nunique()
+    return counts, valid, index
+
+
+@pytest.mark.parametrize("duplicates", [False, True])
+@pytest.mark.parametrize("dim", ["curso", "grau"])
+def test_likert_igual_ao_groupby(duplicates, dim):
+    df = _survey(duplicates)
+    tab = likert_crosstab_counts(df, "id", dim, lambda: factorize_column(df[dim]), ITEMS)
+    counts, valid, index = _naive_likert(df, dim)
+    assert tab.groups == sorted(valid.index.get_level_values(dim).unique())  # grupos vazios ficam de fora
+    for i, q in enumerate(ITEMS):
+        for g, group in enumerate(tab.groups):
+            assert tab.valid[i, g] == valid.get((q, group), 0)
+            assert tab.index[i, g] == pytest.approx(index[(q, group)])
+            for lvl in range(5):
+                assert tab.counts[i, g, lvl] == counts.get((q, group, lvl + 1), 0), (q, group, lvl)
+
+
+@pytest.mark.parametrize("duplicates", [False, True])
+def test_valores_e_multipla_escolha_iguais_ao_groupby(duplicates):
+    df = _survey(duplicates, seed=1)
+    ok = df.dropna(subset=["id", "curso"])
+
+    tab = value_crosstab_counts(df, "id", "curso", lambda: factorize_column(df["curso"]), "grau")
+    want = ok.groupby(["curso", "grau"], observed=True)["id"].nunique()
+    assert tab.groups == ["ADM", "DIR", "ENG"] and tab.values == ["Bacharelado", "Licenciatura", "Tecnólogo"]
+    assert tab.totals.tolist() == ok.groupby("curso")["id"].nunique().tolist()
+    for g, group in enumerate(tab.groups):
+        for v, value in enumerate(tab.values):
+            assert tab.counts[g, v] == want.get((group, value), 0)
+
+    tab = value_crosstab_counts(df, "id", "curso", lambda: factorize_column(df["curso"]), "fonte", multi=True)
+    pairs = ok.assign(opcao=ok["fonte"].map(split_options)).explode("opcao").dropna(subset=["opcao"])
+    want = pairs.groupby(["curso", "opcao"])["id"].nunique()
+    assert tab.values == sorted(pairs["opcao"].unique())
+    for g, group in enumerate(tab.groups):
+        for v, value in enumerate(tab.values):
+            assert tab.counts[g, v] == want.get((group, value), 0)
@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import datasets
+from datasets import Dataset, SharedDatasetCache, _forget
+from memo import BoundedCache
+
+
+def _cache(max_bytes=100, ttl=60.0, **kw):
+    return SharedDatasetCache(max_bytes, ttl, sizeof=len, **kw)
+
+
+def test_limite_em_bytes_descarta_o_menos_usado():
+    evicted = []
+    cache = _cache(on_evict=lambda key, value: evicted.append(key))
+    for key in "abc":
+        cache.get_or_load(key, lambda: b"x" * 40)
+    assert evicted == ["a"] and cache.bytes == 80
+    cache.get("b")  # b passa a ser o mais recente
+    cache.get_or_load("d", lambda: b"x" * 40)
+    assert evicted == ["a", "c"]
+    assert [k for k in "abcd" if cache.get(k) is not None] == ["b", "d"]
+    # um valor maior que o limite fica sozinho (não é recarregado a cada acesso)
+    cache.get_or_load("grande", lambda: b"x" * 500)
+    assert cache.get("grande") is not None and cache.stats()["entradas"] == 1
+
+
+def test_ttl_expira_a_entrada(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(datasets.time, "time", lambda: now[0])
+    cache, loads = _cache(ttl=10), []
+
+    def load():
+        loads.append(1)
+        return b"v"
+    cache.get_or_load("k", load)
+    now[0] += 5
+    cache.get_or_load("k", load)
+    now[0] += 11
+    assert cache.get("k") is None
+    cache.get_or_load("k", load)
+    assert len(loads) == 2 and cache.stats()["evictions"] == 1
+
+
+def test_falha_na_carga_nao_deixa_trava_e_permite_nova_tentativa():
+    cache = _cache()
+
+    def boom():
+        raise ValueError("planilha corrompida")
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            cache.get_or_load(("upload", "x"), boom)
+    assert cache._loading == {} and cache.bytes == 0
+    assert cache.get_or_load(("upload", "x"), lambda: b"ok") == b"ok"
+
+
+def test_cargas_simultaneas_da_mesma_chave_rodam_uma_vez():
+    cache, calls = _cache(), []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.05)
+        return b"v"
+    threads = [threading.Thread(target=cache.get_or_load, args=("k", slow)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and cache._loading == {}
+
+
+def test_despejo_derruba_os_caches_derivados():
+    derived = BoundedCache(max_entries=8)
+    ds = Dataset(pd.DataFrame({"a": [1]}), None, None, None, "teste-despejo")
+    derived.put(("teste-despejo", "likert"), 1)
+    derived.put(("teste-despejo/recorte", "likert"), 2)
+    derived.put(("outro", "likert"), 3)
+    cache = SharedDatasetCache(1, 60, sizeof=lambda ds: 1, on_evict=_forget)
+    cache.get_or_load("k", lambda: ds)
+    cache.clear()
+    assert derived.get(("teste-despejo", "likert")) is None
+    assert derived.get(("teste-despejo/recorte", "likert")) is None
+    assert derived.get(("outro", "likert")) == 3
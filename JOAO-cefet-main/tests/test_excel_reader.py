@@ -0,0 +1,77 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from excel_reader import iter_projected, read_projected
+
+HEADER = ["Respondent ID", "Curso", "Curso", None, 2024, "  ", "Idade", "Curso"]
+ROWS = [
+    [1, "Eng", "Adm", "x", 10, None, 20, "Dir"],
+    [None] * 8,                                   # linha em branco entre os dados
+    [2, "Adm", None, None, 11, "y", None, None],
+    [3, None, None, None, None, None, 31],        # linha mais curta que o cabeçalho
+    [None] * 8,
+    [None] * 8,
+    [4, "Dir", "Eng", "z", 12, None, 44, "Eng"],
+]
+
+
+def _xlsx(trailing_blank: int = 2) -> bytes:
+    wb = Workbook()
+    ws = wb.active
+    ws.append(HEADER)
+    for row in ROWS:
+        ws.append(row)
+    last = len(ROWS) + 1
+    for r in range(trailing_blank):
+        ws.cell(row=last + r + 1, column=1).value = None  # células vazias no fim da aba
+        ws.cell(row=last + r + 1, column=3).number_format = "0.00"
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def _value(v):
+    if pd.isna(v):
+        return np.nan  # None e NaN viram o mesmo nulo
+    return float(v) if isinstance(v, (int, float, np.number)) else v
+
+
+def _plain(df: pd.DataFrame) -> pd.DataFrame:
+    # compara valores, não os tipos compactos (categorias/inteiros menores)
+    return df.astype(object).map(_value).astype(object)
+
+
+def _everything(names):
+    return names
+
+
+@pytest.mark.parametrize("nrows", [None, 1, 2, 4, 100])
+def test_leitura_projetada_igual_ao_read_excel(nrows):
+    data = _xlsx()
+    want = pd.read_excel(io.BytesIO(data), engine="openpyxl", nrows=nrows)
+    got = read_projected(data, select=_everything, nrows=nrows)
+    assert list(got.columns) == list(want.columns)
+    assert list(want.columns) == ["Respondent ID", "Curso", "Curso.1", "Unnamed: 3", 2024, "  ",
+                                  "Idade", "Curso.2"]
+    pd.testing.assert_frame_equal(_plain(got), _plain(want))
+
+
+def test_projecao_mantem_as_linhas_em_branco_do_meio():
+    data = _xlsx()
+    want = pd.read_excel(io.BytesIO(data), engine="openpyxl")[["Respondent ID", "Curso.1", "Idade"]]
+    got = read_projected(data, select=lambda names: ["Respondent ID", "Curso.1", "Idade"])
+    assert len(got) == len(want) == 7  # 3 linhas em branco entre os dados; as do fim saem
+    pd.testing.assert_frame_equal(_plain(got), _plain(want))
+
+
+def test_blocos_somam_a_leitura_inteira():
+    data = _xlsx()
+    chunks = list(iter_projected(io.BytesIO(data), 3, select=_everything))
+    assert [len(c) for c in chunks] == [3, 3, 1]
+    full = _plain(pd.read_excel(io.BytesIO(data), engine="openpyxl"))
+    for start, chunk in zip([0, 3, 6], chunks):
+        pd.testing.assert_frame_equal(_plain(chunk), full.iloc[start:start + len(chunk)].reset_index(drop=True))
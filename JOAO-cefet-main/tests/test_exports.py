@@ -0,0 +1,45 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+import exports
+from compact import compact_dataset
+from datasets import SharedDatasetCache
+from exports import export_dataset, iter_csv_chunks
+from memo import set_fingerprint
+
+
+def _survey(n: int, tag: str) -> pd.DataFrame:
+    rng = np.random.default_rng(len(tag))
+    df = pd.DataFrame({
+        "Respondent ID": [f"r{i}" for i in range(n)],
+        "curso": rng.choice(["Eng", "Adm", "Dir"], n),
+        "nota": rng.choice(["1 - Muito ruim", "4 - Boa", "Não observado"], n),
+    })
+    return set_fingerprint(df, f"teste-export-{tag}")
+
+
+def test_csv_em_blocos_igual_ao_csv_inteiro():
+    raw = _survey(1000, "blocos")
+    df, id_values, _ = compact_dataset(raw, "Respondent ID", ["nota"])
+    chunks = list(iter_csv_chunks(df, "Respondent ID", id_values, chunk_rows=128))
+    assert len(chunks) == 8
+    assert b"".join(chunks) == raw.to_csv(index=False).encode("utf-8")
+    assert export_dataset(df, "csv", "Respondent ID", id_values) == b"".join(chunks)
+    back = pd.read_parquet(io.BytesIO(export_dataset(df, "parquet", "Respondent ID", id_values)))
+    assert back["Respondent ID"].tolist() == raw["Respondent ID"].tolist()
+
+
+def test_cache_de_exportacoes_limitado_por_bytes(monkeypatch):
+    cache = SharedDatasetCache(40_000, 60, sizeof=len)
+    monkeypatch.setattr(exports, "_EXPORTS", cache)
+    sizes = []
+    for tag in "abcdef":
+        sizes.append(len(export_dataset(_survey(1000, tag), "csv")))
+        assert cache.bytes <= max(cache.max_bytes, sizes[-1])
+    assert cache.evictions > 0
+    # repetir o último download não regera o arquivo
+    hits = cache.hits
+    export_dataset(_survey(1000, "f"), "csv")
+    assert cache.hits == hits + 1
@@ -0,0 +1,160 @@
+import http.server
+import threading
+
+import pytest
+import requests
+
+from http_fetch import _paths, fetch, still_current
+
+BODY = b"conteudo da planilha"
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    # estado do servidor de teste: ETag atual, status forçado e corpos enviados
+    etag = '"v1"'
+    force_status = None
+    stray_304 = 0  # quantos 304 mandar sem pedido condicional (proxy)
+    bodies = 0
+
+    def _respond(self, with_body: bool):
+        cls = type(self)
+        if cls.stray_304:
+            cls.stray_304 -= 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        if cls.force_status is not None:
+            self.send_response(cls.force_status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == cls.etag:
+            self.send_response(304)
+            self.send_header("ETag", cls.etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", cls.etag)
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        if with_body:
+            cls.bodies += 1
+            self.wfile.write(BODY)
+
+    def do_GET(self):
+        self._respond(True)
+
+    def do_HEAD(self):
+        self._respond(False)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    handler = type("Handler", (_Handler,), {})
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv, handler, f"http://127.0.0.1:{srv.server_port}/dados.xlsx"
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture
+def client():
+    # sem retentativas: o 5xx do teste volta na hora
+    with requests.Session() as s:
+        yield s
+
+
+def test_primeiro_get_baixa_e_grava_o_cache(server, client, tmp_path):
+    _, handler, url = server
+    r = fetch(url, cache_dir=tmp_path, http=client)
+    assert (r.status, r.content, r.etag) == ("baixado", BODY, '"v1"')
+    assert handler.bodies == 1
+
+
+def test_etag_igual_responde_304_sem_baixar_o_corpo(server, client, tmp_path):
+    _, handler, url = server
+    fetch(url, cache_dir=tmp_path, http=client)
+    r = fetch(url, cache_dir=tmp_path, http=client)
+    assert (r.status, r.content) == ("nao_modificado", BODY)
+    assert handler.bodies == 1
+
+
+def test_etag_novo_baixa_de_novo(server, client, tmp_path):
+    _, handler, url = server
+    fetch(url, cache_dir=tmp_path, http=client)
+    handler.etag = '"v2"'
+    r = fetch(url, cache_dir=tmp_path, http=client)
+    assert (r.status, r.etag) == ("baixado", '"v2"')
+    assert handler.bodies == 2
+
+
+def test_304_sem_corpo_guardado_baixa_de_novo(server, client, tmp_path):
+    _, handler, url = server
+    fetch(url, cache_dir=tmp_path, http=client)
+    body, meta = _paths(url, tmp_path)
+    body.unlink()  # sobrou só o meta
+    handler.stray_304 = 1
+    r = fetch(url, cache_dir=tmp_path, http=client)
+    assert (r.status, r.content) == ("baixado", BODY)
+    assert body.read_bytes() == BODY and meta.exists()
+    # corpo vazio no disco também não é reaproveitado
+    body.write_bytes(b"")
+    r = fetch(url, cache_dir=tmp_path, http=client)
+    assert (r.status, r.content) == ("baixado", BODY)
+
+
+def test_304_insistente_sem_corpo_levanta_erro(server, client, tmp_path):
+    _, handler, url = server
+    handler.stray_304 = 2
+    with pytest.raises(requests.HTTPError):
+        fetch(url, cache_dir=tmp_path, http=client)
+    assert not any(tmp_path.iterdir())
+
+
+def test_5xx_serve_a_copia_local(server, client, tmp_path):
+    _, handler, url = server
+    fetch(url, cache_dir=tmp_path, http=client)
+    handler.force_status = 500
+    r = fetch(url, cache_dir=tmp_path, http=client)
+    assert (r.status, r.content) == ("offline", BODY)
+
+
+def test_servidor_fora_do_ar_serve_a_copia_local(server, client, tmp_path):
+    srv, _, url = server
+    fetch(url, cache_dir=tmp_path, http=client)
+    srv.shutdown()
+    srv.server_close()
+    r = fetch(url, cache_dir=tmp_path, timeout=2, http=client)
+    assert (r.status, r.content) == ("offline", BODY)
+
+
+def test_4xx_com_copia_local_levanta_erro(server, client, tmp_path):
+    _, handler, url = server
+    fetch(url, cache_dir=tmp_path, http=client)
+    handler.force_status = 404
+    with pytest.raises(requests.HTTPError):
+        fetch(url, cache_dir=tmp_path, http=client)
+
+
+def test_5xx_sem_copia_local_levanta_erro(server, client, tmp_path):
+    _, handler, url = server
+    handler.force_status = 500
+    with pytest.raises(requests.HTTPError):
+        fetch(url, cache_dir=tmp_path, http=client)
+
+
+def test_still_current(server, client):
+    srv, handler, url = server
+    assert still_current(url, '"v1"', http=client) is True
+    assert still_current(url, None, http=client) is None
+    handler.etag = '"v2"'
+    assert still_current(url, '"v1"', http=client) is False
+    assert handler.bodies == 0
+    srv.shutdown()
+    srv.server_close()
+    assert still_current(url, '"v2"', timeout=2, http=client) is None
@@ -0,0 +1,71 @@
+import pandas as pd
+
+from kpis import kpi_counts, kpi_counts_top, likert_matrix
+from memo import set_fingerprint
+
+
+def test_likert_matrix_total_conta_so_respostas_validas():
+    df = pd.DataFrame({
+        "id": [1, 1, 2, 3, 4, 5, None],
+        "q": ["4 Boa", "5 Excelente", "Boa", "talvez", "não observado", None, "1"],
+    })
+    set_fingerprint(df, "teste-likert-total")
+    out = likert_matrix(df, {"Pergunta": "q"}, "id").set_index("Resposta")
+    # só os respondentes 1 e 2 têm resposta na escala; ID ausente não conta
+    assert out["Total"].unique().tolist() == [2]
+    assert out.loc["4 Boa", ["Contagem", "Percentual"]].tolist() == [2, 100.0]
+    assert out.loc["5 Excelente", ["Contagem", "Percentual"]].tolist() == [1, 50.0]
+
+    fora = set_fingerprint(pd.DataFrame({"id": [1, 2], "q": ["talvez", "Não se aplica"]}), "teste-likert-fora")
+    assert likert_matrix(fora, {"Pergunta": "q"}, "id").empty
+
+
+# -----------------------------------------------------------------------------
+# kpi_counts_top: linha "Outros (k)"
+# -----------------------------------------------------------------------------
+IES = "Instituição de Ensino Superior"
+PROJETOS = "Ao longo da sua graduação, quais projetos você já participou?"
+
+
+def _ies_frame():
+    # A e B ficam no topo; 6 e 7 aparecem em duas categorias da cauda (C, D, E)
+    rows = [(1, "A"), (2, "A"), (3, "A"), (9, "A"), (4, "B"), (5, "B"), (10, "B"),
+            (6, "C"), (6, "D"), (7, "D"), (7, "E"), (8, "E")]
+    return pd.DataFrame(rows, columns=["Respondent ID", IES])
+
+
+def test_outros_conta_respondentes_distintos_da_cauda():
+    chart, tail = kpi_counts_top(_ies_frame(), "Respondent ID", "ies", "IES", of_total=True, n=2)
+    assert chart["IES"].tolist() == ["A", "B", "Outros (3)"]
+    assert sorted(tail["IES"]) == ["C", "D", "E"] and tail["Respondentes"].sum() == 5
+    # 6, 7 e 8: três respondentes, não a soma das contagens
+    assert chart.iloc[-1][["Respondentes", "%"]].tolist() == [3, 30.0]
+
+
+def test_outros_sem_of_total_soma_as_contagens():
+    chart, tail = kpi_counts_top(_ies_frame(), "Respondent ID", "ies", "IES", n=2)
+    assert chart.iloc[-1]["Respondentes"] == 5
+    assert chart.iloc[-1]["%"] == round(float(tail["%"].sum()), 1)
+
+
+def test_outros_com_multipla_escolha():
+    df = pd.DataFrame({
+        "Respondent ID": [1, 2, 3, 4, 5],
+        PROJETOS: ["A;B", "A;B", "A;C;D", "A;C", "B;D"],
+    })
+    chart, tail = kpi_counts_top(df, "Respondent ID", "projetos", "Projeto", of_total=True, n=2)
+    assert chart["Projeto"].tolist() == ["A", "B", "Outros (2)"]
+    assert tail["Respondentes"].sum() == 4
+    assert chart.iloc[-1][["Respondentes", "%"]].tolist() == [3, 60.0]  # 3, 4 e 5
+
+
+def test_cauda_com_uma_categoria_nao_agrupa():
+    df = _ies_frame()
+    counts = kpi_counts(df, "Respondent ID", "ies", "IES")
+    assert len(counts) == 5
+    # n + 1 categorias: "Outros (1)" só trocaria o nome da última
+    chart, tail = kpi_counts_top(df, "Respondent ID", "ies", "IES", n=4)
+    pd.testing.assert_frame_equal(chart, counts)
+    assert tail.empty
+    chart, tail = kpi_counts_top(df, "Respondent ID", "ies", "IES", n=3)
+    assert chart.iloc[-1]["IES"] == "Outros (2)" and len(tail) == 2
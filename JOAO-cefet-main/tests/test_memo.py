@@ -0,0 +1,70 @@
+import gc
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from figures import cached_figure
+from kpi_registry import apply_mapping
+from likert_codec import likert_codes
+from memo import _FINGERPRINTS, dataset_fingerprint, forget_fingerprint, set_fingerprint, stored_fingerprint
+
+
+def _frame():
+    return set_fingerprint(pd.DataFrame({"id": [1, 2, 3], "q": ["1 Muito ruim", "5 Excelente", "3 Razoável"]}),
+                           "teste-fp")
+
+
+def test_quadros_derivados_nao_herdam_o_fingerprint():
+    df = _frame()
+    assert likert_codes(df, ["q"]).ravel().tolist() == [1, 5, 3]
+    edited = df.assign(q=["5 Excelente"] * 3)
+    ordered = df.sort_values("q")
+    assert stored_fingerprint(edited) is None and stored_fingerprint(ordered) is None
+    assert likert_codes(edited, ["q"]).ravel().tolist() == [5, 5, 5]
+    assert likert_codes(ordered, ["q"]).ravel().tolist() == [1, 3, 5]
+    assert len({dataset_fingerprint(df), dataset_fingerprint(edited), dataset_fingerprint(ordered)}) == 3
+
+
+def test_colunas_trocadas_in_place_invalidam():
+    df = _frame()
+    df["q2"] = df["q"]
+    assert stored_fingerprint(df) is None
+    assert dataset_fingerprint(df) != "teste-fp"
+
+
+def test_coluna_sobrescrita_invalida():
+    df = _frame()
+    df["q"] = ["5 Excelente"] * 3
+    assert stored_fingerprint(df) is None
+    assert likert_codes(df, ["q"]).ravel().tolist() == [5, 5, 5]
+    # edição de valores no mesmo array não é percebida: forget_fingerprint
+    df = _frame()
+    df.loc[0, "q"] = "5 Excelente"
+    assert stored_fingerprint(df) == "teste-fp"
+    forget_fingerprint(df)
+    assert dataset_fingerprint(df) != "teste-fp"
+
+
+def test_mapeamento_deriva_do_pai_e_registro_nao_vaza():
+    df = set_fingerprint(pd.DataFrame({"Respondent ID": [1], "IDADE": [20]}), "teste-mapa")
+    mapped = apply_mapping(df)
+    assert list(mapped.columns) == ["Respondent ID", "idade"]
+    assert stored_fingerprint(mapped) == "teste-mapa-mapa"
+    before = len(_FINGERPRINTS)
+    for _ in range(50):
+        set_fingerprint(pd.DataFrame({"a": np.arange(3)}), "temporario")
+    gc.collect()
+    assert len(_FINGERPRINTS) <= before
+
+
+def test_figura_cacheada_nao_e_compartilhada():
+    df, builds = _frame(), []
+    def build():
+        builds.append(1)
+        return go.Figure(go.Bar(x=["a", "b"], y=[1, 2]))
+    fig = cached_figure("teste", df, build, theme="dark")
+    fig["layout"]["title"] = "alterado"
+    again = cached_figure("teste", df, build, theme="dark")
+    assert len(builds) == 1 and "title" not in again["layout"]
+    assert again["data"][0]["type"] == "bar"
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from memo import set_fingerprint
+from multiselect import (cooccurrence_table, option_matrix, option_table, respondents_with_options,
+                         split_options)
+
+
+def _survey(k, n=1_500, seed=0):
+    # várias linhas por respondente, IDs ausentes, respostas vazias e opções repetidas
+    rng = np.random.default_rng(seed)
+    options = [f"Opção {i:02d}" for i in range(k)]
+    answers = []
+    for _ in range(n):
+        chosen = list(rng.choice(options, rng.integers(0, 4), replace=True))
+        answers.append(" ; ".join(chosen) if chosen else (None if rng.random() < 0.5 else ""))
+    ids = rng.integers(0, n // 3, n).astype(float)
+    ids[rng.random(n) < 0.05] = np.nan
+    df = pd.DataFrame({"id": ids, "fonte": answers})
+    set_fingerprint(df, f"teste-multi-{k}-{seed}")
+    return df
+
+
+def _pairs(df):
+    # (respondente, opção) distintos, sem o motor
+    rows = [(i, o) for i, v in zip(df["id"], df["fonte"]) if not pd.isna(i)
+            for o in split_options(v)]
+    return pd.DataFrame(rows, columns=["id", "opcao"]).drop_duplicates()
+
+
+@pytest.mark.parametrize("k", [5, 52, 60])  # 60 > _MAX_BITMASK_OPTIONS: caminho sem máscara de bits
+def test_contagens_e_coocorrencia_iguais_ao_calculo_direto(k):
+    df = _survey(k)
+    pairs = _pairs(df)
+    options = sorted(pairs["opcao"].unique())
+    assert len(options) == k
+
+    got = option_table(df, "id", "fonte").set_index("fonte")["id"]
+    assert got.to_dict() == pairs.groupby("opcao")["id"].nunique().to_dict()
+
+    sets = pairs.groupby("opcao")["id"].agg(set)
+    want = np.array([[len(sets[a] & sets[b]) for b in options] for a in options])
+    co = cooccurrence_table(df, "id", "fonte")
+    assert list(co.index) == options
+    np.testing.assert_array_equal(co.to_numpy(), want)
+
+    some = options[:3]
+    want_any = pairs[pairs["opcao"].isin(some)]["id"].nunique()
+    assert respondents_with_options(df, "id", "fonte", some) == want_any
+
+
+def test_coocorrencia_percentual_tem_diagonal_100():
+    df = _survey(8, seed=1)
+    m = option_matrix(df, "id", "fonte")
+    pct = cooccurrence_table(df, "id", "fonte", percent=True).to_numpy()
+    np.testing.assert_array_equal(np.diag(pct)[m.counts() > 0], 100.0)
+
+
+def test_split_options_remove_vazias_e_repetidas():
+    assert split_options(" Bolsa ;;Amigos; Bolsa ") == ["Bolsa", "Amigos"]
+    assert split_options(np.nan) == [] and split_options(None) == []
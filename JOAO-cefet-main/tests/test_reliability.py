@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from reliability import MIN_PAIRS, cronbach_alpha, item_total, pairwise_stats, standardized_alpha
+
+# 5 respondentes × 3 itens: variâncias 2.5, 1.3, 1.3 e variância do total 13.5,
+# então alfa = 3/2 · (1 − 5.1/13.5) = 14/15
+SMALL = np.array([[1, 2, 2], [2, 3, 3], [3, 3, 4], [4, 5, 4], [5, 4, 5]], dtype=np.int8)
+
+
+def _codes(n=800, k=6, seed=0):
+    # itens correlacionados (um fator comum) com ~15% de ausentes (código 0)
+    rng = np.random.default_rng(seed)
+    latent = rng.normal(size=(n, 1))
+    levels = np.clip(np.rint(3 + latent + rng.normal(scale=0.9, size=(n, k))), 1, 5).astype(np.int8)
+    levels[rng.random((n, k)) < 0.15] = 0
+    levels[:, -1] = 0
+    levels[:2, -1] = 3  # último item com menos de MIN_PAIRS respostas
+    return levels
+
+
+def _alpha(x):
+    k = x.shape[1]
+    return k / (k - 1) * (1 - x.var(axis=0, ddof=1).sum() / x.sum(axis=1).var(ddof=1))
+
+
+def test_alfa_calculado_a_mao():
+    stats = pairwise_stats(SMALL)
+    assert stats.complete == 5
+    assert cronbach_alpha(stats.cov) == pytest.approx(14 / 15)
+    np.testing.assert_allclose(stats.corr, np.corrcoef(SMALL.T.astype(float)))
+    r = stats.corr[~np.eye(3, dtype=bool)].mean()
+    assert standardized_alpha(stats.corr) == pytest.approx(3 * r / (1 + 2 * r))
+
+
+def test_pares_validos_iguais_ao_pandas():
+    codes = _codes()
+    frame = pd.DataFrame(np.where(codes > 0, codes, np.nan))
+    stats = pairwise_stats(codes)
+    valid = frame.notna().to_numpy().astype(int)
+    np.testing.assert_array_equal(stats.pairs, valid.T @ valid)
+    assert stats.complete == int(frame.notna().all(axis=1).sum())
+    np.testing.assert_allclose(stats.corr, frame.corr(min_periods=MIN_PAIRS).to_numpy(), equal_nan=True)
+    np.testing.assert_allclose(stats.cov[:-1, :-1], frame.iloc[:, :-1].cov().to_numpy())
+    assert np.isnan(stats.corr[-1]).all()  # item com menos de MIN_PAIRS respostas
+
+
+def test_item_total_igual_ao_calculo_por_linhas():
+    codes = _codes(seed=1)[:, :-1]
+    x = codes[(codes > 0).all(axis=1)].astype(float)  # linhas completas: pairwise = listwise
+    stats = pairwise_stats(x.astype(np.int8))
+    assert cronbach_alpha(stats.cov) == pytest.approx(_alpha(x))
+    r, alpha_without = item_total(stats.cov)
+    for i in range(x.shape[1]):
+        rest = np.delete(x, i, axis=1)
+        assert r[i] == pytest.approx(np.corrcoef(x[:, i], rest.sum(axis=1))[0, 1])
+        assert alpha_without[i] == pytest.approx(_alpha(rest))
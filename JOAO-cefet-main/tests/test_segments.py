@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from aggregation import distinct_count_tables, n_respondents
+from kpi_registry import apply_mapping, likert_columns
+from kpis import faixa_etaria, kpi_column, kpi_counts_top
+from likert_codec import likert_codes
+from memo import RowSubset, set_fingerprint
+from segments import bitmap_index, segment_view
+from synthetic import synthetic_survey
+
+
+@pytest.fixture(scope="module")
+def survey():
+    df = apply_mapping(synthetic_survey(3_000, likert_items=2, duplicate_rate=0.2, seed=7))
+    rng = np.random.default_rng(7)
+    for key in ("curso", "ies"):
+        col = kpi_column(df, key)
+        df.loc[rng.random(len(df)) < 0.05, col] = np.nan  # respostas em branco nas dimensões
+    idade = kpi_column(df, "idade")
+    df[idade] = df[idade].astype(float)
+    df.loc[rng.random(len(df)) < 0.05, idade] = np.nan
+    return set_fingerprint(df, "teste-segmentos")
+
+
+def _plain_mask(df, filters, mode):
+    parts = []
+    for dim, values in filters.items():
+        if dim == "faixa":
+            s = faixa_etaria(df, kpi_column(df, "idade"))
+        else:
+            s = df[kpi_column(df, dim)]
+        parts.append(s.notna().to_numpy() & s.astype(str).isin(values).to_numpy())
+    return np.logical_and.reduce(parts) if mode == "and" else np.logical_or.reduce(parts)
+
+
+def _filters(df):
+    cursos = sorted(df[kpi_column(df, "curso")].dropna().astype(str).unique())
+    ies = sorted(df[kpi_column(df, "ies")].dropna().astype(str).unique())
+    return [
+        {"curso": cursos[:3], "ies": ies[:1]},
+        {"curso": cursos[:1], "faixa": ["20–25", "31+"], "perfil": ["Egresso(a)"]},
+        {"ies": ["IES inexistente"], "curso": cursos[:2]},  # valor desconhecido: seleção vazia em "and"
+        {"ies": ["IES inexistente"]},
+        {"fundador": ["Sim"], "faixa": ["Até 19"]},
+    ]
+
+
+@pytest.mark.parametrize("mode", ["and", "or"])
+def test_recorte_igual_ao_filtro_booleano(survey, mode):
+    df = survey
+    id_col = "Respondent ID"
+    curso, lik = kpi_column(df, "curso"), likert_columns(df.columns)[:3]
+    sizes = []
+    for filters in _filters(df):
+        mask = _plain_mask(df, filters, mode)
+        view = segment_view(df, filters, mode)
+        plain = df[mask].reset_index(drop=True)
+        assert len(view) == mask.sum(), filters
+        sizes.append(len(view))
+        assert view.index.tolist() == df.index[mask].tolist()
+        assert bitmap_index(df).count(bitmap_index(df).mask(filters, mode)) == mask.sum()
+        # KPIs do recorte (herdam os códigos do pai) = KPIs do filtro pandas (hash do conteúdo)
+        assert n_respondents(view, id_col) == plain[id_col].nunique()
+        got = distinct_count_tables(view, id_col, [curso])[curso]
+        want = plain.groupby(curso, observed=True)[id_col].nunique()
+        # só os cursos do recorte (observed=True), sem linhas zeradas
+        assert got[curso].astype(str).tolist() == want.index.astype(str).tolist()
+        assert got[id_col].tolist() == want.tolist()
+        np.testing.assert_array_equal(likert_codes(view, lik), likert_codes(plain, lik))
+    assert sizes[3] == 0 and (mode == "or" or sizes[2] == 0)  # seleções vazias
+    assert all(0 < n < len(df) for n in sizes[:2])
+
+
+def test_sem_filtro_devolve_o_proprio_dataset(survey):
+    assert segment_view(survey, {}) is survey
+    assert segment_view(survey, {"curso": [], "ies": []}, "or") is survey
+
+
+def test_contagem_por_valor_dentro_do_recorte(survey):
+    df, index = survey, bitmap_index(survey)
+    filters = _filters(df)[0]
+    bitmap = index.mask(filters, "and")
+    perfil = df[kpi_column(df, "perfil")]
+    want = perfil[_plain_mask(df, filters, "and")].astype(str).value_counts()
+    assert index.value_counts("perfil", bitmap) == {v: int(want.get(v, 0)) for v in index.values["perfil"]}
+
+
+def test_recorte_de_um_curso_so_lista_o_curso(survey):
+    curso = bitmap_index(survey).values["curso"][0]
+    view = segment_view(survey, {"curso": [curso]})
+    assert isinstance(view, RowSubset) and view.parent is survey  # sem cópia do quadro
+    chart, tail = kpi_counts_top(view, "Respondent ID", "curso", "Curso", n=3)
+    assert chart["Curso"].astype(str).tolist() == [curso] and tail.empty
+    # o segmento seguinte reaproveita os códigos do pai, não uma cópia guardada
+    assert segment_view(survey, {"curso": [curso]}) is not view
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from kpi_registry import apply_mapping, likert_columns
+from kpis import kpi_partial, likert_intervals
+from memo import set_fingerprint
+from streaming import DistinctCount, HyperLogLog, stream_partial, stream_path
+from synthetic import synthetic_survey
+
+
+HLL_ERROR = 1.04 / np.sqrt(2**14)  # erro típico com a precisão padrão (≈ 0.8%)
+
+
+def _hashes(values) -> np.ndarray:
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+def test_distinct_count_exato_ate_o_limite():
+    d = DistinctCount(limit=1_000)
+    for chunk in np.array_split(np.arange(3_000) % 1_000, 7):  # cada ID aparece três vezes
+        d.add(_hashes(chunk))
+    assert (len(d), d.approximate) == (1_000, False)
+    d.add(_hashes([1_000]))  # passou do limite: vira sketch
+    assert d.approximate and len(d.exact) == 0
+    assert abs(len(d) - 1_001) / 1_001 < 4 * HLL_ERROR
+
+
+@pytest.mark.parametrize("n", [5_000, 200_000])
+def test_hyperloglog_dentro_do_erro_esperado(n):
+    h = HyperLogLog()
+    h.add(_hashes(np.arange(n)))
+    h.add(_hashes(np.arange(n // 2)))  # repetidos não mudam a estimativa
+    assert abs(h.count() - n) / n < 4 * HLL_ERROR
+
+
+def test_hyperloglog_soma_igual_ao_sketch_da_uniao():
+    a, b, both = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    a.add(_hashes(np.arange(0, 30_000)))
+    b.add(_hashes(np.arange(20_000, 60_000)))
+    both.add(_hashes(np.arange(0, 60_000)))
+    np.testing.assert_array_equal(a.merge(b).registers, both.registers)
+
+
+@pytest.fixture(scope="module")
+def survey_csv(tmp_path_factory):
+    # respondentes repetidos (várias linhas por ID) e IDs ausentes
+    df = synthetic_survey(3_000, likert_items=3, duplicate_rate=0.3, seed=4)
+    df["Respondent ID"] = df["Respondent ID"].astype(float)
+    df.loc[df.sample(frac=0.03, random_state=4).index, "Respondent ID"] = np.nan
+    path = tmp_path_factory.mktemp("blocos") / "export.csv"
+    df.to_csv(path, sep=";", index=False)
+    full = apply_mapping(pd.read_csv(path, sep=";"))
+    set_fingerprint(full, "teste-blocos")
+    return path, full
+
+
+def test_blocos_exatos_iguais_aos_agregados_do_quadro_inteiro(survey_csv):
+    path, full = survey_csv
+    got, _, stats = stream_partial(path, "csv", chunk_rows=400)
+    want = kpi_partial(full, "Respondent ID")
+    assert stats.blocos == 8 and stats.aproximadas == 0
+    assert (got.linhas, got.respondentes) == (want.linhas, want.respondentes)
+    assert want.respondentes == full["Respondent ID"].nunique()
+    for kind in ("valores", "opcoes"):
+        assert getattr(got, kind).keys() == getattr(want, kind).keys()
+        for c, counts in getattr(want, kind).items():
+            assert dict(getattr(got, kind)[c]) == dict(counts), c
+    assert got.likert.keys() == want.likert.keys()
+    for c, v in want.likert.items():
+        np.testing.assert_allclose(got.likert[c], v, err_msg=c)
+
+
+def test_ic_dos_blocos_igual_ao_do_quadro_inteiro(survey_csv):
+    # o bootstrap sorteia linhas por nível nos dois caminhos, não respondentes
+    path, full = survey_csv
+    cols = likert_columns(full.columns)
+    pd.testing.assert_frame_equal(likert_intervals(stream_path(path).df, cols), likert_intervals(full, cols))
+
+
+def test_blocos_com_sketch_estimam_as_contagens_grandes(survey_csv):
+    path, full = survey_csv
+    exact, _, _ = stream_partial(path, "csv", chunk_rows=400)
+    approx, _, stats = stream_partial(path, "csv", chunk_rows=400, exact_limit=200)
+    assert stats.aproximadas > 0
+    for c, counts in exact.valores.items():
+        for v, n in counts.items():
+            got = approx.valores[c][v]
+            if n <= 200:
+                assert got == n, (c, v)  # abaixo do limite continua exato
+            else:
+                assert abs(got - n) / n < 4 * HLL_ERROR, (c, v, got, n)
@@ -0,0 +1,70 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import workbook_cache
+from aggregation import distinct_count_tables
+from datasets import DATASETS
+from partials import Partial, sorted_counts
+from waves import IDS_FILE, MANIFEST, WaveStore, clear_wave_frames
+
+COL = "professores_experiencia_mercado"
+
+
+def _xlsx(df: pd.DataFrame) -> bytes:
+    buf = io.BytesIO()
+    df.to_excel(buf, index=False)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(workbook_cache, "CACHE_DIR", tmp_path / "workbooks")
+    clear_wave_frames()
+    yield WaveStore("teste", tmp_path)
+    clear_wave_frames()
+
+
+def test_ondas_com_tipos_diferentes_na_mesma_coluna(store):
+    # onda 1 em texto, onda 2 numérica: a soma dos agregados não pode falhar
+    store.append(_xlsx(pd.DataFrame({"Respondent ID": [1, 2, 3, 3], COL: ["Concordo", "5", "Discordo", "5"]})), "o1")
+    result = store.append(_xlsx(pd.DataFrame({"Respondent ID": [3, 4, 5], COL: [1, 5, 3]})), "o2")
+    assert (result.onda, result.novas, result.duplicadas) == (2, 2, 1)
+
+    merged = Partial.from_json(store.manifest()["agregados"]).valores[COL]
+    ds = store.dataset()
+    table = distinct_count_tables(ds.df, ds.id_col, [COL])[COL]
+    # mesmos valores, contagens e ordem que o motor daria no conjunto inteiro
+    assert list(merged.items()) == list(zip(table[COL].tolist(), table[ds.id_col].tolist()))
+    assert list(merged) == [3, 5, "5", "Concordo", "Discordo"]
+
+
+def test_falha_na_soma_nao_grava_a_onda(store, monkeypatch):
+    store.append(_xlsx(pd.DataFrame({"Respondent ID": [1, 2], COL: ["Concordo", "Discordo"]})), "o1")
+    files = {p.name: p.read_bytes() for p in store.dir.iterdir()}
+
+    def boom(self, other):
+        raise RuntimeError("falha na soma")
+    monkeypatch.setattr(Partial, "merge", boom)
+    with pytest.raises(RuntimeError):
+        store.append(_xlsx(pd.DataFrame({"Respondent ID": [7], COL: ["Concordo"]})), "o2")
+    assert {p.name: p.read_bytes() for p in store.dir.iterdir()} == files
+    assert {IDS_FILE, MANIFEST, "onda_0001.arrow"} == set(files)
+
+
+def test_sorted_counts_ordem_mista_e_chaves_nativas():
+    out = sorted_counts({"b": 1, np.float64(2.0): 2, "a": 3, np.int64(10): 4})
+    assert list(out) == [2.0, 10, "a", "b"]
+    assert all(not isinstance(k, np.generic) for k in out)
+
+
+def test_quadro_das_ondas_conta_no_limite_do_cache_de_datasets(store):
+    store.append(_xlsx(pd.DataFrame({"Respondent ID": [1, 2], COL: ["Concordo", "Discordo"]})), "o1")
+    before = DATASETS.bytes
+    ds = store.dataset()
+    assert DATASETS.bytes > before
+    assert store.dataset() is ds  # segundo acesso sai do cache
+    clear_wave_frames()
+    assert DATASETS.bytes == before and store.dataset() is not ds
@@ -0,0 +1,92 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from memo import stored_fingerprint
+from workbook_cache import (
+    _entry_path, cache_info, cache_size, clear_cache, content_hash, evict, read_workbook,
+)
+
+
+class _Reader:
+    """Faz o papel do parse do Excel: um valor por byte e conta as chamadas."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, data: bytes) -> pd.DataFrame:
+        self.calls += 1
+        return pd.DataFrame({"byte": list(data), "texto": [chr(65 + b % 26) for b in data]})
+
+
+def _read(data, reader, tmp_path, **kw):
+    return read_workbook(data, reader=reader, cache_dir=tmp_path, **kw)
+
+
+def test_segunda_leitura_vem_do_arrow(tmp_path):
+    reader = _Reader()
+    first = _read(b"planilha", reader, tmp_path)
+    again = _read(b"planilha", reader, tmp_path)
+    assert reader.calls == 1
+    pd.testing.assert_frame_equal(again, first)
+    assert stored_fingerprint(again) == content_hash(b"planilha")
+    assert _entry_path(content_hash(b"planilha"), tmp_path).exists()
+    # outro conteúdo é outra entrada; a variante também
+    _read(b"outra planilha", reader, tmp_path)
+    _read(b"planilha", reader, tmp_path, variant="kpi-all")
+    assert reader.calls == 3
+    assert len(cache_info(tmp_path)) == 3
+
+
+def test_limite_descarta_o_acesso_mais_antigo(tmp_path):
+    reader = _Reader()
+    blobs = [bytes([i]) * 50 for i in range(3)]
+    paths = [_entry_path(content_hash(b), tmp_path) for b in blobs]
+    for i, blob in enumerate(blobs):
+        _read(blob, reader, tmp_path)
+        os.utime(paths[i], (1000 + i, 1000 + i))
+    _read(blobs[0], reader, tmp_path)  # acesso: a primeira passa a ser a mais recente
+    assert reader.calls == 3
+    assert cache_info(tmp_path)["Arquivo"][0] == paths[0].name
+
+    assert evict(cache_size(tmp_path) - 1, tmp_path) == 1
+    assert [p.exists() for p in paths] == [True, False, True]
+    assert evict(cache_size(tmp_path), tmp_path) == 0
+
+
+def test_gravacao_respeita_max_bytes(tmp_path):
+    reader = _Reader()
+    _read(b"a" * 50, reader, tmp_path)
+    one = cache_size(tmp_path)
+    _read(b"b" * 50, reader, tmp_path, max_bytes=one)
+    assert [p.name for p in tmp_path.glob("*.arrow")] == [_entry_path(content_hash(b"b" * 50), tmp_path).name]
+
+
+def test_clear_cache(tmp_path):
+    reader = _Reader()
+    for blob in (b"a", b"b", b"c"):
+        _read(blob, reader, tmp_path)
+    assert clear_cache(tmp_path) == 3
+    assert cache_size(tmp_path) == 0
+    info = cache_info(tmp_path)
+    assert info.empty and list(info.columns) == ["Chave", "Arquivo", "MB", "Acesso"]
+    assert clear_cache(tmp_path / "inexistente") == 0
+
+
+@pytest.mark.parametrize("damage", ["truncado", "lixo"])
+def test_arquivo_corrompido_e_refeito(tmp_path, damage):
+    reader = _Reader()
+    expected = _read(b"planilha", reader, tmp_path)
+    path = _entry_path(content_hash(b"planilha"), tmp_path)
+    raw = path.read_bytes()
+    path.write_bytes(raw[: len(raw) // 2] if damage == "truncado" else b"nao sou arrow" * 10)
+
+    df = _read(b"planilha", reader, tmp_path)
+    assert reader.calls == 2  # voltou ao parse
+    pd.testing.assert_frame_equal(df, expected)
+    # a entrada foi regravada e volta a ser usada
+    pd.testing.assert_frame_equal(_read(b"planilha", reader, tmp_path), expected)
+    assert reader.calls == 2
@@ -0,0 +1,242 @@
+"""
+Acervo incremental de ondas de respostas.
+
+    python waves.py pesquisa data/onda1.xlsx data/onda2.xlsx
+    python waves.py pesquisa data/export_atualizado.xlsx   # só entram os respondentes novos
+
+O dashboard abre o acervo pela barra lateral ("Ondas de respostas").
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from compact import compact_dataset
+from datasets import DATASETS, Dataset, prepare_dataset, source_slug
+from kpi_registry import likert_columns, required_columns
+from kpis import kpi_partial
+from memo import BoundedCache, dataset_fingerprint, forget_dataset, set_fingerprint
+from partials import Partial, attach_partial
+from perf import probe
+from workbook_cache import content_hash, load_frame, save_frame
+
+# -----------------------------------------------------------------------------
+# ONDAS DE RESPOSTAS (acervo em disco + agregados somáveis)
+# -----------------------------------------------------------------------------
+# Cada onda guarda só as linhas de respondentes ainda não vistos (deduplicação
+# pelo ID: vale a primeira onda em que o respondente aparece). Com as ondas
+# disjuntas, os agregados da onda (partials.Partial) somam com os do acervo, e
+# importar custa o tamanho da onda, não o do histórico. O manifesto (ondas +
+# agregados somados) é gravado por último e de forma atômica.
+WAVES_DIR = Path(os.environ.get("CEFET_WAVES_DIR", "data/ondas"))
+WAVES_VERSION = 1
+MANIFEST = "manifesto.json"
+IDS_FILE = "ids.txt"  # IDs já vistos, um por linha (só recebe acréscimos)
+
+_LOCK = Lock()
+_PARTIALS = BoundedCache(max_entries=8, name="ondas")  # agregados do manifesto, por versão do acervo
+_MANIFESTS: dict[Path, tuple[int, dict]] = {}
+_SEEN: dict[Path, set] = {}
+
+
+class WaveResult(NamedTuple):
+    onda: int | None
+    linhas: int      # linhas lidas do arquivo
+    novas: int       # linhas de respondentes novos (entraram no acervo)
+    duplicadas: int  # linhas de respondentes já vistos
+    sem_id: int      # linhas sem ID (não há como deduplicar: ficam de fora)
+    status: str      # importada | repetida
+
+
+def id_keys(s: pd.Series) -> pd.Series:
+    """ID como texto comparável entre ondas (12 e 12.0 viram "12")."""
+    if pd.api.types.is_float_dtype(s.dtype) and (s.dropna() % 1 == 0).all():
+        s = s.astype("Int64")
+    return s.astype(str)
+
+
+def _empty_manifest() -> dict:
+    return dict(versao=WAVES_VERSION, id_col=None, colunas=[], ondas=[], n_ids=0, agregados=None)
+
+
+class WaveStore:
+    """Acervo em `WAVES_DIR/<nome>`: manifesto, um arquivo Arrow por onda e os IDs vistos."""
+
+    def __init__(self, name: str = "pesquisa", root: Path | None = None):
+        self.name = name
+        self.dir = (root or WAVES_DIR) / source_slug(name)
+
+    def manifest(self) -> dict:
+        """Manifesto atual (relido só quando o arquivo muda); vazio se o acervo não existe."""
+        path = self.dir / MANIFEST
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            return _empty_manifest()
+        hit = _MANIFESTS.get(path)
+        if hit is not None and hit[0] == mtime:
+            return hit[1]
+        try:
+            man = json.loads(path.read_text("utf-8"))
+        except (OSError, ValueError):
+            return _empty_manifest()
+        if man.get("versao") != WAVES_VERSION:
+            raise ValueError(f"Acervo {self.dir} é da versão {man.get('versao')}; esperado {WAVES_VERSION}.")
+        _MANIFESTS[path] = (mtime, man)
+        return man
+
+    def _write_manifest(self, man: dict):
+        path = self.dir / MANIFEST
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(man, ensure_ascii=False, separators=(",", ":")), "utf-8")
+        os.replace(tmp, path)
+
+    def _seen(self, man: dict) -> set:
+        # conjunto em memória; relido do disco se outro processo importou
+        path = self.dir / IDS_FILE
+        seen = _SEEN.get(path)
+        if seen is not None and len(seen) == man["n_ids"]:
+            return seen
+        try:
+            seen = set(path.read_text("utf-8").splitlines())
+        except OSError:
+            seen = set()
+        if len(seen) != man["n_ids"]:
+            # importação interrompida entre os arquivos: refaz a partir das ondas
+            seen = set()
+            for o in man["ondas"]:
+                ids = load_frame(self.dir / o["arquivo"], [man["id_col"]])[man["id_col"]]
+                seen.update(id_keys(ids.dropna()))
+            path.write_text("".join(f"{i}\n" for i in seen), "utf-8")
+        _SEEN[path] = seen
+        return seen
+
+    def append(self, data: bytes, label: str) -> WaveResult:
+        """Importa uma planilha como nova onda; a mesma planilha (mesmo conteúdo) não entra duas vezes."""
+        h = content_hash(data)
+        with _LOCK:
+            man = self.manifest()
+            if any(o["hash_fonte"] == h for o in man["ondas"]):
+                return WaveResult(None, 0, 0, 0, 0, "repetida")
+            with probe("ondas:leitura", "carga"):
+                ds = prepare_dataset(data)
+            id_col = man["id_col"] or ds.id_col
+            if id_col is None or id_col not in ds.df.columns:
+                raise ValueError(f"A planilha “{label}” não tem a coluna de ID do acervo ({id_col or 'Respondent ID'}).")
+            batch = ds.df
+            has_id = batch[id_col].notna().to_numpy()
+            ids = id_keys(batch[id_col][has_id])
+            seen = self._seen(man)
+            # consulta ao conjunto: custo proporcional à onda, não ao acervo
+            fresh = np.fromiter((i not in seen for i in ids), dtype=bool, count=len(ids))
+            new = np.zeros(len(batch), dtype=bool)
+            new[np.flatnonzero(has_id)[fresh]] = True
+            rows = batch[new].reset_index(drop=True)
+            headers = list(dict.fromkeys([*man["colunas"], *batch.columns]))
+            with probe("ondas:agregados", "agregacao"):
+                partial = kpi_partial(rows, id_col, headers)
+            forget_dataset(dataset_fingerprint(rows))
+            # soma antes de gravar: se falhar, o acervo em disco fica como estava
+            merged = partial if man["agregados"] is None else Partial.from_json(man["agregados"]).merge(partial)
+            agregados = merged.to_json()
+
+            n = len(man["ondas"]) + 1
+            self.dir.mkdir(parents=True, exist_ok=True)
+            arquivo = f"onda_{n:04d}.arrow"
+            save_frame(rows, self.dir / arquivo)
+            new_ids = list(dict.fromkeys(ids[fresh]))
+            with open(self.dir / IDS_FILE, "a", encoding="utf-8") as f:
+                f.write("".join(f"{i}\n" for i in new_ids))
+            seen.update(new_ids)
+
+            result = WaveResult(n, len(batch), int(new.sum()), int(has_id.sum() - new.sum()),
+                                int((~has_id).sum()), "importada")
+            man = dict(man, id_col=id_col, colunas=headers, n_ids=len(seen), agregados=agregados, ondas=[
+                *man["ondas"],
+                dict(onda=n, rotulo=label, arquivo=arquivo, hash_fonte=h, linhas=result.linhas,
+                     novas=result.novas, duplicadas=result.duplicadas, sem_id=result.sem_id,
+                     importada_em=datetime.now().isoformat(timespec="seconds")),
+            ])
+            self._write_manifest(man)
+        return result
+
+    def fingerprint(self, man: dict | None = None) -> str:
+        man = man or self.manifest()
+        key = json.dumps([man["id_col"], [o["hash_fonte"] for o in man["ondas"]]])
+        return "ondas-" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:32]
+
+    def dataset(self, projected: bool = False, compact: bool = False) -> Dataset | None:
+        """
+        Todas as ondas num DataFrame com os agregados anexados. O quadro fica no
+        cache de datasets (datasets.DATASETS), dentro do mesmo limite de bytes.
+        """
+        man = self.manifest()
+        if not man["ondas"]:
+            return None
+        fp = self.fingerprint(man)
+        ds = DATASETS.get_or_load(("ondas", fp, bool(projected), bool(compact)),
+                                  lambda: self._build(man, projected, compact))
+        partial = _PARTIALS.get_or_compute((fp,), lambda: Partial.from_json(man["agregados"]))
+        attach_partial(ds.df, partial)  # de novo a cada acesso: o registro de agregados é limitado
+        return ds
+
+    def _build(self, man: dict, projected: bool, compact: bool) -> Dataset:
+        id_col = man["id_col"]
+        columns = required_columns(man["colunas"]) if projected else None
+        with probe("ondas:quadro", "carga"):
+            parts = [load_frame(self.dir / o["arquivo"], columns) for o in man["ondas"]]
+            df = pd.concat(parts, ignore_index=True, sort=False) if len(parts) > 1 else parts[0]
+        set_fingerprint(df, self.fingerprint(man) + ("-kpi" if projected else ""))
+        id_values = report = None
+        if compact:
+            with probe("carga:compactar", "carga"):
+                df, id_values, report = compact_dataset(df, id_col, likert_columns(df.columns))
+        return Dataset(df, id_col, id_values, report, dataset_fingerprint(df), status="ondas")
+
+    def summary(self) -> pd.DataFrame:
+        """Uma linha por onda importada."""
+        cols = dict(onda="Onda", rotulo="Arquivo", linhas="Linhas", novas="Novas",
+                    duplicadas="Duplicadas", sem_id="Sem ID", importada_em="Importada em")
+        ondas = self.manifest()["ondas"]
+        return pd.DataFrame([{v: o[k] for k, v in cols.items()} for o in ondas], columns=list(cols.values()))
+
+
+def clear_wave_frames():
+    DATASETS.discard_if(lambda key: key[0] == "ondas")
+    _PARTIALS.clear()
+    _MANIFESTS.clear()
+    _SEEN.clear()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Importa planilhas como ondas de um acervo incremental.")
+    parser.add_argument("acervo", help="nome do acervo (pasta em CEFET_WAVES_DIR, padrão data/ondas)")
+    parser.add_argument("arquivos", nargs="+")
+    parser.add_argument("--dir", default=None, help="pasta dos acervos")
+    args = parser.parse_args(argv)
+
+    store = WaveStore(args.acervo, Path(args.dir) if args.dir else None)
+    for f in args.arquivos:
+        t0 = time.perf_counter()
+        r = store.append(Path(f).read_bytes(), Path(f).name)
+        if r.status == "repetida":
+            print(f"{f}: já importada")
+            continue
+        print(f"{f}: onda {r.onda} • {r.novas} novas • {r.duplicadas} duplicadas • {r.sem_id} sem ID "
+              f"({time.perf_counter() - t0:.2f}s)")
+    man = store.manifest()
+    print(f"acervo {store.dir}: {len(man['ondas'])} onda(s), {man['agregados']['respondentes'] if man['agregados'] else 0} respondentes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+import hashlib
+import io
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from memo import set_fingerprint
+
+try:
+    import pyarrow as pa
+except ImportError:  # sem pyarrow: lê o Excel sempre, sem cache em disco
+    pa = None
+
+# -----------------------------------------------------------------------------
+# CACHE EM DISCO (Arrow IPC endereçado pelo conteúdo da planilha)
+# -----------------------------------------------------------------------------
+CACHE_DIR = Path(os.environ.get("CEFET_CACHE_DIR", ".cache/workbooks"))
+MAX_BYTES = int(os.environ.get("CEFET_CACHE_MAX_MB", "512")) * 1024 * 1024
+SUFFIX = ".arrow"
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _typed(df: pd.DataFrame) -> pd.DataFrame:
+    # Arrow exige cabeçalhos texto e um tipo por coluna; o Excel mistura
+    # números e textos na mesma coluna (ex.: "4" e 4), que viram texto
+    df = df.rename(columns=lambda c: str(c))
+    for c in df.columns:
+        if df[c].dtype == object:
+            kind = pd.api.types.infer_dtype(df[c], skipna=True)
+            if kind not in ("string", "empty"):
+                df[c] = df[c].where(df[c].isna(), df[c].astype(str))
+    return df
+
+
+def _entry_path(key: str, cache_dir: Path) -> Path:
+    return cache_dir / f"{key}{SUFFIX}"
+
+
+def _read_entry(path: Path) -> pd.DataFrame:
+    with pa.memory_map(str(path), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    os.utime(path)  # marca o acesso para o LRU
+    return table.to_pandas()
+
+
+def _write_entry(df: pd.DataFrame, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def save_frame(df: pd.DataFrame, path: Path):
+    """Grava `df` tipado em Arrow IPC (pickle sem pyarrow), de forma atômica."""
+    if pa is None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        df.to_pickle(tmp)
+        os.replace(tmp, path)
+        return
+    _write_entry(_typed(df), path)
+
+
+def load_frame(path: Path, columns=None) -> pd.DataFrame:
+    """Lê um arquivo de `save_frame`, opcionalmente só com `columns` (as que existirem)."""
+    if pa is None:
+        df = pd.read_pickle(path)
+        return df if columns is None else df[[c for c in df.columns if c in set(columns)]]
+    with pa.memory_map(str(path), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    if columns is not None:
+        wanted = set(columns)
+        table = table.select([c for c in table.column_names if c in wanted])
+    return table.to_pandas()
+
+
+def read_workbook(data: bytes, reader=None, variant: str = "full",
+                  cache_dir: Path | None = None, max_bytes: int | None = None) -> pd.DataFrame:
+    """
+    Lê a planilha a partir dos bytes. Na primeira vez faz o parse do Excel e grava
+    um arquivo Arrow tipado; depois mapeia esse arquivo em memória (sem openpyxl).
+    `reader(bytes) -> DataFrame` e `variant` permitem caches de leituras parciais.
+    """
+    reader = reader or (lambda b: pd.read_excel(io.BytesIO(b), engine="openpyxl"))
+    key = content_hash(data)
+    fp = key if variant == "full" else f"{key}-{variant}"
+    if pa is None:
+        return set_fingerprint(_typed(reader(data)), fp)
+
+    cache_dir = cache_dir or CACHE_DIR
+    path = _entry_path(fp, cache_dir)
+    if path.exists():
+        try:
+            return set_fingerprint(_read_entry(path), fp)
+        except (OSError, pa.ArrowInvalid):
+            path.unlink(missing_ok=True)
+
+    df = _typed(reader(data))
+    try:
+        _write_entry(df, path)
+        evict(max_bytes if max_bytes is not None else MAX_BYTES, cache_dir)
+    except (OSError, pa.ArrowException):
+        pass  # cache é otimização; falha de escrita não impede o carregamento
+    return set_fingerprint(df, fp)
+
+
+def cache_info(cache_dir: Path | None = None) -> pd.DataFrame:
+    """Entradas do cache (mais recente primeiro) com tamanho e último acesso."""
+    cache_dir = cache_dir or CACHE_DIR
+    rows = []
+    for p in cache_dir.glob(f"*{SUFFIX}") if cache_dir.exists() else []:
+        info = p.stat()
+        rows.append(dict(
+            Chave=p.stem[:16],
+            Arquivo=p.name,
+            MB=round(info.st_size / 1024 / 1024, 2),
+            Acesso=pd.Timestamp(info.st_mtime, unit="s"),
+        ))
+    out = pd.DataFrame(rows, columns=["Chave", "Arquivo", "MB", "Acesso"])
+    return out.sort_values("Acesso", ascending=False, ignore_index=True)
+
+
+def evict(max_bytes: int, cache_dir: Path | None = None) -> int:
+    """Remove as entradas menos usadas até caber em `max_bytes`; retorna quantas saíram."""
+    cache_dir = cache_dir or CACHE_DIR
+    if not cache_dir.exists():
+        return 0
+    entries = sorted(cache_dir.glob(f"*{SUFFIX}"), key=lambda p: p.stat().st_mtime)
+    total = sum(p.stat().st_size for p in entries)
+    removed = 0
+    for p in entries:
+        if total <= max_bytes:
+            break
+        total -= p.stat().st_size
+        p.unlink(missing_ok=True)
+        removed += 1
+    return removed
+
+
+def clear_cache(cache_dir: Path | None = None) -> int:
+    return evict(0, cache_dir)
+
+
+def cache_size(cache_dir: Path | None = None) -> int:
+    cache_dir = cache_dir or CACHE_DIR
+    return sum(p.stat().st_size for p in cache_dir.glob(f"*{SUFFIX}")) if cache_dir.exists() else 0